@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 16:10
+# @File    : bench_pdf_utils.py
+"""
+pdf_utils 基准测试
+
+分阶段（JPEG / 原始像素渲染、JPEG / RenderedPage 栅格排版、逐页 / 整本矢量排版、合并）和端到端（merge_invoice_pack）测量
+墙钟时间、CPU 时间（含子进程）、峰值 RSS 和输出大小，结果写入 JSON，
+可以直接在不同提交之间 diff，或用 --baseline 与旧结果对比。
+
+每个基准在独立子进程中运行，峰值 RSS 互不影响；准备数据（例如先渲染好图片）
+不计入计时。
+
+用法::
+
+    python benchmarks/bench_pdf_utils.py --count 100 --output .bench/result.json
+    python benchmarks/bench_pdf_utils.py --only render,pipeline_vector --baseline .bench/old.json
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, (ROOT_DIR / "src").as_posix())
+sys.path.insert(0, (ROOT_DIR / "benchmarks").as_posix())
+
+from corpus import generate_corpus  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# ========= 基准定义 =========
+# 每个基准接收 (语料路径列表, 工作目录, 参数)，完成准备工作后返回计时函数，
+# 计时函数返回输出字节数。
+
+def bench_render(paths, work_dir, opts):
+    from utils.pdf_utils import pdf_to_image_bytesio
+
+    def run():
+        return sum(len(pdf_to_image_bytesio(p, dpi=opts.dpi).getvalue()) for p in paths)
+
+    return run
+
+
+def bench_render_parallel(paths, work_dir, opts):
+    from utils.pdf_utils import iter_render_pdfs
+
+    def run():
+        # 进程池渲染为 JPEG 字节（旧的批量渲染接口的行为），作为 render_raw 的对比基线
+        rendered = iter_render_pdfs(paths, dpi=opts.dpi, workers=opts.workers, parallel_threshold=1)
+        return sum(len(data) for _, data in rendered)
+
+    return run
+
+
+def bench_render_raw(paths, work_dir, opts):
+    from utils.pdf_utils import iter_render_pdfs
+
+    def run():
+        # 未编码的原始像素（RenderedPage），栅格流水线实际使用的渲染方式
+        rendered = iter_render_pdfs(
+            paths, dpi=opts.dpi, workers=opts.workers, parallel_threshold=1, image_format="raw"
+        )
+        return sum(page.nbytes for _, page in rendered)
+
+    return run
+
+
+def bench_compose_raster(paths, work_dir, opts):
+    from utils.pdf_utils import merge_invoices_top_bottom, pdf_to_image_bytesio
+
+    images = [pdf_to_image_bytesio(p, dpi=opts.dpi).getvalue() for p in paths]
+
+    def run():
+        size = 0
+        for i in range(0, len(images), 2):
+            buf = io.BytesIO()
+            merge_invoices_top_bottom([io.BytesIO(b) for b in images[i:i + 2]], buf)
+            size += len(buf.getvalue())
+        return size
+
+    return run
+
+
+def bench_compose_raster_raw(paths, work_dir, opts):
+    from utils.pdf_utils import _render_page_raw, merge_invoices_top_bottom
+
+    pages = [_render_page_raw(p, dpi=opts.dpi) for p in paths]
+
+    def run():
+        # RenderedPage 在嵌入时只编码一次，对比 compose_raster 的 JPEG 透传
+        size = 0
+        for i in range(0, len(pages), 2):
+            buf = io.BytesIO()
+            merge_invoices_top_bottom(pages[i:i + 2], buf)
+            size += len(buf.getvalue())
+        return size
+
+    return run
+
+
+def bench_compose_vector(paths, work_dir, opts):
+    from utils.pdf_utils import merge_invoices_top_bottom_vector
+
+    def run():
+        size = 0
+        for i in range(0, len(paths), 2):
+            buf = io.BytesIO()
+            merge_invoices_top_bottom_vector(paths[i:i + 2], buf)
+            size += len(buf.getvalue())
+        return size
+
+    return run
+
+
+def bench_compose_sheet(paths, work_dir, opts):
+    import fitz
+    from utils.pdf_utils import compose_invoice_sheet
+
+    def run():
+        # 所有排版页追加到同一个文档，不经过每页单独序列化
+        out_doc = fitz.open()
+        try:
+            for i in range(0, len(paths), 2):
+                compose_invoice_sheet(out_doc, paths[i:i + 2])
+            return len(out_doc.tobytes(garbage=3, deflate=True))
+        finally:
+            out_doc.close()
+
+    return run
+
+
+def bench_merge_pdfs(paths, work_dir, opts):
+    from utils.pdf_utils import merge_invoices_top_bottom_vector, merge_pdfs
+
+    sheets = []
+    for i in range(0, len(paths), 2):
+        buf = io.BytesIO()
+        merge_invoices_top_bottom_vector(paths[i:i + 2], buf)
+        sheets.append(buf.getvalue())
+    output = work_dir / "merge_pdfs.pdf"
+
+    def run():
+        merge_pdfs([io.BytesIO(s) for s in sheets], output.as_posix())
+        return output.stat().st_size
+
+    return run
+
+
+def _bench_pipeline(layout):
+    def bench(paths, work_dir, opts):
+        from utils.merge_pipeline import merge_invoice_pack
+
+        output = work_dir / f"pipeline_{layout}.pdf"
+
+        def run():
+            stats = merge_invoice_pack(
+                paths, [], output.as_posix(), layout=layout, dpi=opts.dpi, workers=opts.workers
+            )
+            return stats["output_bytes"]
+
+        return run
+
+    return bench
+
+
+def _bench_optimize(preset):
+    def bench(paths, work_dir, opts):
+        from utils.merge_pipeline import merge_invoice_pack
+        from utils.pdf_optimizer import optimize_pdf
+
+        source = work_dir / "optimize_source.pdf"
+        merge_invoice_pack(paths, [], source.as_posix(), layout="raster", dpi=opts.dpi, image_codec="flate")
+        output = work_dir / f"optimize_{preset}.pdf"
+
+        def run():
+            return optimize_pdf(source, output, preset)["bytes_after"]
+
+        return run
+
+    return bench
+
+
+BENCHMARKS = {
+    "render": bench_render,
+    "render_parallel": bench_render_parallel,
+    "render_raw": bench_render_raw,
+    "compose_raster": bench_compose_raster,
+    "compose_raster_raw": bench_compose_raster_raw,
+    "compose_vector": bench_compose_vector,
+    "compose_sheet": bench_compose_sheet,
+    "merge_pdfs": bench_merge_pdfs,
+    "pipeline_vector": _bench_pipeline("vector"),
+    "pipeline_raster": _bench_pipeline("raster"),
+    "optimize_screen": _bench_optimize("screen"),
+    "optimize_print": _bench_optimize("print"),
+    "optimize_archive": _bench_optimize("archive"),
+}
+
+
+# ========= 测量 =========
+
+def _peak_rss_mb():
+    """当前进程与已回收子进程中的最大峰值 RSS（MB），Windows 上返回 None"""
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024  # macOS 单位为字节，Linux 为 KB
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return round(max(self_rss, child_rss) / 1024 / 1024, 1)
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _run_child(name, paths, work_dir, opts, result_queue):
+    try:
+        run = BENCHMARKS[name](paths, work_dir, opts)
+        t0 = time.perf_counter()
+        cpu0 = time.process_time()
+        child_cpu0 = _children_cpu()
+        output_bytes = run()
+        result_queue.put({
+            "wall_time": round(time.perf_counter() - t0, 4),
+            "cpu_time": round(time.process_time() - cpu0 + _children_cpu() - child_cpu0, 4),
+            "peak_rss_mb": _peak_rss_mb(),
+            "output_bytes": output_bytes,
+        })
+    except Exception as e:
+        result_queue.put({"error": repr(e)})
+
+
+def run_benchmark(name, paths, work_dir, opts) -> dict:
+    """在独立子进程中运行 opts.repeat 次，汇总中位数"""
+    ctx = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(opts.repeat):
+        result_queue = ctx.Queue()
+        proc = ctx.Process(target=_run_child, args=(name, paths, work_dir, opts, result_queue))
+        proc.start()
+        result = result_queue.get()
+        proc.join()
+        if "error" in result:
+            return result
+        runs.append(result)
+    return {
+        "wall_time": round(statistics.median(r["wall_time"] for r in runs), 4),
+        "cpu_time": round(statistics.median(r["cpu_time"] for r in runs), 4),
+        "peak_rss_mb": max((r["peak_rss_mb"] or 0) for r in runs) or None,
+        "output_bytes": runs[-1]["output_bytes"],
+        "runs": runs,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict):
+    """打印与基线结果的对比（百分比为相对基线的变化）"""
+    print(f"{'benchmark':<18}{'wall':>10}{'cpu':>10}{'rss':>10}{'size':>10}")
+    for name, cur in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base or "error" in cur or "error" in base:
+            continue
+        cells = []
+        for key in ("wall_time", "cpu_time", "peak_rss_mb", "output_bytes"):
+            if cur.get(key) and base.get(key):
+                cells.append(f"{(cur[key] - base[key]) / base[key] * 100:+.1f}%")
+            else:
+                cells.append("-")
+        print(f"{name:<18}" + "".join(f"{c:>10}" for c in cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pdf_utils 基准测试")
+    parser.add_argument("--count", type=int, default=100, help="合成发票数量")
+    parser.add_argument("--seed", type=int, default=20251018)
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=0, help="并行基准使用的进程数，0 表示 CPU 核数")
+    parser.add_argument("--repeat", type=int, default=3, help="每个基准的重复次数，取中位数")
+    parser.add_argument("--only", help="只运行指定基准，逗号分隔")
+    parser.add_argument("--work-dir", default=(ROOT_DIR / ".bench").as_posix())
+    parser.add_argument("--output", default=None, help="结果 JSON 路径，默认 <work-dir>/result.json")
+    parser.add_argument("--baseline", help="与之对比的旧结果 JSON")
+    opts = parser.parse_args(argv)
+
+    work_dir = Path(opts.work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    paths = [p.as_posix() for p in generate_corpus(work_dir / "corpus", opts.count, opts.seed)]
+    names = opts.only.split(",") if opts.only else list(BENCHMARKS)
+
+    result = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "count": opts.count,
+            "seed": opts.seed,
+            "dpi": opts.dpi,
+            "workers": opts.workers,
+            "repeat": opts.repeat,
+        },
+        "benchmarks": {},
+    }
+    for name in names:
+        print(f"运行 {name} ...", file=sys.stderr)
+        result["benchmarks"][name] = run_benchmark(name, paths, work_dir, opts)
+        print(f"  {json.dumps({k: v for k, v in result['benchmarks'][name].items() if k != 'runs'})}",
+              file=sys.stderr)
+
+    output = Path(opts.output) if opts.output else work_dir / "result.json"
+    output.write_text(json.dumps(result, indent=2, sort_keys=True, ensure_ascii=False), encoding="utf-8")
+    print(f"结果已写入 {output}", file=sys.stderr)
+
+    if opts.baseline:
+        compare(result, json.loads(Path(opts.baseline).read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
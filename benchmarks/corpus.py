@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 15:40
+# @File    : corpus.py
+"""
+合成发票语料生成器
+
+用 reportlab 在本地生成 N 张结构类似真实电子发票的 PDF：标题、抬头、明细表格、
+logo 图片、金额合计，页面尺寸在几种常见规格之间轮换。相同 seed 生成的文件内容一致，
+保证基准测试结果可以在不同提交之间对比。
+
+用法::
+
+    python benchmarks/corpus.py --count 200 --out .bench/corpus
+"""
+import argparse
+import io
+import random
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, A5, landscape, letter
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+# 常见发票页面尺寸：电子发票（241x140mm）、A5 横向、A4、Letter
+PAGE_SIZES = [
+    (241 * mm, 140 * mm),
+    landscape(A5),
+    A4,
+    letter,
+]
+
+
+def make_logo(seed: int, size=256) -> bytes:
+    """生成一张带渐变和图形的 PNG logo，模拟发票上的印章 / 图标"""
+    rnd = random.Random(seed)
+    img = Image.new("RGB", (size, size), "white")
+    draw = ImageDraw.Draw(img)
+    base = (rnd.randint(0, 200), rnd.randint(0, 200), rnd.randint(0, 200))
+    for y in range(size):
+        shade = tuple(min(255, c + y // 3) for c in base)
+        draw.line([(0, y), (size, y)], fill=shade)
+    draw.ellipse([size * 0.15, size * 0.15, size * 0.85, size * 0.85], outline="red", width=8)
+    draw.rectangle([size * 0.35, size * 0.35, size * 0.65, size * 0.65], fill="white")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def make_invoice(output_path, seed: int, logo: bytes = None):
+    """生成一张合成发票 PDF"""
+    rnd = random.Random(seed)
+    width, height = PAGE_SIZES[seed % len(PAGE_SIZES)]
+    c = canvas.Canvas(str(output_path), pagesize=(width, height))
+    margin = 12 * mm
+
+    # 标题与抬头
+    c.setFont("Helvetica-Bold", 16)
+    c.drawCentredString(width / 2, height - margin - 6 * mm, "ELECTRONIC INVOICE")
+    c.setFont("Helvetica", 8)
+    c.drawString(margin, height - margin - 14 * mm, f"Invoice No. {rnd.randint(10 ** 7, 10 ** 8 - 1)}")
+    c.drawString(margin, height - margin - 18 * mm, f"Date: 2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}")
+    c.drawString(width / 2, height - margin - 14 * mm, f"Buyer: Company {rnd.randint(1, 999)} Ltd.")
+    c.drawString(width / 2, height - margin - 18 * mm, f"Tax ID: 91{rnd.randint(10 ** 15, 10 ** 16 - 1)}")
+
+    # logo
+    if logo:
+        logo_size = 20 * mm
+        c.drawImage(
+            ImageReader(io.BytesIO(logo)),
+            width - margin - logo_size,
+            height - margin - logo_size,
+            logo_size,
+            logo_size,
+        )
+
+    # 明细表格
+    top = height - margin - 24 * mm
+    row_h = 5 * mm
+    rows = rnd.randint(3, 10)
+    cols = [margin, margin + 60 * mm, margin + 90 * mm, margin + 120 * mm, width - margin]
+    c.setStrokeColor(colors.darkred)
+    c.setLineWidth(0.5)
+    c.rect(margin, top - (rows + 1) * row_h, width - 2 * margin, (rows + 1) * row_h)
+    for x in cols[1:-1]:
+        c.line(x, top, x, top - (rows + 1) * row_h)
+    c.setFont("Helvetica-Bold", 7)
+    for x, title in zip(cols, ["Item", "Qty", "Unit price", "Amount"]):
+        c.drawString(x + 2, top - row_h + 1.5 * mm, title)
+    c.setFont("Helvetica", 7)
+    total = 0.0
+    for r in range(1, rows + 1):
+        y = top - r * row_h
+        c.line(margin, y, width - margin, y)
+        qty = rnd.randint(1, 20)
+        price = rnd.uniform(1, 500)
+        total += qty * price
+        values = [f"Service item #{rnd.randint(1, 9999)}", str(qty), f"{price:.2f}", f"{qty * price:.2f}"]
+        for x, value in zip(cols, values):
+            c.drawString(x + 2, y - row_h + 1.5 * mm, value)
+
+    # 合计
+    c.setFont("Helvetica-Bold", 9)
+    c.drawRightString(width - margin, top - (rows + 2) * row_h, f"Total: {total:,.2f}")
+    c.showPage()
+    c.save()
+
+
+def generate_corpus(out_dir, count: int, seed: int = 20251018, logo_variants: int = 4) -> list:
+    """
+    生成 count 张合成发票，已存在的文件不会重复生成
+
+    :param out_dir: 输出目录
+    :param count: 发票数量
+    :param seed: 随机种子
+    :param logo_variants: logo 种类数量，同一 logo 会在多张发票中重复出现
+    :return: 生成的 PDF 路径列表（按序号排序）
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    logos = [make_logo(seed + i) for i in range(logo_variants)]
+    paths = []
+    for i in range(count):
+        path = out_dir / f"invoice_{seed}_{i:05d}.pdf"
+        if not path.exists():
+            make_invoice(path, seed + i, logos[i % len(logos)])
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成合成发票语料")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=20251018)
+    parser.add_argument("--out", default=".bench/corpus")
+    args = parser.parse_args()
+    files = generate_corpus(args.out, args.count, args.seed)
+    print(f"生成 {len(files)} 张发票 → {args.out}")
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 15:00
+# @File    : cli.py
+"""
+发票合并命令行入口（无界面，不依赖 PySide6）
+
+示例::
+
+    python src/cli.py merge -i "invoices/**/*.pdf" -a "statements/*.pdf" -o out.pdf --workers 8
+    python src/cli.py merge -m manifest.json -o out.pdf --layout raster --dpi 200
+    python src/cli.py merge -i "invoices/*.pdf" -o out.pdf --optimize screen
+    python src/cli.py optimize big.pdf -o small.pdf --preset screen print archive
+
+进度和结果以 JSON Lines 输出到 stdout，日志输出到 stderr。
+"""
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from pathlib import Path
+
+import fitz
+
+from core import settings
+from utils.merge_pipeline import ProgressEta, merge_invoice_pack
+from utils.page_range import parse_page_range
+from utils.pdf_optimizer import OPTIMIZE_PRESETS, optimize_pdf
+from utils.render_cache import RenderCache
+
+logger = logging.getLogger("app")
+
+_emit_lock = threading.Lock()
+
+
+def emit(event: str, **fields):
+    """输出一行 JSON 事件"""
+    record = {"event": event, "ts": round(time.time(), 3), **fields}
+    with _emit_lock:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        sys.stdout.flush()
+
+
+def expand_globs(patterns) -> list:
+    """展开通配符（支持 **），保持参数顺序，同一参数内按文件名排序"""
+    paths = []
+    for pattern in patterns or []:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        if not matches and Path(pattern).is_file():
+            matches = [pattern]
+        if not matches:
+            logger.warning(f"没有匹配的文件: {pattern}")
+        paths.extend(m for m in matches if m.lower().endswith(".pdf"))
+    return paths
+
+
+def load_manifest(manifest_path) -> tuple:
+    """
+    读取清单文件，返回 (发票条目, 附件条目)，条目为 (路径, 范围表达式或 None)
+
+    - .json：{"invoices": ["a.pdf", {"path": "b.pdf", "range": "1-2"}], "attachments": [...]}
+    - 其他：每行一个发票路径，# 开头为注释
+    """
+    manifest_path = Path(manifest_path)
+    base_dir = manifest_path.parent
+    if manifest_path.suffix.lower() == ".json":
+        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+        def entries(items):
+            result = []
+            for item in items or []:
+                if isinstance(item, str):
+                    item = {"path": item}
+                result.append(((base_dir / item["path"]).as_posix(), item.get("range")))
+            return result
+
+        return entries(data.get("invoices")), entries(data.get("attachments"))
+
+    invoices = []
+    for line in manifest_path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            invoices.append(((base_dir / line).as_posix(), None))
+    return invoices, []
+
+
+def resolve_ranges(entries, default_range=None) -> list:
+    """把 (路径, 范围表达式) 解析为 (路径, PageRange)；没有范围时返回 (路径, None)"""
+    resolved = []
+    for pdf_path, expr in entries:
+        expr = expr or default_range
+        if expr:
+            with fitz.open(pdf_path) as doc:
+                page_count = doc.page_count
+            resolved.append((pdf_path, parse_page_range(expr, page_count)))
+        else:
+            resolved.append((pdf_path, None))
+    return resolved
+
+
+def cmd_merge(args) -> int:
+    invoices = [(p, None) for p in expand_globs(args.inputs)]
+    attachments = [(p, None) for p in expand_globs(args.attachments)]
+    if args.manifest:
+        manifest_invoices, manifest_attachments = load_manifest(args.manifest)
+        invoices.extend(manifest_invoices)
+        attachments.extend(manifest_attachments)
+    if not invoices and not attachments:
+        emit("error", message="没有输入文件")
+        return 2
+
+    invoices = resolve_ranges(invoices, args.invoice_range)
+    attachments = resolve_ranges(attachments)
+    # 发票未指定范围时取第 1 页，与界面默认行为一致
+    invoices = [(p, pages if pages is not None else [0]) for p, pages in invoices]
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    emit(
+        "start",
+        output=output.as_posix(),
+        invoices=len(invoices),
+        attachments=len(attachments),
+        layout=args.layout,
+        dpi=args.dpi,
+        workers=args.workers,
+    )
+
+    stage_times = {}
+    t0 = time.perf_counter()
+    cpu0 = time.process_time()
+    eta = ProgressEta()
+
+    def on_progress(stage, done, total, file_path):
+        now = time.perf_counter() - t0
+        first, _ = stage_times.get(stage, (now, now))
+        stage_times[stage] = (first, now)
+        remaining = eta.eta(stage, done, total)
+        emit(
+            "progress", stage=stage, done=done, total=total, file=file_path, elapsed=round(now, 3),
+            eta=None if remaining is None else round(remaining, 1),
+        )
+
+    cache = None
+    if args.cache and args.layout == "raster":
+        cache = RenderCache(settings.PDF_RENDER_CACHE_DIR, settings.PDF_RENDER_CACHE_MAX_BYTES)
+    try:
+        stats = merge_invoice_pack(
+            invoices,
+            attachments,
+            output.as_posix(),
+            layout=args.layout,
+            margin_mode=args.margin,
+            dpi=args.dpi,
+            workers=args.workers,
+            parallel_threshold=settings.PDF_RENDER_PARALLEL_THRESHOLD,
+            raster_fallback=args.raster_fallback,
+            image_codec=args.image_codec,
+            image_quality=args.image_quality,
+            memory_limit=args.memory_limit_mb * 1024 * 1024,
+            queue_size=settings.PDF_PIPELINE_QUEUE_SIZE,
+            cache=cache,
+            optimize=args.optimize,
+            on_progress=on_progress,
+        )
+    except Exception as e:
+        logger.exception(f"合并失败: {e}")
+        emit("error", message=str(e), elapsed=round(time.perf_counter() - t0, 3))
+        return 1
+    finally:
+        if cache:
+            cache.close()
+
+    emit(
+        "done",
+        output=output.as_posix(),
+        wall_time=round(time.perf_counter() - t0, 3),
+        cpu_time=round(time.process_time() - cpu0, 3),
+        stages={k: round(last - first, 3) for k, (first, last) in stage_times.items()},
+        stats=stats,
+    )
+    return 0
+
+
+def cmd_optimize(args) -> int:
+    input_file = Path(args.input)
+    if not input_file.is_file():
+        emit("error", message=f"文件不存在: {input_file.as_posix()}")
+        return 2
+    output = Path(args.output) if args.output else input_file.with_name(f"{input_file.stem}.optimized.pdf")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    emit("start", input=input_file.as_posix(), presets=args.preset)
+
+    results = {}
+    for preset in args.preset:
+        # 多个预设时逐个输出到 <文件名>.<预设>.pdf，便于比较
+        target = output if len(args.preset) == 1 else output.with_name(f"{output.stem}.{preset}.pdf")
+        try:
+            stats = optimize_pdf(input_file, target, preset)
+        except Exception as e:
+            logger.exception(f"优化失败: {e}")
+            emit("error", message=str(e), preset=preset)
+            return 1
+        results[preset] = stats
+        emit("optimized", output=target.as_posix(), **stats)
+    emit("done", presets=results)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="workkit", description="WorkKit 发票合并命令行工具")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出详细日志到 stderr")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    merge = subparsers.add_parser("merge", help="合并发票：每两张排一页 A4，附件追加到末尾")
+    merge.add_argument("-i", "--inputs", nargs="*", default=[], help="发票 PDF 通配符，支持 **")
+    merge.add_argument("-a", "--attachments", nargs="*", default=[], help="附件 PDF 通配符，原样追加")
+    merge.add_argument("-m", "--manifest", help="清单文件（.json 或每行一个路径的文本）")
+    merge.add_argument("-o", "--output", required=True, help="输出 PDF 路径")
+    merge.add_argument(
+        "--layout", choices=["vector", "raster"], default=settings.PDF_LAYOUT_ENGINE, help="排版引擎"
+    )
+    merge.add_argument(
+        "--margin", choices=["none", "narrow", "wide"], default=settings.PDF_MARGIN_MODE, help="边距模式"
+    )
+    merge.add_argument("--dpi", type=int, default=settings.PDF_RENDER_DPI, help="栅格化渲染 DPI")
+    merge.add_argument(
+        "--workers", type=int, default=settings.PDF_RENDER_WORKERS, help="渲染进程数，0 表示 CPU 核数"
+    )
+    merge.add_argument(
+        "--image-codec", choices=["jpeg", "flate"], default=settings.PDF_IMAGE_CODEC, help="栅格排版图片压缩方式"
+    )
+    merge.add_argument("--image-quality", type=int, default=settings.PDF_IMAGE_QUALITY, help="JPEG 质量（1~95）")
+    merge.add_argument("--invoice-range", help="发票默认页码范围，例如 1-2；默认只取第 1 页")
+    merge.add_argument(
+        "--memory-limit-mb",
+        type=int,
+        default=settings.PDF_PIPELINE_MEMORY_LIMIT // 1024 // 1024,
+        help="渲染结果内存上限（MB）",
+    )
+    merge.add_argument(
+        "--raster-fallback",
+        action=argparse.BooleanOptionalAction,
+        default=settings.PDF_RASTER_FALLBACK,
+        help="矢量嵌入失败时退回栅格化",
+    )
+    merge.add_argument(
+        "--no-cache",
+        dest="cache",
+        action="store_false",
+        default=settings.PDF_RENDER_CACHE_ENABLED,
+        help="不使用渲染缓存",
+    )
+    merge.add_argument(
+        "--optimize",
+        choices=list(OPTIMIZE_PRESETS),
+        default=settings.PDF_OPTIMIZE_PRESET,
+        help="合并后按预设压缩体积",
+    )
+    merge.set_defaults(func=cmd_merge)
+
+    optimize = subparsers.add_parser("optimize", help="压缩 PDF 体积：图片降采样与重编码、对象去重、对象流")
+    optimize.add_argument("input", help="输入 PDF 路径")
+    optimize.add_argument("-o", "--output", help="输出 PDF 路径，默认 <文件名>.optimized.pdf")
+    optimize.add_argument(
+        "--preset",
+        nargs="+",
+        choices=list(OPTIMIZE_PRESETS),
+        default=["print"],
+        help="优化预设，可指定多个分别输出以便比较",
+    )
+    optimize.set_defaults(func=cmd_optimize)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format=settings.LOG_CONFIG["formatters"]["standard"]["format"],
+    )
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 23:40
+# @File    : event_bus.py
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from controllers.task_pool import TaskPool, TaskRejected
+
+logger = logging.getLogger(__name__)
+
+# 主题层级分隔符与通配符：* 匹配一层，# 匹配零层或多层（只能出现在末尾）
+TOPIC_SEPARATOR = "."
+WILDCARD_ONE = "*"
+WILDCARD_ANY = "#"
+
+# 订阅队列已满时的策略
+POLICY_DROP_OLDEST = "drop_oldest"  # 丢弃最早的事件，发布方不等待
+POLICY_BLOCK = "block"  # 发布方阻塞到队列有空位（背压）
+
+# 投递方式
+DELIVERY_THREAD = "thread"  # 每个订阅者一个投递线程
+DELIVERY_POOL = "pool"  # 共享线程池投递，同一订阅者的事件仍按顺序处理
+DELIVERY_SYNC = "sync"  # 在发布方线程中直接回调（与旧原型行为一致）
+
+
+@dataclass(frozen=True)
+class Event:
+    topic: str
+    payload: Any
+    timestamp: float = field(default_factory=time.time)
+
+
+class Subscription:
+    """
+    一个订阅者：主题模式、回调和独立的有界事件队列
+
+    batch_size > 1 时回调一次收到 list[Event]（突发事件合并投递，最多 batch_size 个），
+    否则逐个收到 Event。回调抛出的异常记录日志后继续处理后续事件。
+    """
+
+    def __init__(self, bus, pattern, callback, max_queue, policy, delivery, batch_size, name):
+        self.bus = bus
+        self.pattern = pattern
+        self.callback = callback
+        self.max_queue = max_queue
+        self.policy = policy
+        self.delivery = delivery
+        self.batch_size = batch_size
+        self.name = name or getattr(callback, "__qualname__", repr(callback))
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._draining = False  # 线程池投递时是否已有处理任务在途
+        self._thread = None
+        if delivery == DELIVERY_THREAD:
+            self._thread = threading.Thread(target=self._thread_loop, name=f"event-{self.name}", daemon=True)
+            self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def offer(self, event: Event, timeout=None) -> bool:
+        """
+        放入事件
+
+        :param timeout: block 策略下的最长等待秒数，None 表示一直等待
+        :return: 是否放入（订阅已关闭、等待超时时返回 False）
+        """
+        if self.delivery == DELIVERY_SYNC:
+            if self._closed:
+                return False
+            self._invoke([event])
+            return True
+        submit_drain = False
+        with self._cond:
+            if self._closed:
+                return False
+            if self.max_queue and len(self._queue) >= self.max_queue:
+                if self.policy == POLICY_BLOCK:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while not self._closed and len(self._queue) >= self.max_queue:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._cond.wait(remaining)
+                    if self._closed:
+                        return False
+                else:
+                    self._queue.popleft()
+                    self.dropped += 1
+            self._queue.append(event)
+            if self.delivery == DELIVERY_POOL and not self._draining:
+                self._draining = submit_drain = True
+            self._cond.notify_all()
+        if submit_drain:
+            try:
+                self.bus.pool.submit(self._drain, group=self.bus.pool_group)
+            except TaskRejected:
+                # 线程池拒绝时放开标记，下一次发布会重新提交处理任务
+                with self._cond:
+                    self._draining = False
+                raise
+        return True
+
+    def _take_batch(self) -> list:
+        """取出一批事件（需持有锁）"""
+        count = min(len(self._queue), self.batch_size)
+        batch = [self._queue.popleft() for _ in range(count)]
+        # 队列腾出空位，唤醒 block 策略下等待的发布方
+        self._cond.notify_all()
+        return batch
+
+    def _invoke(self, batch):
+        try:
+            if self.batch_size > 1:
+                self.callback(batch)
+            else:
+                for event in batch:
+                    self.callback(event)
+        except Exception:
+            self.errors += 1
+            logger.exception(f"事件订阅者 {self.name} 处理失败: {batch[0].topic}")
+        self.delivered += len(batch)
+
+    def _thread_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                batch = self._take_batch()
+            self._invoke(batch)
+
+    def _drain(self):
+        """线程池任务：处理队列中的事件直到清空，同一订阅者同时只有一个任务在处理"""
+        while True:
+            with self._cond:
+                if not self._queue or self._closed:
+                    self._draining = False
+                    return
+                batch = self._take_batch()
+            self._invoke(batch)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def close(self):
+        """关闭订阅，丢弃未投递的事件"""
+        with self._cond:
+            self._closed = True
+            self.dropped += len(self._queue)
+            self._queue.clear()
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def unsubscribe(self):
+        self.bus.unsubscribe(self)
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "pattern": self.pattern,
+            "delivery": self.delivery,
+            "pending": self.pending(),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+class _TopicNode:
+    __slots__ = ("children", "subscriptions")
+
+    def __init__(self):
+        self.children = {}
+        self.subscriptions = []
+
+
+def split_topic(topic: str) -> list:
+    return topic.split(TOPIC_SEPARATOR) if topic else []
+
+
+def make_topic(*parts) -> str:
+    """拼接层级主题，例如 make_topic("product", 101, "stock") → "product.101.stock" """
+    return TOPIC_SEPARATOR.join(str(part) for part in parts)
+
+
+class EventBus:
+    """
+    事件总线
+
+    - 主题按 "." 分层，订阅模式支持 * （一层）和 #（零层或多层，只能在末尾），
+      例如 "product.*.stock"、"product.101.#"；订阅保存在前缀树中，发布时只沿主题路径匹配，
+      不再需要为每个 (商品, 账号) 拼接单独的键
+    - 每个订阅者有独立的有界队列，慢订阅者不会拖慢发布方和其他订阅者；
+      队列满时按订阅的策略丢弃最早的事件（drop_oldest）或让发布方等待（block）
+    - 投递方式：每个订阅者一个线程（thread）、共享线程池（pool）或发布方线程同步回调（sync）
+    - batch_size > 1 的订阅者一次收到一批事件，适合处理突发
+    """
+
+    def __init__(self, pool: Optional[TaskPool] = None, pool_workers=4, pool_group="event-bus"):
+        """
+        :param pool: pool 投递使用的线程池，None 时在第一次需要时创建
+        :param pool_workers: 自行创建线程池时的线程数
+        :param pool_group: 投递任务所属的任务组
+        """
+        self._pool = pool
+        self._own_pool = pool is None
+        self.pool_workers = pool_workers
+        self.pool_group = pool_group
+        self.published = 0
+        self._root = _TopicNode()
+        self._lock = threading.RLock()
+        self._subscriptions = []
+
+    @property
+    def pool(self) -> TaskPool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = TaskPool(workers=self.pool_workers, name="event-bus")
+            return self._pool
+
+    # ---- 订阅 ----
+    def subscribe(
+            self,
+            pattern: str,
+            callback,
+            max_queue=1000,
+            policy=POLICY_DROP_OLDEST,
+            delivery=DELIVERY_POOL,
+            batch_size=1,
+            name=None,
+    ) -> Subscription:
+        """
+        订阅主题
+
+        :param pattern: 主题或带通配符的模式
+        :param callback: 回调，batch_size > 1 时参数为 list[Event]，否则为 Event
+        :param max_queue: 订阅队列上限，0 表示不限制
+        :param policy: 队列已满时的策略：drop_oldest / block
+        :param delivery: 投递方式：thread / pool / sync
+        :param batch_size: 每次回调最多合并的事件数
+        :param name: 订阅者名称（日志和统计用）
+        """
+        parts = split_topic(pattern)
+        if WILDCARD_ANY in parts[:-1]:
+            raise ValueError(f"# 只能出现在主题模式末尾: {pattern}")
+        if policy not in (POLICY_DROP_OLDEST, POLICY_BLOCK):
+            raise ValueError(f"未知的队列策略: {policy}")
+        if delivery not in (DELIVERY_THREAD, DELIVERY_POOL, DELIVERY_SYNC):
+            raise ValueError(f"未知的投递方式: {delivery}")
+        subscription = Subscription(self, pattern, callback, max_queue, policy, delivery, max(1, batch_size), name)
+        with self._lock:
+            node = self._root
+            for part in parts:
+                node = node.children.setdefault(part, _TopicNode())
+            node.subscriptions.append(subscription)
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """取消订阅，未投递的事件被丢弃"""
+        with self._lock:
+            path = [self._root]
+            for part in split_topic(subscription.pattern):
+                node = path[-1].children.get(part)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                node = path[-1]
+                if subscription in node.subscriptions:
+                    node.subscriptions.remove(subscription)
+                # 清理不再有订阅的空节点
+                parts = split_topic(subscription.pattern)
+                for depth in range(len(parts), 0, -1):
+                    child = path[depth]
+                    if child.subscriptions or child.children:
+                        break
+                    del path[depth - 1].children[parts[depth - 1]]
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        subscription.close()
+
+    # ---- 发布 ----
+    def match(self, topic: str) -> list:
+        """返回与主题匹配的订阅"""
+        parts = split_topic(topic)
+        matched = []
+        with self._lock:
+            nodes = [self._root]
+            for part in parts:
+                next_nodes = []
+                for node in nodes:
+                    any_node = node.children.get(WILDCARD_ANY)
+                    if any_node is not None:
+                        matched.extend(any_node.subscriptions)
+                    for key in (part, WILDCARD_ONE):
+                        child = node.children.get(key)
+                        if child is not None:
+                            next_nodes.append(child)
+                nodes = next_nodes
+                if not nodes:
+                    break
+            for node in nodes:
+                matched.extend(node.subscriptions)
+                # "#" 也匹配零层，例如 "product.#" 匹配 "product"
+                any_node = node.children.get(WILDCARD_ANY)
+                if any_node is not None:
+                    matched.extend(any_node.subscriptions)
+        # 同一订阅可能经由不同路径匹配多次（例如 "a.#" 与 "a"），去重并保持顺序
+        return list(dict.fromkeys(matched))
+
+    def publish(self, topic: str, payload=None, timeout=None) -> int:
+        """
+        发布事件
+
+        :param timeout: block 策略的订阅队列已满时最长等待秒数
+        :return: 接收该事件的订阅数
+        """
+        if WILDCARD_ONE in topic or WILDCARD_ANY in topic:
+            raise ValueError(f"发布的主题不能包含通配符: {topic}")
+        event = Event(topic, payload)
+        self.published += 1
+        return sum(subscription.offer(event, timeout) for subscription in self.match(topic))
+
+    # ---- 状态 / 关闭 ----
+    def snapshot(self) -> dict:
+        """总线状态；订阅按订阅顺序列出（名称可能重复，例如同一个方法订阅多个主题）"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return {
+            "published": self.published,
+            "subscriptions": [s.snapshot() for s in subscriptions],
+        }
+
+    def close(self):
+        """关闭所有订阅，自行创建的线程池一并关闭"""
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+            self._root = _TopicNode()
+        for subscription in subscriptions:
+            subscription.close()
+        if self._own_pool and self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
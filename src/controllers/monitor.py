@@ -0,0 +1,346 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 00:15
+# @File    : monitor.py
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from controllers.event_bus import EventBus, make_topic
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MonitorTarget:
+    """
+    一个监控目标
+
+    fetch 可以是协程函数（直接在事件循环中执行），也可以是普通函数（放到线程池执行，
+    用于暂时只有阻塞实现的请求）。
+    """
+
+    key: str  # 唯一标识，例如 "product.101"
+    fetch: Callable
+    interval: float
+    args: tuple = ()
+    host: str = ""  # 同一 host 的请求共享并发上限，空字符串表示不限制
+    timeout: Optional[float] = None
+    jitter: float = 0.0  # 每次等待随机浮动 ±jitter 比例
+    backoff_max: float = 60.0  # 连续失败时等待 interval * 2 ** (n - 1)，最长 backoff_max 秒
+    # 统计
+    runs: int = field(default=0, compare=False)
+    errors: int = field(default=0, compare=False)
+    consecutive_errors: int = field(default=0, compare=False)
+    last_elapsed: float = field(default=0.0, compare=False)
+
+    def __post_init__(self):
+        # 间隔为 0 时协程会以 sleep(0) 空转，占满事件循环
+        if not self.interval > 0:
+            raise ValueError(f"监控间隔必须大于 0: {self.key} interval={self.interval}")
+
+
+@dataclass(frozen=True)
+class MonitorResult:
+    key: str
+    value: Any
+    error: Optional[str]
+    elapsed: float
+    timestamp: float
+
+
+class SignalBridge:
+    """
+    把结果交给 Qt 信号
+
+    只调用 signal.emit，不依赖 PySide6；Qt 在跨线程 emit 时自动排队到接收者所在线程，
+    界面线程不会直接运行监控代码。
+    """
+
+    def __init__(self, result_signal, error_signal=None):
+        """
+        :param result_signal: 成功时 emit(key, value)
+        :param error_signal: 失败时 emit(key, 错误信息)，None 时不发出
+        """
+        self.result_signal = result_signal
+        self.error_signal = error_signal
+
+    def __call__(self, result: MonitorResult):
+        if result.error is None:
+            self.result_signal.emit(result.key, result.value)
+        elif self.error_signal is not None:
+            self.error_signal.emit(result.key, result.error)
+
+
+class EventBusBridge:
+    """
+    把结果发布到事件总线，主题为 prefix.key，负载为 MonitorResult
+
+    默认不等待 block 策略下队列已满的订阅者（这次结果对该订阅者计为丢弃），
+    慢订阅者不会拖住监控引擎
+    """
+
+    def __init__(self, bus: EventBus, prefix="monitor", errors=False, timeout=0.0):
+        """
+        :param prefix: 主题前缀，空字符串时直接使用 key
+        :param errors: 是否同时发布失败的结果
+        :param timeout: 订阅队列已满时最长等待秒数，None 表示一直等待
+        """
+        self.bus = bus
+        self.prefix = prefix
+        self.errors = errors
+        self.timeout = timeout
+
+    def __call__(self, result: MonitorResult):
+        if result.error is not None and not self.errors:
+            return
+        topic = make_topic(self.prefix, result.key) if self.prefix else result.key
+        self.bus.publish(topic, result, timeout=self.timeout)
+
+
+class MonitorEngine:
+    """
+    基于 asyncio 的监控引擎
+
+    所有目标在同一个事件循环中轮询，每个目标一个协程，数量不受线程数限制：
+
+    - 每个目标有自己的间隔，按固定节拍执行，执行超时时跳过错过的节拍；
+      启动时在一个间隔内随机错开，避免大量目标同时请求
+    - max_concurrency 限制同时进行的请求总数，per_host 限制同一 host 的并发数
+    - 结果交给 sinks（SignalBridge / EventBusBridge 或任意接收 MonitorResult 的函数）；
+      接收者在线程池中调用，不阻塞事件循环，同一目标的结果按产生顺序交付
+
+    start() 在独立线程中运行事件循环，add() / remove() 可在任意线程调用；
+    也可以在已有事件循环中 await run()。
+    """
+
+    def __init__(self, max_concurrency=100, per_host=4, executor_workers=8, sinks=(), sink_workers=4, stagger=True):
+        """
+        :param max_concurrency: 同时进行的请求总数上限
+        :param per_host: 同一 host 的并发上限，0 表示不限制
+        :param executor_workers: 执行普通（阻塞）fetch 函数的线程数
+        :param sinks: 结果接收者
+        :param sink_workers: 调用结果接收者的线程数
+        :param stagger: 是否在第一个间隔内随机错开各目标的首次执行
+        """
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.executor_workers = executor_workers
+        self.sinks = list(sinks)
+        self.sink_workers = sink_workers
+        self.stagger = stagger
+        self._targets = {}  # key → MonitorTarget
+        self._tasks = {}  # key → asyncio.Task
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopped: Optional[asyncio.Event] = None
+        self._global_sem: Optional[asyncio.Semaphore] = None
+        self._host_sems = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._sink_executor: Optional[ThreadPoolExecutor] = None
+
+    # ---- 目标管理 ----
+    def add(self, target: MonitorTarget):
+        """添加或替换一个目标（线程安全）"""
+        if not target.interval > 0:
+            raise ValueError(f"监控间隔必须大于 0: {target.key} interval={target.interval}")
+        self._targets[target.key] = target
+        self._call_in_loop(self._start_target, target)
+
+    def remove(self, key):
+        """移除一个目标（线程安全）"""
+        self._targets.pop(key, None)
+        self._call_in_loop(self._cancel_target, key)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def _call_in_loop(self, fn, *args):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return  # 尚未启动，run() 时统一创建任务
+        if threading.current_thread() is self._thread or _running_loop() is loop:
+            fn(*args)
+        else:
+            loop.call_soon_threadsafe(fn, *args)
+
+    def _start_target(self, target: MonitorTarget):
+        self._cancel_target(target.key)
+        if self._targets.get(target.key) is target:
+            self._tasks[target.key] = asyncio.ensure_future(self._poll(target))
+
+    def _cancel_target(self, key):
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    # ---- 轮询 ----
+    def _host_semaphore(self, host) -> Optional[asyncio.Semaphore]:
+        if not host or not self.per_host:
+            return None
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    async def _fetch(self, target: MonitorTarget):
+        if asyncio.iscoroutinefunction(target.fetch):
+            coro = target.fetch(*target.args)
+        else:
+            coro = asyncio.get_running_loop().run_in_executor(self._executor, target.fetch, *target.args)
+        if target.timeout:
+            return await asyncio.wait_for(coro, target.timeout)
+        return await coro
+
+    async def _poll_once(self, target: MonitorTarget) -> MonitorResult:
+        # 先取 host 名额再取全局名额，排队等某个 host 的请求不会占住全局名额
+        host_sem = self._host_semaphore(target.host)
+        if host_sem is not None:
+            await host_sem.acquire()
+        try:
+            async with self._global_sem:
+                t0 = time.monotonic()
+                try:
+                    value, error = await self._fetch(target), None
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    value, error = None, f"{type(e).__name__}: {e}"
+        finally:
+            if host_sem is not None:
+                host_sem.release()
+        return MonitorResult(target.key, value, error, time.monotonic() - t0, time.time())
+
+    def _dispatch(self, result: MonitorResult):
+        for sink in self.sinks:
+            try:
+                sink(result)
+            except Exception:
+                logger.exception(f"监控结果处理失败: {result.key}")
+
+    def _jittered(self, target: MonitorTarget, delay: float) -> float:
+        if target.jitter and delay > 0:
+            delay *= 1 + random.uniform(-target.jitter, target.jitter)
+        return max(0.0, delay)
+
+    @staticmethod
+    def _backoff_delay(target: MonitorTarget) -> float:
+        """连续失败时的等待秒数：interval * 2 ** (n - 1)，最长 backoff_max"""
+        exponent = target.consecutive_errors - 1
+        if 0 < target.interval < target.backoff_max:
+            # 先限制指数：连续失败上千次时 2 ** n 转换为浮点数会溢出
+            exponent = min(exponent, math.ceil(math.log2(target.backoff_max / target.interval)))
+        else:
+            exponent = 0
+        return min(target.backoff_max, target.interval * 2 ** max(0, exponent))
+
+    async def _poll(self, target: MonitorTarget):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
+        if self.stagger and target.interval > 0:
+            next_run += random.uniform(0, target.interval)
+            await asyncio.sleep(next_run - loop.time())
+        while True:
+            try:
+                result = await self._poll_once(target)
+                target.runs += 1
+                target.last_elapsed = result.elapsed
+                if result.error is None:
+                    target.consecutive_errors = 0
+                else:
+                    target.errors += 1
+                    target.consecutive_errors += 1
+                    logger.warning(f"监控 {target.key} 失败（连续 {target.consecutive_errors} 次）: {result.error}")
+                if self.sinks:
+                    # 结果接收者可能阻塞，放到线程池中执行，不阻塞事件循环；
+                    # 等待交付完成再进入下一轮，同一目标的结果不会乱序
+                    await loop.run_in_executor(self._sink_executor, self._dispatch, result)
+
+                now = loop.time()
+                if result.error is not None:
+                    next_run = now + self._backoff_delay(target)
+                else:
+                    next_run += target.interval
+                    if next_run < now:
+                        # 执行时间超过一个节拍：跳过错过的节拍
+                        missed = int((now - next_run) // target.interval) + 1 if target.interval > 0 else 0
+                        next_run += missed * target.interval
+                delay = next_run - now
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 引擎自身的意外错误：记录后按间隔继续，不能让这个目标的轮询就此结束
+                logger.exception(f"监控 {target.key} 轮询出错")
+                delay = target.interval
+                next_run = loop.time() + delay
+            await asyncio.sleep(self._jittered(target, delay))
+
+    # ---- 运行 / 停止 ----
+    async def run(self):
+        """在当前事件循环中运行，直到 stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._global_sem = asyncio.Semaphore(self.max_concurrency)
+        self._host_sems = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix="monitor")
+        self._sink_executor = ThreadPoolExecutor(max_workers=self.sink_workers, thread_name_prefix="monitor-sink")
+        for target in list(self._targets.values()):
+            self._start_target(target)
+        self._ready.set()
+        try:
+            await self._stopped.wait()
+        finally:
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._sink_executor.shutdown(wait=False, cancel_futures=True)
+            self._ready.clear()
+
+    def start(self):
+        """在独立线程中启动事件循环"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),), name="monitor-engine", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout=None):
+        """停止所有轮询并等待事件循环退出"""
+        loop = self._loop
+        if loop is None or loop.is_closed() or self._stopped is None:
+            return
+        if _running_loop() is loop:
+            self._stopped.set()
+        else:
+            loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            self._thread = None
+
+    def snapshot(self) -> dict:
+        targets = list(self._targets.values())
+        return {
+            "targets": len(targets),
+            "running": len(self._tasks),
+            "runs": sum(t.runs for t in targets),
+            "errors": sum(t.errors for t in targets),
+            "failing": [t.key for t in targets if t.consecutive_errors],
+        }
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
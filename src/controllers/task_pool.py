@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 23:00
+# @File    : task_pool.py
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 队列已满时的拒绝策略
+REJECT_ABORT = "abort"  # 抛出 TaskRejected
+REJECT_DISCARD = "discard"  # 丢弃新任务（返回已取消的 Future）
+REJECT_DISCARD_OLDEST = "discard_oldest"  # 丢弃排队中优先级最低、最早提交的任务（周期任务除外）
+REJECT_CALLER_RUNS = "caller_runs"  # 在提交任务的线程中直接执行（所属组暂停时等待）
+REJECT_BLOCK = "block"  # 阻塞等待队列有空位
+REJECT_POLICIES = (REJECT_ABORT, REJECT_DISCARD, REJECT_DISCARD_OLDEST, REJECT_CALLER_RUNS, REJECT_BLOCK)
+
+_local = threading.local()
+
+
+class TaskRejected(Exception):
+    """任务被拒绝（队列已满、任务组已停止或线程池已关闭）"""
+
+
+def current_group() -> Optional["TaskGroup"]:
+    """当前线程正在执行的任务所属的任务组，不在线程池中时返回 None"""
+    return getattr(_local, "group", None)
+
+
+class TaskGroup:
+    """
+    一组任务共享的暂停 / 恢复 / 停止状态（语义与 StoppableThread 相同，作用于整组任务）
+
+    - pause()：组内排队的任务不再开始执行，已在执行的任务可以调用 wait_if_paused() 配合暂停
+    - resume()：恢复执行
+    - stop()：取消组内所有排队的任务和周期任务，之后提交的任务被拒绝；
+      正在执行的任务可以检查 stop_event 提前结束
+
+    由 TaskPool.group() 创建，状态都由线程池的锁保护。
+    """
+
+    def __init__(self, pool: "TaskPool", name: str):
+        self.pool = pool
+        self.name = name
+        self.stop_event = threading.Event()
+        self.paused = False
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self._queue = []  # 按 (优先级, 提交顺序) 排序的堆
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop_event.is_set()
+
+    def pause(self):
+        with self.pool._cond:
+            self.paused = True
+
+    def resume(self):
+        with self.pool._cond:
+            self.paused = False
+            self.pool._cond.notify_all()
+
+    def stop(self):
+        with self.pool._cond:
+            self.stop_event.set()
+            self.paused = False
+            cancelled = self._queue
+            self._queue = []
+            self.pool._queued -= len(cancelled)
+            self.pool._cond.notify_all()
+        for task in cancelled:
+            task.cancel()
+
+    def wait_if_paused(self, timeout=None) -> bool:
+        """在任务内部调用：暂停时阻塞到恢复或停止，返回组是否仍可继续（未停止）"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.pool._cond:
+            while self.paused and not self.stopped:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self.pool._cond.wait(remaining)
+        return not self.stopped
+
+    def snapshot(self) -> dict:
+        return {
+            "paused": self.paused,
+            "stopped": self.stopped,
+            "queued": len(self._queue),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+class _Task:
+    __slots__ = ("priority", "seq", "fn", "args", "kwargs", "future", "group", "periodic")
+
+    def __init__(self, priority, seq, fn, args, kwargs, group, future=None, periodic=None):
+        self.priority = priority
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.group = group
+        self.future = future
+        self.periodic = periodic
+
+    def __lt__(self, other):
+        # 优先级高的先执行，同优先级按提交顺序
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
+
+
+class PeriodicTask:
+    """TaskPool.schedule() 返回的周期任务句柄"""
+
+    def __init__(self, pool, fn, args, kwargs, group, priority, interval):
+        self.pool = pool
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.group = group
+        self.priority = priority
+        self.interval = interval
+        self.cancelled = False
+        self.runs = 0
+
+    def cancel(self):
+        with self.pool._cond:
+            self.cancelled = True
+
+
+class TaskPool:
+    """
+    共享工作线程池
+
+    代替“每个监控 / 工作任务一个 StoppableThread”：固定数量的工作线程从有界优先级队列取任务，
+    任务按任务组（TaskGroup）整体暂停、恢复、停止；周期任务（schedule）由一个调度线程
+    按间隔重新入队，不再各自占用一个线程空转。
+
+    - 优先级：数值越大越先执行，同优先级先进先出；暂停的组不参与调度，不会阻塞其他组
+    - 有界队列：max_queue 限制排队（不含正在执行）的任务数，满时按 reject_policy 处理
+    - snapshot()：队列深度、忙碌线程数和各组状态
+    """
+
+    def __init__(self, workers=4, max_queue=0, reject_policy=REJECT_ABORT, name="task-pool"):
+        """
+        :param workers: 工作线程数
+        :param max_queue: 排队任务上限，0 表示不限制
+        :param reject_policy: 队列已满时的拒绝策略，见 REJECT_POLICIES
+        :param name: 线程名前缀
+        """
+        if reject_policy not in REJECT_POLICIES:
+            raise ValueError(f"未知的拒绝策略: {reject_policy}")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.reject_policy = reject_policy
+        self.name = name
+        self.busy = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._cond = threading.Condition()
+        self._groups = {}
+        self._queued = 0
+        self._seq = itertools.count()
+        self._delayed = []  # 周期任务 (到期时间, 序号, PeriodicTask)
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._scheduler = None
+
+    # ---- 任务组 ----
+    def group(self, name="default") -> TaskGroup:
+        """取得（不存在时创建）任务组"""
+        with self._cond:
+            group = self._groups.get(name)
+            if group is None or group.stopped:
+                # 已停止的组不能复用，同名重新创建
+                group = self._groups[name] = TaskGroup(self, name)
+            return group
+
+    def pause(self, group="default"):
+        self.group(group).pause()
+
+    def resume(self, group="default"):
+        self.group(group).resume()
+
+    def stop(self, group="default"):
+        with self._cond:
+            target = self._groups.get(group)
+        if target is not None:
+            target.stop()
+
+    # ---- 提交 ----
+    def submit(self, fn, *args, group="default", priority=0, **kwargs) -> Future:
+        """
+        提交一次性任务
+
+        :param group: 任务组名称或 TaskGroup
+        :param priority: 优先级，数值越大越先执行
+        :raises TaskRejected: 任务组已停止、线程池已关闭，或队列已满且策略为 abort
+        """
+        future = Future()
+        task_group = group if isinstance(group, TaskGroup) else self.group(group)
+        with self._cond:
+            if self._shutdown or task_group.stopped:
+                raise TaskRejected(f"任务组 {task_group.name} 已停止或线程池已关闭")
+            task = _Task(priority, next(self._seq), fn, args, kwargs, task_group, future=future)
+            if self.max_queue and self._queued >= self.max_queue:
+                action = self._reject(task)
+                if action is not None:
+                    return action
+            self._push(task)
+        return future
+
+    def schedule(self, fn, interval, *args, group="default", priority=0, initial_delay=0.0, **kwargs):
+        """
+        提交周期任务：执行结束后间隔 interval 秒再次执行（固定延迟，同一周期任务不会重叠）
+
+        所属组暂停时跳过到期的执行，停止时随组一起结束；异常记录日志后继续下一次。
+
+        :return: PeriodicTask，调用 cancel() 停止
+        """
+        task_group = group if isinstance(group, TaskGroup) else self.group(group)
+        periodic = PeriodicTask(self, fn, args, kwargs, task_group, priority, interval)
+        with self._cond:
+            if self._shutdown or task_group.stopped:
+                raise TaskRejected(f"任务组 {task_group.name} 已停止或线程池已关闭")
+            if self._scheduler is None:
+                self._scheduler = threading.Thread(
+                    target=self._schedule_loop, name=f"{self.name}-scheduler", daemon=True
+                )
+                self._scheduler.start()
+            self._delay(periodic, initial_delay)
+        return periodic
+
+    def _push(self, task: _Task):
+        """放入任务组队列（需持有锁）"""
+        heapq.heappush(task.group._queue, task)
+        self._queued += 1
+        self._cond.notify_all()
+
+    def _reject(self, task: _Task):
+        """
+        队列已满时按策略处理（需持有锁）
+
+        :return: None 表示腾出了空位、继续入队；否则为返回给调用方的 Future
+        """
+        policy = self.reject_policy
+        if policy == REJECT_BLOCK:
+            while self.max_queue and self._queued >= self.max_queue:
+                if self._shutdown or task.group.stopped:
+                    raise TaskRejected(f"任务组 {task.group.name} 已停止或线程池已关闭")
+                self._cond.wait()
+            return None
+        if policy == REJECT_DISCARD_OLDEST:
+            victim = self._pop_lowest()
+            if victim is not None:
+                self.rejected += 1
+                victim.cancel()
+                return None
+        if policy == REJECT_CALLER_RUNS:
+            # 所属组已暂停时不能在调用方线程执行，等待组恢复或队列腾出空位
+            while task.group.paused and self.max_queue and self._queued >= self.max_queue:
+                if self._shutdown or task.group.stopped:
+                    raise TaskRejected(f"任务组 {task.group.name} 已停止或线程池已关闭")
+                self._cond.wait()
+            if self._shutdown or task.group.stopped:
+                raise TaskRejected(f"任务组 {task.group.name} 已停止或线程池已关闭")
+            if not (self.max_queue and self._queued >= self.max_queue):
+                return None
+        self.rejected += 1
+        if policy == REJECT_ABORT:
+            raise TaskRejected(f"任务队列已满（{self.max_queue}）")
+        if policy == REJECT_CALLER_RUNS:
+            self._cond.release()
+            try:
+                self._run(task)
+            finally:
+                self._cond.acquire()
+            return task.future
+        # discard，以及 discard_oldest 没有可丢弃的任务时
+        task.future.cancel()
+        return task.future
+
+    def _pop_lowest(self) -> Optional[_Task]:
+        """
+        取出优先级最低、最早提交的排队任务（需持有锁）
+
+        周期任务不参与淘汰：它们没有 Future，丢弃后也不会再被安排，周期会就此中断
+        """
+        lowest = None
+        for group in self._groups.values():
+            for task in group._queue:
+                if task.periodic is not None:
+                    continue
+                if lowest is None or (task.priority, task.seq) < (lowest.priority, lowest.seq):
+                    lowest = task
+        if lowest is not None:
+            queue = lowest.group._queue
+            queue.remove(lowest)
+            heapq.heapify(queue)
+            self._queued -= 1
+        return lowest
+
+    def _pop_runnable(self) -> Optional[_Task]:
+        """从未暂停的组中取出优先级最高的任务（需持有锁）"""
+        best = None
+        for group in self._groups.values():
+            if group.paused or not group._queue:
+                continue
+            head = group._queue[0]
+            if best is None or head < best:
+                best = head
+        if best is not None:
+            heapq.heappop(best.group._queue)
+            self._queued -= 1
+        return best
+
+    # ---- 执行 ----
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    task = self._pop_runnable()
+                    if task is not None:
+                        break
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                self.busy += 1
+                task.group.running += 1
+                # 队列腾出空位，唤醒阻塞的提交方
+                self._cond.notify_all()
+            try:
+                self._run(task)
+            finally:
+                with self._cond:
+                    self.busy -= 1
+                    task.group.running -= 1
+                    if task.periodic is not None:
+                        periodic = task.periodic
+                        if not (periodic.cancelled or periodic.group.stopped or self._shutdown):
+                            self._delay(periodic, periodic.interval)
+                    self._cond.notify_all()
+
+    def _run(self, task: _Task):
+        """执行任务并记录结果，不持有锁"""
+        if task.future is not None and not task.future.set_running_or_notify_cancel():
+            return
+        previous = current_group()  # caller_runs 时可能在另一个任务中执行
+        _local.group = task.group
+        try:
+            result = task.fn(*task.args, **task.kwargs)
+        except BaseException as e:
+            with self._cond:
+                self.failed += 1
+                task.group.failed += 1
+            if task.future is not None:
+                task.future.set_exception(e)
+            else:
+                logger.exception(f"周期任务执行失败: {task.fn}")
+        else:
+            with self._cond:
+                self.completed += 1
+                task.group.completed += 1
+            if task.future is not None:
+                task.future.set_result(result)
+            else:
+                task.periodic.runs += 1
+        finally:
+            _local.group = previous
+
+    # ---- 周期任务 ----
+    def _delay(self, periodic: PeriodicTask, delay):
+        """安排周期任务在 delay 秒后入队（需持有锁）"""
+        heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), periodic))
+        self._cond.notify_all()
+
+    def _schedule_loop(self):
+        with self._cond:
+            while not self._shutdown:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, _, periodic = heapq.heappop(self._delayed)
+                    if periodic.cancelled or periodic.group.stopped:
+                        continue
+                    if periodic.group.paused or (self.max_queue and self._queued >= self.max_queue):
+                        # 组已暂停或队列已满：跳过本次，等下一个间隔
+                        self._delay(periodic, periodic.interval)
+                        continue
+                    self._push(_Task(
+                        periodic.priority, next(self._seq), periodic.fn, periodic.args, periodic.kwargs,
+                        periodic.group, periodic=periodic,
+                    ))
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._cond.wait(timeout)
+
+    # ---- 状态 / 关闭 ----
+    def snapshot(self) -> dict:
+        """线程池当前状态"""
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "busy": self.busy,
+                "queued": self._queued,
+                "max_queue": self.max_queue,
+                "scheduled": len(self._delayed),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "groups": {name: group.snapshot() for name, group in self._groups.items()},
+            }
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+        关闭线程池，之后提交的任务被拒绝；周期任务不再执行
+
+        :param wait: 等待工作线程结束
+        :param cancel_futures: 取消所有排队中的任务，否则执行完再退出
+        """
+        with self._cond:
+            self._shutdown = True
+            self._delayed.clear()
+            cancelled = []
+            for group in self._groups.values():
+                # 暂停的组不会再被调度，排队的任务一并取消
+                if cancel_futures or group.paused:
+                    cancelled.extend(group._queue)
+                    self._queued -= len(group._queue)
+                    group._queue = []
+            self._cond.notify_all()
+        for task in cancelled:
+            task.cancel()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+            if self._scheduler is not None:
+                self._scheduler.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        return False
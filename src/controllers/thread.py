@@ -3,14 +3,36 @@
 # @Author  : wt
 # @Time    : 2025/9/3 16:16
 # @File    : thread.py
+import logging
+import math
+import random
 import threading
 import time
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+# 调度方式
+SCHEDULE_FIXED_DELAY = "fixed_delay"  # 上一次执行结束后等待 interval 再执行
+SCHEDULE_FIXED_RATE = "fixed_rate"  # 按 interval 的固定节拍执行，自动修正漂移
+
 
 class StoppableThread(threading.Thread):
     """
     通用线程类，支持启动、停止、暂停、恢复
+
+    循环调用 target，调度方式：
+
+    - interval=0（默认）：连续调用，与旧行为一致
+    - fixed_delay：每次执行结束后等待 interval 秒
+    - fixed_rate：按 start + k * interval 的节拍执行，执行时间不累积成漂移；
+      某次执行超时时跳过错过的节拍，不会连续补跑
+    - jitter：每次等待时间随机浮动 ±jitter 比例，避免多个线程同时醒来
+    - backoff_base：设置后 target 抛出的异常会被记录而不是结束线程，
+      连续失败时按 backoff_base * backoff_factor ** (n - 1) 等待，最长 backoff_max 秒，
+      成功一次后恢复正常节奏；未设置时异常照旧向外抛出并结束线程
+
+    所有等待都通过 stop_event.wait 完成，stop() 立即生效。
     """
 
     def __init__(
@@ -22,8 +44,16 @@ class StoppableThread(threading.Thread):
             stop_event: threading.Event = None,
             paused: bool = False,
             pause_cond: Optional[threading.Condition] = None,
+            interval: float = 0.0,
+            schedule: str = SCHEDULE_FIXED_DELAY,
+            jitter: float = 0.0,
+            backoff_base: Optional[float] = None,
+            backoff_factor: float = 2.0,
+            backoff_max: float = 60.0,
     ):
         super().__init__(name=name)
+        if schedule not in (SCHEDULE_FIXED_DELAY, SCHEDULE_FIXED_RATE):
+            raise ValueError(f"未知的调度方式: {schedule}")
         self._target = target
         self._args = args
         self._kwargs = kwargs or {}
@@ -32,19 +62,91 @@ class StoppableThread(threading.Thread):
             pause_cond if pause_cond else threading.Condition(threading.Lock())
         )
         self._paused = paused
+        self.interval = interval
+        self.schedule = schedule
+        self.jitter = jitter
+        self.backoff_base = backoff_base
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.run_count = 0
+        self.error_count = 0
+        self.consecutive_errors = 0
+
+    def _jittered(self, delay: float) -> float:
+        if self.jitter and delay > 0:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.0, delay)
+
+    def _backoff_delay(self) -> float:
+        exponent = self.consecutive_errors - 1
+        if self.backoff_factor > 1 and 0 < self.backoff_base < self.backoff_max:
+            # 先限制指数：连续失败上千次时 factor ** n 会溢出
+            exponent = min(exponent, math.ceil(math.log(self.backoff_max / self.backoff_base, self.backoff_factor)))
+        elif self.backoff_factor > 1:
+            exponent = 0
+        delay = self.backoff_base * self.backoff_factor ** max(0, exponent)
+        return min(self.backoff_max, delay)
+
+    def _wait_if_paused(self) -> bool:
+        """暂停时阻塞，返回是否经历了暂停"""
+        with self._pause_cond:
+            if not self._paused:
+                return False
+            while self._paused:
+                self._pause_cond.wait()
+            return True
+
+    def _run_once(self) -> bool:
+        """执行一次 target，返回是否成功"""
+        if not self._target:
+            return True
+        try:
+            self._target(*self._args, **self._kwargs)
+        except Exception:
+            if self.backoff_base is None:
+                raise
+            self.error_count += 1
+            self.consecutive_errors += 1
+            logger.exception(
+                f"{self.name} 执行失败（连续 {self.consecutive_errors} 次），"
+                f"{self._backoff_delay():.1f}s 后重试"
+            )
+            return False
+        self.consecutive_errors = 0
+        return True
 
     def run(self):
+        # 没有 target 时至少间隔 0.1 秒，防止空循环占满 CPU
+        interval = self.interval if self._target else max(self.interval, 0.1)
+        next_run = time.monotonic()
         while not self._stop_event.is_set():
-            # 暂停处理
-            with self._pause_cond:
-                while self._paused:
-                    self._pause_cond.wait()
+            # 暂停处理，恢复后固定节拍从当前时间重新开始
+            if self._wait_if_paused():
+                next_run = time.monotonic()
+                if self._stop_event.is_set():
+                    break
 
             # 执行目标函数
-            if self._target:
-                self._target(*self._args, **self._kwargs)
+            ok = self._run_once()
+            self.run_count += 1
+
+            if not ok:
+                delay = self._backoff_delay()
+                next_run = time.monotonic() + delay
+            elif self.schedule == SCHEDULE_FIXED_RATE and interval > 0:
+                next_run += interval
+                now = time.monotonic()
+                if next_run < now:
+                    # 执行时间超过一个节拍：跳过错过的节拍，对齐到下一个
+                    missed = int((now - next_run) // interval) + 1
+                    next_run += missed * interval
+                delay = next_run - now
             else:
-                time.sleep(0.1)  # 默认空循环防止 CPU 占用过高
+                delay = interval
+
+            delay = self._jittered(delay)
+            if delay > 0:
+                self._stop_event.wait(delay)
 
     def stop(self):
         """停止线程"""
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 23:55
+# @File    : ttl_cache.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from controllers.task_pool import TaskPool
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "loaded_at", "expires_at", "refresh_at")
+
+    def __init__(self, value, loaded_at, ttl, refresh_ahead):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.expires_at = loaded_at + ttl
+        self.refresh_at = loaded_at + ttl * refresh_ahead
+
+
+class _Flight:
+    """一次进行中的加载，同一个键的并发调用共享结果"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    带过期时间的缓存，用于验证码、令牌这类会过期、加载较慢的值
+
+    - 单飞加载：同一个键同时只有一次 loader 调用，其余调用等待并共享结果；
+      全局锁只保护字典，不在加载期间持有，慢加载不会阻塞其他键
+    - 提前刷新：命中的值超过 ttl * refresh_ahead 后在后台刷新，调用方继续拿到当前值
+    - 出错时返回旧值：加载失败时若旧值过期不超过 stale_ttl 秒，返回旧值并记录日志
+    - 超过 max_entries 时淘汰最久未使用的键
+    - stats() 返回命中、未命中、刷新次数和加载耗时
+    """
+
+    def __init__(
+            self,
+            loader: Callable[[Any], Any],
+            ttl: float,
+            refresh_ahead: float = 0.8,
+            stale_ttl: float = 0.0,
+            max_entries: int = 1024,
+            pool: Optional[TaskPool] = None,
+            name: str = "ttl-cache",
+    ):
+        """
+        :param loader: 加载函数，参数为键，返回值
+        :param ttl: 值的有效秒数
+        :param refresh_ahead: 经过 ttl 的该比例后在后台提前刷新，>= 1 表示不提前刷新
+        :param stale_ttl: 加载失败时可继续使用的过期值的最长过期秒数，0 表示不使用过期值
+        :param max_entries: 最多缓存的键数，0 表示不限制
+        :param pool: 后台刷新使用的线程池，None 时每次刷新启动一个守护线程
+        :param name: 名称（日志和线程名用）
+        """
+        if ttl <= 0:
+            raise ValueError(f"ttl 必须大于 0: {ttl}")
+        self.loader = loader
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.pool = pool
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 键 → _Entry，按最近使用排序
+        self._flights = {}  # 键 → _Flight
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.load_errors = 0
+        self.evictions = 0
+        self.load_count = 0
+        self.load_time_total = 0.0
+        self.load_time_max = 0.0
+
+    # ---- 读取 ----
+    def get(self, key=None):
+        """
+        取值，不存在或已过期时加载
+
+        :raises Exception: 加载失败且没有可用的过期值时，抛出 loader 的异常
+        """
+        now = time.monotonic()
+        refresh = None
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and now < entry.expires_at
+            if hit:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                if now >= entry.refresh_at and key not in self._flights:
+                    refresh = self._flights[key] = _Flight()
+                    self.refreshes += 1
+            else:
+                self.misses += 1
+                flight = self._flights.get(key)
+                owner = flight is None
+                if owner:
+                    flight = self._flights[key] = _Flight()
+
+        if hit:
+            # 在锁外提交刷新：线程池可能拒绝任务，或按 caller_runs 在当前线程直接执行 _load
+            if refresh is not None:
+                self._start_refresh(key, refresh)
+            return entry.value
+
+        if owner:
+            self._load(key, flight)
+        else:
+            flight.done.wait()
+
+        if flight.error is None:
+            return flight.value
+        stale = self._stale_value(key)
+        if stale is not None:
+            return stale[0]
+        raise flight.error
+
+    def peek(self, key=None, default=None):
+        """只读取未过期的值，不加载、不计入统计"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry.expires_at:
+                return entry.value
+        return default
+
+    def _stale_value(self, key) -> Optional[tuple]:
+        """过期不超过 stale_ttl 的旧值，返回 (值,) 以区分值本身为 None 的情况"""
+        if self.stale_ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry.expires_at + self.stale_ttl:
+                return None
+            self.stale_hits += 1
+            return (entry.value,)
+
+    # ---- 加载 ----
+    def _load(self, key, flight: _Flight):
+        """调用 loader 并写入缓存，结果通过 flight 交给等待的调用方"""
+        t0 = time.monotonic()
+        try:
+            try:
+                flight.value = self.loader(key)
+            except Exception as e:
+                flight.error = e
+                logger.warning(f"{self.name} 加载 {key!r} 失败: {e}")
+            except BaseException as e:
+                # KeyboardInterrupt 等：等待的调用方收到同一个异常，随后继续向外抛出
+                flight.error = e
+                raise
+        finally:
+            elapsed = time.monotonic() - t0
+            with self._lock:
+                self.load_count += 1
+                self.load_time_total += elapsed
+                self.load_time_max = max(self.load_time_max, elapsed)
+                if flight.error is None:
+                    self._entries[key] = _Entry(flight.value, time.monotonic(), self.ttl, self.refresh_ahead)
+                    self._entries.move_to_end(key)
+                    self._evict()
+                else:
+                    self.load_errors += 1
+                self._finish_flight(key, flight)
+
+    def _finish_flight(self, key, flight: _Flight):
+        """结束一次加载并唤醒等待的调用方（需持有锁）"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        flight.done.set()
+
+    def _start_refresh(self, key, flight: _Flight):
+        """
+        在后台刷新一个键（不能持有锁），刷新期间其他调用方继续命中旧值
+
+        提交失败（线程池拒绝、无法启动线程）时放弃这次刷新，下次命中时再试
+        """
+        try:
+            if self.pool is not None:
+                self.pool.submit(self._load, key, flight)
+            else:
+                threading.Thread(
+                    target=self._load, args=(key, flight), name=f"{self.name}-refresh", daemon=True
+                ).start()
+        except Exception as e:
+            logger.warning(f"{self.name} 提交 {key!r} 的后台刷新失败: {e}")
+            with self._lock:
+                self.refreshes -= 1
+                self._finish_flight(key, flight)
+
+    def _evict(self):
+        """超过上限时先淘汰已过期的键，再淘汰最久未使用的键（需持有锁）"""
+        if not self.max_entries or len(self._entries) <= self.max_entries:
+            return
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if now >= e.expires_at + self.stale_ttl]:
+            del self._entries[key]
+            self.evictions += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # ---- 写入 / 失效 ----
+    def put(self, key, value):
+        """直接写入一个值（例如外部推送的新验证码）"""
+        with self._lock:
+            self._entries[key] = _Entry(value, time.monotonic(), self.ttl, self.refresh_ahead)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def invalidate(self, key=None):
+        """删除一个键，下次读取时重新加载"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    # ---- 统计 ----
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "stale_hits": self.stale_hits,
+                "refreshes": self.refreshes,
+                "load_errors": self.load_errors,
+                "evictions": self.evictions,
+                "load_count": self.load_count,
+                "load_time_avg": self.load_time_total / self.load_count if self.load_count else 0.0,
+                "load_time_max": self.load_time_max,
+            }
@@ -6,3 +6,4 @@ from .base import *
 from .database import *
 from .log import *
 from .alembic import *
+from .pdf import *
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 09:30
+# @File    : pdf.py
+import os
+
+from .base import CACHE_DIR
+
+# 发票渲染 DPI
+PDF_RENDER_DPI = 150
+# 渲染进程数，0 表示使用 CPU 核数
+PDF_RENDER_WORKERS = int(os.getenv("WORKKIT_PDF_RENDER_WORKERS", 0))
+# 发票数量少于该值时串行渲染（进程池启动开销大于并行收益）
+PDF_RENDER_PARALLEL_THRESHOLD = 8
+# 发票排版引擎："vector" 矢量嵌入原始页面；"raster" 渲染为图片后排版
+PDF_LAYOUT_ENGINE = "vector"
+# 矢量嵌入失败（损坏的 PDF 等）时是否退回栅格化
+PDF_RASTER_FALLBACK = False
+# 栅格排版时图片压缩方式："jpeg" 有损、体积小；"flate" 无损
+PDF_IMAGE_CODEC = "jpeg"
+# JPEG 质量（1~95）
+PDF_IMAGE_QUALITY = 85
+# 合并完成后的体积优化预设：None 不优化；screen / print / archive
+PDF_OPTIMIZE_PRESET = None
+# 边距模式：none / narrow / wide
+PDF_MARGIN_MODE = "none"
+# 合并流水线中渲染结果占用内存上限，超出后暂停渲染（背压）
+PDF_PIPELINE_MEMORY_LIMIT = 256 * 1024 * 1024
+# 渲染结果队列长度上限
+PDF_PIPELINE_QUEUE_SIZE = 16
+# 渲染结果磁盘缓存
+PDF_RENDER_CACHE_ENABLED = True
+PDF_RENDER_CACHE_DIR = CACHE_DIR / "render_cache"
+PDF_RENDER_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# 拖入 / 添加文件后后台读取元数据的进程数，0 表示 CPU 核数（最多 4 个）
+PDF_PROBE_WORKERS = 0
+# 元数据读取结果批量回传到表格的间隔（毫秒）
+PDF_PROBE_BATCH_INTERVAL_MS = 100
+# 表格后台导入时合并插入的时间窗口（毫秒）
+PDF_TABLE_INSERT_COALESCE_MS = 50
+# 表格中显示 PDF 首页缩略图
+PDF_THUMBNAIL_ENABLED = True
+# 缩略图渲染 DPI（A4 约 200×280 像素）
+PDF_THUMBNAIL_DPI = 24
+# 缩略图渲染进程数，0 表示 CPU 核数（最多 2 个）
+PDF_THUMBNAIL_WORKERS = 0
+# 缩略图内存缓存上限
+PDF_THUMBNAIL_MEMORY_LIMIT = 32 * 1024 * 1024
+# 缩略图磁盘缓存
+PDF_THUMBNAIL_CACHE_DIR = CACHE_DIR / "thumbnail_cache"
+PDF_THUMBNAIL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# 拖入目录时递归扫描的过滤条件，None 表示不限制
+PDF_SCAN_EXTENSIONS = (".pdf",)
+PDF_SCAN_NAME_PATTERN = None  # 文件名通配符，例如 "*发票*"
+PDF_SCAN_MIN_SIZE = None  # 字节
+PDF_SCAN_MAX_SIZE = None
+PDF_SCAN_MODIFIED_AFTER = None  # 修改时间下限（时间戳）
+PDF_SCAN_MODIFIED_BEFORE = None
+# 扫描结果每攒够该数量或每隔该时间（毫秒）插入表格一次
+PDF_SCAN_BATCH_SIZE = 200
+PDF_SCAN_BATCH_INTERVAL_MS = 100
+# 后台任务更新表格状态列的最高刷新帧率
+PDF_STATUS_UPDATE_FPS = 30
@@ -3,6 +3,7 @@
 # @Author : Reggie
 # @Time   : 2025/08/27 18:08
 import logging
+import multiprocessing
 import sys
 import traceback
 
@@ -43,6 +44,8 @@ def handle_exception(exc_type, exc_value, exc_traceback):
 
 
 if __name__ == "__main__":
+    # 打包后的程序使用进程池渲染 PDF 时需要
+    multiprocessing.freeze_support()
     init_logger(settings.LOG_CONFIG)
     init_local_db()
     # 设置全局异常处理器
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 20:50
+# @File    : file_scan.py
+import fnmatch
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ScanFilter:
+    """
+    目录扫描的文件过滤条件，None 表示不限制
+
+    name_pattern 为通配符（fnmatch，不区分大小写），例如 "*发票*"；
+    modified_after / modified_before 为时间戳（秒）。
+    """
+
+    extensions: tuple = (".pdf",)
+    name_pattern: Optional[str] = None
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    modified_after: Optional[float] = None
+    modified_before: Optional[float] = None
+    skip_hidden: bool = True
+
+    def match_name(self, name: str) -> bool:
+        lower = name.lower()
+        if self.extensions and not lower.endswith(tuple(ext.lower() for ext in self.extensions)):
+            return False
+        if self.name_pattern and not fnmatch.fnmatch(lower, self.name_pattern.lower()):
+            return False
+        return True
+
+    def needs_stat(self) -> bool:
+        return any(
+            v is not None
+            for v in (self.min_size, self.max_size, self.modified_after, self.modified_before)
+        )
+
+    def match_stat(self, stat: os.stat_result) -> bool:
+        if self.min_size is not None and stat.st_size < self.min_size:
+            return False
+        if self.max_size is not None and stat.st_size > self.max_size:
+            return False
+        if self.modified_after is not None and stat.st_mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and stat.st_mtime > self.modified_before:
+            return False
+        return True
+
+
+def scan_files(roots, scan_filter: ScanFilter = ScanFilter(), should_stop=None, on_entry=None):
+    """
+    用 os.scandir 递归扫描目录，按目录内文件名顺序逐个产出匹配的文件路径
+
+    - 先按文件名过滤，只有设置了大小或日期条件时才读取 stat
+    - 不跟随目录符号链接，避免循环
+    - 没有权限等无法读取的目录记录日志后跳过
+
+    :param roots: 目录或文件路径列表，直接给出的文件同样要经过过滤
+    :param scan_filter: 过滤条件
+    :param should_stop: 返回 True 时停止扫描的回调，每个目录项检查一次
+    :param on_entry: 每检查一个文件调用一次的回调（用于统计扫描数量）
+    """
+    stack = [os.fspath(root) for root in reversed(list(roots))]
+    while stack:
+        if should_stop and should_stop():
+            return
+        path = stack.pop()
+        if not os.path.isdir(path):
+            if on_entry:
+                on_entry()
+            try:
+                if scan_filter.match_name(os.path.basename(path)) and (
+                        not scan_filter.needs_stat() or scan_filter.match_stat(os.stat(path))
+                ):
+                    yield path
+            except OSError as e:
+                logger.warning(f"无法读取 {path}: {e}")
+            continue
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name.lower())
+        except OSError as e:
+            logger.warning(f"无法读取目录 {path}: {e}")
+            continue
+        subdirs = []
+        for entry in entries:
+            if should_stop and should_stop():
+                return
+            if scan_filter.skip_hidden and entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+                if on_entry:
+                    on_entry()
+                if not scan_filter.match_name(entry.name):
+                    continue
+                if scan_filter.needs_stat() and not scan_filter.match_stat(entry.stat()):
+                    continue
+            except OSError as e:
+                logger.warning(f"无法读取 {entry.path}: {e}")
+                continue
+            yield entry.path
+        # 先处理当前目录的文件，再按名称顺序深入子目录
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 11:20
+# @File    : merge_pipeline.py
+import io
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+from utils.pdf_utils import (
+    iter_render_pdfs,
+    merge_invoices_top_bottom,
+    merge_invoices_top_bottom_vector,
+)
+from utils.pdf_optimizer import optimize_pdf
+from utils.pdf_writer import StreamingPdfWriter
+
+logger = logging.getLogger(__name__)
+
+# 渲染线程结束标记
+_DONE = object()
+
+
+class MergeCancelled(Exception):
+    """合并被调用方取消（should_stop 返回 True）"""
+
+
+class ProgressEta:
+    """
+    按阶段估算剩余时间
+
+    以阶段内第一次进度回调为起点计算平均速度，不把进程池启动、首页渲染等
+    一次性开销算进速度里。线程安全。
+    """
+
+    def __init__(self):
+        self._first = {}  # 阶段 → (时间, 已完成数量)
+        self._lock = threading.Lock()
+
+    def eta(self, stage, done, total) -> Optional[float]:
+        """剩余秒数，数据不足时返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            first_time, first_done = self._first.setdefault(stage, (now, done))
+        if done >= total:
+            return 0.0
+        if done <= first_done or now <= first_time:
+            return None
+        rate = (done - first_done) / (now - first_time)
+        return (total - done) / rate
+
+
+class MemoryBudget:
+    """
+    按字节计数的内存预算
+
+    渲染阶段每产出一张图片先 acquire 对应字节数，排版写入后再 release；
+    预算用完时 acquire 阻塞，渲染阶段随之停止取新结果，形成背压。
+    """
+
+    def __init__(self, limit_bytes: int, min_items: int = 1):
+        """
+        :param limit_bytes: 字节上限
+        :param min_items: 无论预算是否用完，至少允许 min_items 份同时占用，
+            保证下游凑齐一批（例如两张发票排一页）时不会死锁
+        """
+        self.limit_bytes = limit_bytes
+        self.min_items = min_items
+        self.used_bytes = 0
+        self.used_items = 0
+        self.peak_bytes = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def acquire(self, size: int) -> bool:
+        """
+        申请 size 字节，预算不足时阻塞
+
+        :return: 预算被关闭时返回 False
+        """
+        with self._cond:
+            while (
+                    not self._closed
+                    and self.used_items >= self.min_items
+                    and self.used_bytes + size > self.limit_bytes
+            ):
+                self._cond.wait()
+            if self._closed:
+                return False
+            self.used_bytes += size
+            self.used_items += 1
+            self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+            return True
+
+    def release(self, size: int):
+        with self._cond:
+            self.used_bytes -= size
+            self.used_items -= 1
+            self._cond.notify_all()
+
+    def close(self):
+        """唤醒所有等待者，之后的 acquire 直接返回 False"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def merge_invoice_pack(
+        invoices,
+        attachments,
+        output_file,
+        layout="vector",
+        margin_mode="none",
+        dpi=150,
+        workers=0,
+        parallel_threshold=8,
+        raster_fallback=False,
+        image_codec="jpeg",
+        image_quality=85,
+        memory_limit=256 * 1024 * 1024,
+        queue_size=16,
+        cache=None,
+        optimize=None,
+        on_progress=None,
+        should_stop=None,
+) -> dict:
+    """
+    发票合并流水线：渲染 → 两张一页排版 → 流式追加到输出文件
+
+    渲染线程与排版写入之间通过有界队列和内存预算连接，峰值内存只取决于
+    memory_limit 与渲染窗口大小，与发票数量无关。
+
+    :param invoices: 发票列表，元素为 PDF 路径（取第 1 页）或 (路径, 页码集合)，
+        选中的每一页作为一张发票，每两张排到一页 A4
+    :param attachments: 追加到末尾的附件列表，元素为 PDF 路径（全部页面）或 (路径, 页码集合)，
+        只复制选中的页面
+    :param output_file: 输出 PDF 路径
+    :param layout: "vector" 矢量嵌入原始页面；"raster" 渲染为图片后排版
+    :param margin_mode: 边距模式（none / narrow / wide）
+    :param dpi: 栅格化渲染 DPI
+    :param workers: 渲染进程数，0 表示使用 CPU 核数
+    :param parallel_threshold: 发票数少于该值时串行渲染
+    :param raster_fallback: 矢量嵌入失败时是否退回栅格化
+    :param image_codec: 栅格排版时图片的压缩方式，"jpeg" 或 "flate"
+    :param image_quality: JPEG 质量
+    :param memory_limit: 渲染结果在内存中的字节上限
+    :param queue_size: 渲染结果队列长度上限
+    :param cache: utils.render_cache.RenderCache 渲染缓存，None 表示不使用缓存
+    :param optimize: 写入完成后的体积优化预设（screen / print / archive），None 表示不优化
+    :param on_progress: 进度回调 ``on_progress(stage, done, total, file_path)``，
+        stage 为 "render" / "compose" / "write" / "optimize"，在调用线程或渲染线程中执行
+    :param should_stop: 返回 True 时取消合并。每处理完一页检查一次，取消后抛出
+        MergeCancelled，并删除未写完的输出文件
+
+    :return: dict 统计信息（页数、输出大小、耗时、内存峰值等）
+    """
+    t0 = time.time()
+    invoice_pages = _expand_invoice_pages(invoices)
+    attachments = [_attachment_source(a) for a in attachments]
+    logger.info(
+        f"开始合并：{len(invoices)} 个发票文件（{len(invoice_pages)} 页），"
+        f"{len(attachments)} 个附件，排版 {layout} → {output_file}"
+    )
+    progress = on_progress or (lambda *args: None)
+
+    def check_stop(*args):
+        if should_stop and should_stop():
+            raise MergeCancelled("合并已取消")
+
+    stats = {
+        "invoices": len(invoices),
+        "invoice_pages": len(invoice_pages),
+        "attachments": len(attachments),
+        "layout": layout,
+    }
+
+    with StreamingPdfWriter(output_file) as writer:
+        if layout == "raster":
+            budget = MemoryBudget(memory_limit, min_items=2)
+            hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+            _write_raster_sheets(
+                writer, invoice_pages, budget, margin_mode, dpi, workers,
+                parallel_threshold, queue_size, cache, image_codec, image_quality, progress,
+                check_stop,
+            )
+            stats["peak_buffered_bytes"] = budget.peak_bytes
+            if cache:
+                stats["cache_hits"] = cache.hits - hits
+                stats["cache_misses"] = cache.misses - misses
+        else:
+            _write_vector_sheets(
+                writer, invoice_pages, margin_mode, raster_fallback, dpi, progress, check_stop
+            )
+
+        for idx, (pdf_path, pages) in enumerate(attachments, 1):
+            # 只读取并复制选中的页面，每写完一页检查是否取消
+            writer.add_pdf(pdf_path, pages=pages, on_page=check_stop)
+            progress("write", idx, len(attachments), pdf_path)
+        # 取消时 with 块以异常退出，writer.abort() 删除不完整的输出文件
+        check_stop()
+
+    stats["pages"] = writer.page_count
+    stats["output_bytes"] = writer.bytes_written
+    stats["images"] = writer.images_written
+    stats["images_deduped"] = writer.images_deduped
+    stats["dedup_saved_bytes"] = writer.dedup_saved_bytes
+    if optimize:
+        progress("optimize", 0, 1, output_file)
+
+        def on_optimize(done, total):
+            check_stop()
+            progress("optimize", done, total, output_file)
+
+        try:
+            stats["optimize"] = optimize_pdf(output_file, output_file, optimize, on_progress=on_optimize)
+        except MergeCancelled:
+            # 取消的是整个合并，已写完的文件同样删除
+            os.remove(output_file)
+            raise
+        stats["output_bytes"] = stats["optimize"]["bytes_after"]
+        progress("optimize", 1, 1, output_file)
+    stats["elapsed"] = round(time.time() - t0, 3)
+    logger.info(f"✅ 合并完成：{output_file}，{stats}")
+    return stats
+
+
+def _expand_invoice_pages(invoices) -> list:
+    """发票列表展开为逐页来源 [(路径, 页码)]，只传路径时取第 1 页"""
+    pages = []
+    for invoice in invoices:
+        if isinstance(invoice, (tuple, list)):
+            pdf_path, page_nums = invoice
+            if page_nums is None:
+                page_nums = [0]
+            elif isinstance(page_nums, int):
+                page_nums = [page_nums]
+            pages.extend((str(pdf_path), page_num) for page_num in page_nums)
+        else:
+            pages.append((str(invoice), 0))
+    return pages
+
+
+def _attachment_source(attachment) -> tuple:
+    """附件统一为 (路径, 页码集合)，页码集合为 None 表示全部页面"""
+    if isinstance(attachment, (tuple, list)):
+        pdf_path, page_nums = attachment
+        return str(pdf_path), page_nums
+    return str(attachment), None
+
+
+def _write_vector_sheets(writer, invoice_pages, margin_mode, raster_fallback, dpi, progress, check_stop):
+    """矢量排版：无需渲染，逐页排版后直接写入"""
+    total = len(invoice_pages)
+    for i in range(0, total, 2):
+        check_stop()
+        sources = invoice_pages[i:i + 2]
+        sheet = io.BytesIO()
+        merge_invoices_top_bottom_vector(
+            sources, sheet, margin_mode=margin_mode, raster_fallback=raster_fallback, dpi=dpi
+        )
+        writer.add_pdf(sheet)
+        for done, (pdf_path, _) in enumerate(sources, i + 1):
+            progress("compose", done, total, pdf_path)
+
+
+def _write_raster_sheets(
+        writer, invoice_pages, budget, margin_mode, dpi, workers,
+        parallel_threshold, queue_size, cache, image_codec, image_quality, progress, check_stop,
+):
+    """
+    栅格排版：渲染线程 → 有界队列 → 排版并写入（调用线程）
+
+    渲染结果是未编码的像素（RenderedPage），只在嵌入 PDF 时按 image_codec 编码一次。
+    取消时排版端在下一个结果处抛出 MergeCancelled，渲染线程最多再等当前一页渲染完成。
+    """
+    total = len(invoice_pages)
+    results = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+
+    def put(item):
+        # 排版端异常退出后不再阻塞在满队列上
+        while not stop_event.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def render():
+        rendered = iter_render_pdfs(
+            invoice_pages,
+            dpi=dpi,
+            workers=workers,
+            parallel_threshold=parallel_threshold,
+            cache=cache,
+            image_format="raw",
+        )
+        try:
+            for idx, page in rendered:
+                if stop_event.is_set():
+                    return
+                # 先占用内存预算，预算不足时在这里阻塞，暂停提交新的渲染任务
+                if not budget.acquire(page.nbytes):
+                    return
+                progress("render", idx + 1, total, invoice_pages[idx][0])
+                if not put((idx, page)):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+        finally:
+            rendered.close()
+
+    render_thread = threading.Thread(target=render, name="pdf-render", daemon=True)
+    render_thread.start()
+    try:
+        pair = []
+        while True:
+            check_stop()
+            try:
+                item = results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if isinstance(item, BaseException):
+                raise item
+            if item is not _DONE:
+                pair.append(item)
+            if len(pair) == 2 or (item is _DONE and pair):
+                sheet = io.BytesIO()
+                merge_invoices_top_bottom(
+                    [page for _, page in pair],
+                    sheet,
+                    margin_mode=margin_mode,
+                    image_codec=image_codec,
+                    image_quality=image_quality,
+                )
+                writer.add_pdf(sheet)
+                for idx, page in pair:
+                    budget.release(page.nbytes)
+                    progress("compose", idx + 1, total, invoice_pages[idx][0])
+                pair = []
+            if item is _DONE:
+                break
+    finally:
+        stop_event.set()
+        budget.close()
+        render_thread.join()
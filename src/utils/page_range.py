@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 14:10
+# @File    : page_range.py
+import re
+from bisect import bisect_right
+
+_PART_RE = re.compile(r"^(\d*)\s*-\s*(\d*)$|^(\d+)$")
+
+
+class PageRange:
+    """
+    压缩的页码集合
+
+    内部保存有序、互不重叠的半开区间 [start, stop)（页码从 0 开始），
+    300 页的 "1-300" 只占一个区间；迭代时按升序产出页码。
+    """
+
+    __slots__ = ("spans", "page_count")
+
+    def __init__(self, spans, page_count: int):
+        self.spans = spans
+        self.page_count = page_count
+
+    @classmethod
+    def all(cls, page_count: int) -> "PageRange":
+        return cls([(0, page_count)] if page_count > 0 else [], page_count)
+
+    def __iter__(self):
+        for start, stop in self.spans:
+            yield from range(start, stop)
+
+    def __len__(self):
+        return sum(stop - start for start, stop in self.spans)
+
+    def __contains__(self, page_num):
+        i = bisect_right(self.spans, (page_num, float("inf"))) - 1
+        return i >= 0 and self.spans[i][0] <= page_num < self.spans[i][1]
+
+    def __eq__(self, other):
+        return (
+                isinstance(other, PageRange)
+                and self.spans == other.spans
+                and self.page_count == other.page_count
+        )
+
+    def __repr__(self):
+        return f"PageRange({str(self)!r}, page_count={self.page_count})"
+
+    def __str__(self):
+        """还原为从 1 开始的表达式，例如 "1-3,7,10-12" """
+        parts = []
+        for start, stop in self.spans:
+            parts.append(str(start + 1) if stop - start == 1 else f"{start + 1}-{stop}")
+        return ",".join(parts)
+
+
+def parse_page_range(expr, page_count: int) -> PageRange:
+    """
+    解析页码范围表达式（页码从 1 开始）
+
+    - "1-3,7,10-"  第 1~3 页、第 7 页、第 10 页到最后一页
+    - "-5"         第 1~5 页
+    - "" / "all"   全部页面
+    - 支持中文逗号，忽略空格；重叠、相邻的区间会合并
+
+    :param expr: 范围表达式
+    :param page_count: 文件总页数
+    :return: PageRange
+    :raises ValueError: 表达式格式错误、页码越界或结果为空
+    """
+    expr = (expr or "").strip().replace("，", ",")
+    if expr.lower() in ("", "all", "全部"):
+        return PageRange.all(page_count)
+
+    spans = []
+    for part in expr.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        m = _PART_RE.match(part)
+        if not m:
+            raise ValueError(f"页码范围格式错误: {part}")
+        if m.group(3):
+            start = stop = int(m.group(3))
+        else:
+            start = int(m.group(1)) if m.group(1) else 1
+            stop = int(m.group(2)) if m.group(2) else page_count
+        if start < 1 or stop > page_count or start > stop:
+            raise ValueError(f"页码范围越界: {part}（共 {page_count} 页）")
+        spans.append((start - 1, stop))
+
+    if not spans:
+        raise ValueError(f"页码范围为空: {expr}")
+
+    # 排序后合并重叠、相邻区间
+    spans.sort()
+    merged = [spans[0]]
+    for start, stop in spans[1:]:
+        last_start, last_stop = merged[-1]
+        if start <= last_stop:
+            merged[-1] = (last_start, max(last_stop, stop))
+        else:
+            merged.append((start, stop))
+    return PageRange(merged, page_count)
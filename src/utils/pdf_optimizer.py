@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 17:20
+# @File    : pdf_optimizer.py
+import io
+import logging
+import os
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from utils.pdf_utils import RenderedPage
+from utils.pdf_writer import StreamingPdfWriter
+
+logger = logging.getLogger(__name__)
+
+# 优化预设
+#   dpi：图片按页面上的显示尺寸降采样到该分辨率，None 表示不降采样
+#   quality：图片重新编码为 JPEG 的质量，None 表示不处理图片（无损）
+OPTIMIZE_PRESETS = {
+    "screen": {"dpi": 96, "quality": 60},
+    "print": {"dpi": 200, "quality": 85},
+    "archive": {"dpi": None, "quality": None},
+}
+# 有效 DPI 超过目标的该倍数才降采样，避免对接近目标的图片做无意义的重采样
+_DOWNSAMPLE_THRESHOLD = 1.5
+# 重新编码后至少缩小到原来的该比例才替换原图
+_MIN_GAIN = 0.9
+
+
+def _image_display_dpi(doc: fitz.Document) -> dict:
+    """
+    统计每张图片在页面上的最大有效 DPI
+
+    同一图片可能在多页、多处以不同尺寸出现（包括嵌套在表单 XObject 中），
+    取其中最大的，保证降采样后任何位置都不低于目标分辨率。
+
+    :return: {图片 xref: 有效 DPI}，没有找到显示位置的图片为 None
+    """
+    result = {}
+    for page in doc:
+        for img in page.get_images(full=True):
+            result.setdefault(img[0], None)
+        # 每页只提取一次图片位置信息（get_image_rects 每次调用都会重新分析整页）
+        for info in page.get_image_info(xrefs=True):
+            rect = fitz.Rect(info["bbox"])
+            if not info["xref"] or rect.is_empty:
+                continue
+            dpi = max(info["width"] / (rect.width / 72), info["height"] / (rect.height / 72))
+            result[info["xref"]] = max(result.get(info["xref"]) or 0, dpi)
+    return result
+
+
+def _recompress_image(doc: fitz.Document, xref, display_dpi, target_dpi, quality):
+    """
+    按需降采样并重新编码为 JPEG，体积没有明显减小时保持原样
+
+    带透明度或蒙版的图片不处理（JPEG 无法保存透明通道）。
+
+    :return: (是否降采样, 节省字节数)，未替换时返回 None
+    """
+    for key in ("SMask", "Mask"):
+        if doc.xref_get_key(xref, key)[0] != "null":
+            return None
+    if doc.xref_get_key(xref, "ImageMask")[1] == "true":
+        return None
+
+    original_size = len(doc.xref_stream_raw(xref))
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n not in (1, 3):
+        # CMYK、Lab 等统一转换为 RGB
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    img = RenderedPage.from_pixmap(pix).to_image()
+
+    downsampled = False
+    if target_dpi and display_dpi and display_dpi > target_dpi * _DOWNSAMPLE_THRESHOLD:
+        scale = target_dpi / display_dpi
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        # reducing_gap：先按整数倍快速缩小，再做 LANCZOS 重采样
+        img = img.resize(size, Image.LANCZOS, reducing_gap=2.0)
+        downsampled = True
+
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality, optimize=True)
+    data = buf.getvalue()
+    if len(data) >= original_size * _MIN_GAIN:
+        return None
+
+    doc.update_stream(xref, data, compress=0)
+    doc.xref_set_key(xref, "Filter", "/DCTDecode")
+    doc.xref_set_key(xref, "DecodeParms", "null")
+    doc.xref_set_key(xref, "Decode", "null")
+    doc.xref_set_key(xref, "Width", str(img.width))
+    doc.xref_set_key(xref, "Height", str(img.height))
+    doc.xref_set_key(xref, "ColorSpace", "/DeviceGray" if img.mode == "L" else "/DeviceRGB")
+    doc.xref_set_key(xref, "BitsPerComponent", "8")
+    return downsampled, original_size - len(data)
+
+
+def optimize_pdf(input_file, output_file, preset="print", on_progress=None) -> dict:
+    """
+    压缩 PDF 体积
+
+    1. 按预设把超出目标分辨率的图片降采样，并重新编码为 JPEG（archive 预设跳过）
+    2. 合并内容相同的对象、删除未被引用的对象和页面上未使用的资源
+    3. 非流对象打包进压缩的对象流，交叉引用表改为交叉引用流
+
+    :param input_file: 输入 PDF 路径
+    :param output_file: 输出 PDF 路径，可以与输入相同（原地替换）
+    :param preset: 预设名称，见 OPTIMIZE_PRESETS
+    :param on_progress: 每处理完一张图片调用 ``on_progress(done, total)``；在回调中抛出异常
+        可以中途停止，临时文件会被清理，输出文件保持不变
+    :return: dict 统计信息（优化前后大小、节省字节数、处理的图片数、耗时）
+    """
+    if preset not in OPTIMIZE_PRESETS:
+        raise ValueError(f"未知的优化预设: {preset}")
+    options = OPTIMIZE_PRESETS[preset]
+    t0 = time.time()
+    input_file, output_file = Path(input_file), Path(output_file)
+    bytes_before = input_file.stat().st_size
+    # 中间结果写在输出文件旁边，完成后再替换，输入与输出相同也不会损坏原文件
+    cleaned_file = output_file.with_name(f"{output_file.name}.{os.getpid()}.clean.tmp")
+    packed_file = output_file.with_name(f"{output_file.name}.{os.getpid()}.pack.tmp")
+
+    images_downsampled = images_recompressed = image_saved_bytes = 0
+    try:
+        doc = fitz.open(input_file)
+        try:
+            if options["quality"]:
+                images = _image_display_dpi(doc)
+                for done, (xref, display_dpi) in enumerate(images.items(), 1):
+                    result = _recompress_image(doc, xref, display_dpi, options["dpi"], options["quality"])
+                    if on_progress:
+                        on_progress(done, len(images))
+                    if result is None:
+                        continue
+                    downsampled, saved = result
+                    images_recompressed += 1
+                    images_downsampled += downsampled
+                    image_saved_bytes += saved
+            # garbage=4：删除未引用对象并合并内容相同的对象；clean：清理页面上未使用的资源
+            doc.save(cleaned_file.as_posix(), garbage=4, clean=True, deflate=True)
+        finally:
+            doc.close()
+
+        with StreamingPdfWriter(packed_file, object_streams=True) as writer:
+            # 整份重写：书签、元数据、表单等文档级信息一并保留
+            writer.add_pdf(cleaned_file, keep_document=True)
+        os.replace(packed_file, output_file)
+    finally:
+        for tmp_file in (cleaned_file, packed_file):
+            try:
+                os.remove(tmp_file)
+            except FileNotFoundError:
+                pass
+
+    bytes_after = output_file.stat().st_size
+    stats = {
+        "preset": preset,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "saved_bytes": bytes_before - bytes_after,
+        "saved_ratio": round(1 - bytes_after / bytes_before, 4) if bytes_before else 0,
+        "images_recompressed": images_recompressed,
+        "images_downsampled": images_downsampled,
+        "image_saved_bytes": image_saved_bytes,
+        "elapsed": round(time.time() - t0, 3),
+    }
+    logger.info(f"✅ PDF 优化完成（{preset}）：{output_file}，{stats}")
+    return stats
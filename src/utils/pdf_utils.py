@@ -2,14 +2,21 @@
 # @File   : 1.py
 # @Author : Reggie
 # @Time   : 2025/07/23 15:41
+import hashlib
 import io
 import logging
+import os
 import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
 
 import fitz  # PyMuPDF
 from PIL import Image, ImageChops
 from pypdf import PdfWriter, PdfReader
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
 logger = logging.getLogger(__name__)
@@ -17,6 +24,22 @@ logger = logging.getLogger(__name__)
 
 # ========= 工具函数 =========
 
+def get_margin(margin_mode="none") -> float:
+    """
+    根据 margin_mode 返回边距大小（pt）
+
+    - "none"   无边距，尽量铺满区域
+    - "narrow" 窄边距（约 7mm）
+    - "wide"   宽边距（约 17mm）
+    - 其他值默认无边距
+    """
+    if margin_mode == "narrow":
+        return 20
+    if margin_mode == "wide":
+        return 50
+    return 0
+
+
 def trim_white_border(img: Image.Image, bg_color="white") -> Image.Image:
     """自动裁剪图片四周的纯白空白区域"""
     bg = Image.new(img.mode, img.size, bg_color)
@@ -25,21 +48,196 @@ def trim_white_border(img: Image.Image, bg_color="white") -> Image.Image:
     return img.crop(bbox) if bbox else img
 
 
+def page_source(source, default_page=0) -> tuple:
+    """
+    统一页面来源为 (路径字符串, 页码)
+
+    :param source: str | Path | (str | Path, int)
+    :param default_page: 只传路径时使用的页码（从 0 开始）
+    """
+    if isinstance(source, (tuple, list)):
+        pdf_path, page_num = source
+    else:
+        pdf_path, page_num = source, default_page
+    return str(pdf_path), page_num
+
+
+class RenderedPage:
+    """
+    渲染得到的原始像素（未经任何图片编码）
+
+    进程内直接引用 fitz.Pixmap 的内存（samples_mv），to_image() 通过 Image.frombuffer
+    得到零拷贝的 PIL 图片；跨进程传递时序列化为 bytes，只复制一次，不经过 JPEG 编解码。
+    """
+
+    __slots__ = ("width", "height", "mode", "stride", "samples", "_pixmap")
+
+    def __init__(self, width, height, mode, stride, samples, pixmap=None):
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.stride = stride
+        self.samples = samples
+        self._pixmap = pixmap  # 保持 Pixmap 存活，samples 才有效
+
+    @classmethod
+    def from_pixmap(cls, pix: "fitz.Pixmap") -> "RenderedPage":
+        mode = {1: "L", 3: "RGB", 4: "RGBA"}[pix.n]
+        return cls(pix.width, pix.height, mode, pix.stride, pix.samples_mv, pix)
+
+    @property
+    def size(self) -> tuple:
+        return self.width, self.height
+
+    @property
+    def nbytes(self) -> int:
+        return self.stride * self.height
+
+    def to_image(self) -> Image.Image:
+        """零拷贝转换为 PIL 图片（共享 samples 内存，只读）"""
+        return Image.frombuffer(
+            self.mode, (self.width, self.height), self.samples, "raw", self.mode, self.stride, 1
+        )
+
+    def __reduce__(self):
+        # 进程间传递时只传像素字节
+        return RenderedPage, (self.width, self.height, self.mode, self.stride, bytes(self.samples))
+
+    def to_bytes(self) -> bytes:
+        """序列化（快速 zlib 压缩，无损），用于磁盘缓存"""
+        header = f"{self.width} {self.height} {self.mode} {self.stride}\n".encode()
+        return header + zlib.compress(self.samples, 1)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RenderedPage":
+        header, body = data.split(b"\n", 1)
+        width, height, mode, stride = header.decode().split()
+        return cls(int(width), int(height), mode, int(stride), zlib.decompress(body))
+
+
+def _render_page_raw(pdf_path, page_num=0, dpi=150) -> RenderedPage:
+    """渲染 PDF 第 page_num 页为原始像素（顶层函数，可在子进程中执行）"""
+    doc = fitz.open(pdf_path)
+    try:
+        zoom = dpi / 72.0
+        pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return RenderedPage.from_pixmap(pix)
+    finally:
+        doc.close()
+
+
+def _render_page_bytes(pdf_path, page_num=0, dpi=150, output="jpeg") -> bytes:
+    """渲染 PDF 第 page_num 页为图片字节（顶层函数，可在子进程中执行）"""
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc[page_num]
+        zoom = dpi / 72.0  # 默认 72dpi → 150dpi
+        mat = fitz.Matrix(zoom, zoom)
+        pix = page.get_pixmap(matrix=mat)
+        return pix.tobytes(output=output)
+    finally:
+        doc.close()
+
+
 def pdf_to_image_bytesio(pdf_path, page_num=0, dpi=150) -> io.BytesIO:
     """PDF → 渲染第一页 → JPEG BytesIO"""
     t0 = time.time()
     logger.info(f"渲染 PDF → 图片: {pdf_path}")
-    doc = fitz.open(pdf_path)
-    page = doc[page_num]
-    zoom = dpi / 72.0  # 默认 72dpi → 150dpi
-    mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat)
-    img_bytes = pix.tobytes(output="jpeg")
-    doc.close()
+    img_bytes = _render_page_bytes(pdf_path, page_num, dpi)
     logger.info(f"✅ 渲染完成，用时 {time.time() - t0:.2f}s")
     return io.BytesIO(img_bytes)
 
 
+# 渲染输出格式 → (渲染函数, 写缓存序列化, 读缓存反序列化)
+_RENDER_FORMATS = {
+    "jpeg": (_render_page_bytes, bytes, bytes),
+    "raw": (_render_page_raw, RenderedPage.to_bytes, RenderedPage.from_bytes),
+}
+
+
+def iter_render_pdfs(
+        pdf_paths,
+        page_num=0,
+        dpi=150,
+        workers=0,
+        parallel_threshold=8,
+        window=0,
+        cache=None,
+        image_format="jpeg",
+):
+    """
+    按输入顺序逐个渲染 PDF 页面，产出 (index, 渲染结果)
+
+    数量较多时分发到进程池并行渲染，同一时间最多 window 个任务在途；
+    调用方不取下一个结果时不会提交新任务，从而对渲染形成背压。
+
+    :param pdf_paths: 渲染来源列表，元素为 PDF 路径或 (路径, 页码)
+    :param page_num: 只传路径时渲染的页码
+    :param dpi: 渲染 DPI
+    :param workers: 进程数，0 表示使用 CPU 核数
+    :param parallel_threshold: 文件数少于该值时串行渲染，避免进程池启动开销
+    :param window: 在途任务上限，0 表示 workers 的 2 倍
+    :param cache: utils.render_cache.RenderCache，命中时跳过渲染，未命中时渲染后写入
+    :param image_format: "jpeg" 产出 JPEG 字节；"raw" 产出未编码的 RenderedPage
+    """
+    render, dump, load = _RENDER_FORMATS[image_format]
+    sources = [page_source(p, page_num) for p in pdf_paths]
+    total = len(sources)
+
+    def cached(source):
+        data = cache.get(source[0], source[1], dpi, image_format) if cache else None
+        return load(data) if data is not None else None
+
+    def store(source, result):
+        if cache:
+            cache.put(source[0], source[1], dpi, image_format, dump(result))
+        return result
+
+    # 只统计需要真正渲染的页面，决定是否值得启动进程池
+    if cache:
+        misses = [s for s in sources if not cache.has(s[0], s[1], dpi, image_format)]
+    else:
+        misses = sources
+    workers = min(workers or os.cpu_count() or 1, len(misses))
+
+    if workers <= 1 or len(misses) < parallel_threshold:
+        logger.info(f"串行渲染 {len(misses)}/{total} 个 PDF 页面")
+        for idx, source in enumerate(sources):
+            result = cached(source)
+            if result is None:
+                result = store(source, render(source[0], source[1], dpi))
+            yield idx, result
+        return
+
+    logger.info(f"使用 {workers} 个进程并行渲染 {len(misses)}/{total} 个 PDF 页面")
+    window = window or workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = iter(enumerate(sources))
+
+        def submit(idx, source):
+            # 命中缓存的直接放入结果，不占用进程池
+            result = cached(source)
+            if result is not None:
+                return idx, source, result
+            return idx, source, executor.submit(render, source[0], source[1], dpi)
+
+        pending = deque(submit(idx, source) for idx, source in islice(tasks, window))
+        try:
+            while pending:
+                idx, source, result = pending.popleft()
+                if isinstance(result, Future):
+                    result = store(source, result.result())
+                for next_idx, next_source in islice(tasks, 1):
+                    pending.append(submit(next_idx, next_source))
+                yield idx, result
+        finally:
+            # 出错或调用方提前结束时，取消尚未开始的任务
+            for _, _, result in pending:
+                if isinstance(result, Future):
+                    result.cancel()
+
+
 def pdf_to_image_savefile(pdf_path, save_path, page_num=0, dpi=150):
     """PDF 渲染第 page_num 页，保存为图片文件"""
     t0 = time.time()
@@ -54,19 +252,82 @@ def pdf_to_image_savefile(pdf_path, save_path, page_num=0, dpi=150):
     logger.info(f"✅ 图片保存到: {save_path}，耗时 {time.time() - t0:.2f}s")
 
 
-def merge_invoices_top_bottom(img_ios, output_stream: io.BytesIO, margin_mode="none"):
+class _JpegImageReader(ImageReader):
+    """
+    原样透传 JPEG 数据的 ImageReader
+
+    reportlab 对 JPEG 直接写入 DCTDecode 流，但计算去重摘要时会调用 getRGBData 完整解码一次，
+    这里改为对 JPEG 字节取摘要，整个嵌入过程不再解码像素。
+
+    依赖 reportlab 4.2.2（pyproject 中固定的版本）的内部实现：Canvas.drawImage 只把
+    getRGBData() 的返回值用于 _digester 计算 XObject 名称，像素数据由 PDFImageXObject
+    通过 jpeg_fh 直接读取原始 JPEG。升级 reportlab 时需确认这一点仍然成立，
+    tests/test_pdf_utils.py 覆盖了该行为。
+    """
+
+    def __init__(self, jpeg_bytes: bytes):
+        super().__init__(io.BytesIO(jpeg_bytes))
+        self._digest = hashlib.md5(jpeg_bytes).digest()
+        self._dataA = None  # 无透明通道
+
+    def getRGBData(self):
+        return self._digest
+
+
+def _prepare_image(img, image_codec="jpeg", image_quality=85):
+    """
+    把待排版图片转换为 reportlab 可绘制的对象，保证最多只编码一次
+
+    - JPEG 字节 / BytesIO 且 image_codec="jpeg"：原样透传，不解码不重编码
+    - RenderedPage：零拷贝转为 PIL 图片后按 image_codec 编码
+    - image_codec="flate"：交给 reportlab 无损压缩
+
+    返回的都是 ImageReader，以图片 XObject 形式嵌入，相同内容在同一页内只写一次，
+    跨页去重由 StreamingPdfWriter 完成。
+
+    :return: (ImageReader, (宽, 高) 像素)
+    """
+    if isinstance(img, RenderedPage):
+        img = img.to_image()
+    elif not isinstance(img, Image.Image):
+        data = img.getvalue() if isinstance(img, io.BytesIO) else bytes(img)
+        if image_codec == "jpeg" and data[:2] == b"\xff\xd8":
+            reader = _JpegImageReader(data)
+            return reader, reader.getSize()
+        img = Image.open(io.BytesIO(data))
+
+    if image_codec == "jpeg":
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=image_quality)
+        return _JpegImageReader(buf.getvalue()), img.size
+    return ImageReader(img), img.size
+
+
+def merge_invoices_top_bottom(
+        img_ios,
+        output_stream: io.BytesIO,
+        margin_mode="none",
+        image_codec="jpeg",
+        image_quality=85,
+):
     """
     将 1~2 张图片上下合并到 1 页 PDF 并写入 output_stream
 
-    :param img_ios: list[BytesIO | PIL.Image]
+    :param img_ios: list[BytesIO | PIL.Image | RenderedPage]
         - 图片列表，可传 1 或 2 张图片
-        - 如果是 BytesIO，会自动 Image.open()，如果是 PIL.Image 直接使用
+        - JPEG BytesIO 原样嵌入；PIL.Image / RenderedPage 在嵌入时编码一次
     :param output_stream: io.BytesIO
         - 输出的 PDF 文件流
     :param margin_mode: str
         - "none"   无边距（图片尽可能铺满半页）
         - "narrow" 窄边距（大约 7mm）
         - "wide"   宽边距（大约 17mm）
+    :param image_codec: str
+        - "jpeg"   有损压缩，体积小
+        - "flate"  无损压缩
+    :param image_quality: JPEG 质量（1~95）
 
     :return: None
         - 函数执行后会将合并好的 PDF 内容写入 output_stream
@@ -88,7 +349,7 @@ def merge_invoices_top_bottom(img_ios, output_stream: io.BytesIO, margin_mode="n
         """
         内部工具函数：绘制单张图片到指定区域
 
-        :param img: PIL.Image
+        :param img: _prepare_image 的返回值 (可绘制对象, (宽, 高))
         :param y_offset: Y 坐标偏移，表示绘制区域的起始高度（用于区分上/下半页）
         :param max_height: 允许绘制的最大高度（一般是半页）
         :param margin_mode: 控制边距模式（none / narrow / wide）
@@ -96,21 +357,14 @@ def merge_invoices_top_bottom(img_ios, output_stream: io.BytesIO, margin_mode="n
         t_start = time.time()
 
         # 1️⃣ 根据 margin_mode 选择边距大小（pt）
-        if margin_mode == "none":
-            margin = 0  # 无边距，尽量铺满区域
-        elif margin_mode == "narrow":
-            margin = 20  # 约 7mm
-        elif margin_mode == "wide":
-            margin = 50  # 约 17mm
-        else:
-            margin = 0  # 默认无边距
+        margin = get_margin(margin_mode)
 
         # 2️⃣ 计算可用绘制区域（宽度、高度）
         usable_width = page_width - 2 * margin  # 除去左右边距
         usable_height = max_height - 2 * margin  # 除去上下边距
 
         # 3️⃣ 获取图片像素尺寸（px）
-        img_w, img_h = img.size
+        img, (img_w, img_h) = img
 
         # 4️⃣ 计算缩放比例：
         #     - scale_w：适配宽度的比例
@@ -128,16 +382,15 @@ def merge_invoices_top_bottom(img_ios, output_stream: io.BytesIO, margin_mode="n
         x_offset = margin + (usable_width - draw_w) / 2
         y_offset = y_offset + margin + (usable_height - draw_h) / 2
 
-        # 7️⃣ 在 PDF 页面绘制图片
-        c.drawInlineImage(img, x_offset, y_offset, width=draw_w, height=draw_h)
+        # 7️⃣ 在 PDF 页面绘制图片（图片 XObject，可被多处引用）
+        c.drawImage(img, x_offset, y_offset, width=draw_w, height=draw_h)
 
         logger.info(f"绘制图片耗时: {time.time() - t_start:.3f}s")
 
     # 处理第 1 张图片（上半页）
     t_img1_start = time.time()
     if len(img_ios) >= 1:
-        # 如果传入的是 BytesIO，则打开成 PIL.Image；否则直接使用
-        img1 = Image.open(img_ios[0]) if not isinstance(img_ios[0], Image.Image) else img_ios[0]
+        img1 = _prepare_image(img_ios[0], image_codec, image_quality)
         # 如果想裁剪白边可以打开这一行：
         # img1 = trim_white_border(img1)
 
@@ -147,7 +400,7 @@ def merge_invoices_top_bottom(img_ios, output_stream: io.BytesIO, margin_mode="n
     # 处理第 2 张图片（下半页）
     if len(img_ios) >= 2:
         t_img2_start = time.time()
-        img2 = Image.open(img_ios[1]) if not isinstance(img_ios[1], Image.Image) else img_ios[1]
+        img2 = _prepare_image(img_ios[1], image_codec, image_quality)
         # img2 = trim_white_border(img2)
 
         logger.info(f"打开第2张图片耗时: {time.time() - t_img2_start:.3f}s")
@@ -173,6 +426,137 @@ def merge_invoices_top_bottom(img_ios, output_stream: io.BytesIO, margin_mode="n
     logger.info(f"✅ 合并完成，总耗时 {time.time() - t0:.3f}s")
 
 
+def probe_pdf(file_path) -> dict:
+    """
+    读取 PDF 元数据（顶层函数，可在子进程中执行）
+
+    只读取页面树，不解析页面内容，大文件也很快。出错时不抛异常，错误信息放在 "error" 中。
+
+    :return: dict
+        - filepath: 文件路径
+        - page_count: 页数，加密或出错时为 0
+        - encrypted: 是否需要密码才能打开
+        - page_sizes: 出现过的页面尺寸 [(宽, 高)]（pt，按首次出现顺序去重）
+        - mtime: 文件修改时间（时间戳）
+        - error: 错误信息，成功时为 None
+    """
+    result = {
+        "filepath": file_path,
+        "page_count": 0,
+        "encrypted": False,
+        "page_sizes": [],
+        "mtime": 0.0,
+        "error": None,
+    }
+    try:
+        result["mtime"] = os.path.getmtime(file_path)
+        doc = fitz.open(file_path)
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    try:
+        if doc.needs_pass:
+            result["encrypted"] = True
+            return result
+        result["page_count"] = doc.page_count
+        sizes = {}
+        for page_num in range(doc.page_count):
+            rect = doc.page_cropbox(page_num)
+            sizes.setdefault((round(rect.width, 1), round(rect.height, 1)), None)
+        result["page_sizes"] = list(sizes)
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        doc.close()
+    return result
+
+
+def _open_pdf_page(source):
+    """
+    解析发票来源，返回 (fitz.Document, 页码)
+
+    :param source: str | Path | (str | Path, int)，只传路径时默认第 1 页
+    """
+    pdf_path, page_num = page_source(source)
+    return fitz.open(pdf_path), page_num
+
+
+def compose_invoice_sheet(out_doc, sources, margin_mode="none", raster_fallback=False, dpi=150):
+    """
+    以矢量方式（页面作为 Form XObject）把 1~2 个发票页面上下排布到 out_doc 新增的 A4 页
+
+    :param out_doc: fitz.Document，输出文档，会在末尾追加 1 页
+    :param sources: list[str | Path | (str | Path, int)]，1 或 2 个发票页面
+    :param margin_mode: 边距模式（none / narrow / wide），与 merge_invoices_top_bottom 一致
+    :param raster_fallback: 矢量嵌入失败时（损坏的 PDF 等）是否退回到按 dpi 栅格化嵌入
+    :param dpi: 栅格化退回时的渲染 DPI
+    """
+    page_width, page_height = A4
+    half_height = page_height / 2
+    margin = get_margin(margin_mode)
+    sheet = out_doc.new_page(width=page_width, height=page_height)
+
+    # fitz 坐标原点在左上角：第 1 个发票在上半页，第 2 个在下半页
+    for slot, source in enumerate(sources[:2]):
+        top = slot * half_height
+        rect = fitz.Rect(margin, top + margin, page_width - margin, top + half_height - margin)
+        src_doc, page_num = _open_pdf_page(source)
+        try:
+            try:
+                # keep_proportion 会按比例缩放并在区域内居中
+                sheet.show_pdf_page(rect, src_doc, page_num, keep_proportion=True)
+            except Exception as e:
+                if not raster_fallback:
+                    raise
+                logger.warning(f"矢量嵌入失败，退回栅格化: {source}, {e}")
+                zoom = dpi / 72.0
+                pix = src_doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+                sheet.insert_image(rect, pixmap=pix, keep_proportion=True)
+        finally:
+            src_doc.close()
+
+    # 画分割虚线（只有上下都有发票才画）
+    if len(sources) >= 2:
+        sheet.draw_line(
+            fitz.Point(0, half_height),
+            fitz.Point(page_width, half_height),
+            dashes="[5 5] 0",
+            width=1,
+        )
+    return sheet
+
+
+def merge_invoices_top_bottom_vector(
+        sources,
+        output_stream: io.BytesIO,
+        margin_mode="none",
+        raster_fallback=False,
+        dpi=150,
+):
+    """
+    将 1~2 个发票页面以矢量方式上下合并到 1 页 PDF 并写入 output_stream
+
+    与 merge_invoices_top_bottom 的区别是不做栅格化，原始文字和线条保持矢量，
+    输出更小、更清晰，也省去了渲染和图片编码的开销。
+
+    :param sources: list[str | Path | (str | Path, int)]，1 或 2 个发票页面
+    :param output_stream: io.BytesIO，输出的 PDF 文件流
+    :param margin_mode: 边距模式（none / narrow / wide）
+    :param raster_fallback: 矢量嵌入失败时是否退回栅格化
+    :param dpi: 栅格化退回时的渲染 DPI
+    """
+    t0 = time.time()
+    logger.info("开始矢量合并 1~2 个发票页面到一页 PDF ...")
+    out_doc = fitz.open()
+    try:
+        compose_invoice_sheet(out_doc, sources, margin_mode, raster_fallback, dpi)
+        output_stream.write(out_doc.tobytes(garbage=3, deflate=True))
+    finally:
+        out_doc.close()
+    output_stream.seek(0)
+    logger.info(f"✅ 矢量合并完成，总耗时 {time.time() - t0:.3f}s")
+
+
 def merge_pdfs(pdf_streams, output_file):
     """合并多个 PDF BytesIO，输出一个 PDF 文件"""
     t0 = time.time()
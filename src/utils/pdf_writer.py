@@ -0,0 +1,384 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 10:40
+# @File    : pdf_writer.py
+import hashlib
+import io
+import logging
+import os
+import zlib
+from collections import deque
+from pathlib import Path
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+)
+
+logger = logging.getLogger(__name__)
+
+# 预留的对象编号：1 为 Catalog，2 为页面树根节点
+_CATALOG_NUM = 1
+_PAGES_NUM = 2
+# 计算图片内容摘要时跟随间接引用的最大深度
+_DIGEST_MAX_DEPTH = 8
+# 每个对象流容纳的对象数量
+_OBJSTM_SIZE = 100
+# keep_document=True 时从来源 Catalog 复制的文档级条目（书签、命名目标、表单、页码标签等）
+_CATALOG_KEYS = (
+    "/Outlines",
+    "/Names",
+    "/Dests",
+    "/AcroForm",
+    "/PageLabels",
+    "/PageMode",
+    "/PageLayout",
+    "/ViewerPreferences",
+    "/OpenAction",
+    "/Metadata",
+    "/MarkInfo",
+    "/StructTreeRoot",
+    "/Lang",
+    "/OCProperties",
+)
+
+
+class StreamingPdfWriter:
+    """
+    流式 PDF 写入器
+
+    与 pypdf.PdfWriter 先在内存中攒齐所有页面再一次性写出不同，每调用一次 add_pdf
+    就把来源页面引用到的对象重新编号后直接写入输出文件，内存中只保留对象偏移表和页面编号，
+    峰值内存与合并的文件数量无关。
+
+    dedupe_images=True 时按内容摘要对图片 XObject 去重：不同来源（例如每张排版页）中
+    内容完全相同的图片只写入一次，之后的页面直接引用已写入的对象；去重效果记录在
+    images_written / images_deduped / dedup_saved_bytes。
+
+    object_streams=True 时非流对象（页面、字体描述等字典）每 100 个打包进一个压缩的
+    对象流（/ObjStm），交叉引用表改为压缩的交叉引用流（/XRef），输出体积更小。
+
+    用法::
+
+        with StreamingPdfWriter("out.pdf") as writer:
+            writer.add_pdf(io.BytesIO(sheet_bytes))
+            writer.add_pdf("attachment.pdf")
+    """
+
+    def __init__(self, output_file, dedupe_images=True, object_streams=False):
+        self.output_file = Path(output_file)
+        self.dedupe_images = dedupe_images
+        self.object_streams = object_streams
+        self.images_written = 0
+        self.images_deduped = 0
+        self.dedup_saved_bytes = 0
+        self._image_nums = {}  # 图片内容摘要 → 已写入的对象编号
+        self._fp = open(self.output_file, "wb")
+        self._offsets = {}  # 新对象编号 → 文件偏移
+        self._compressed = {}  # 新对象编号 → (对象流编号, 流内序号)
+        self._objstm_batch = []  # 等待打包进对象流的 [(对象编号, 序列化内容)]
+        self._next_num = _PAGES_NUM + 1
+        self._page_nums = []
+        self._catalog_extra = {}  # 复制到输出 Catalog 的文档级条目
+        self._info_num = None  # 输出文件的 /Info 对象编号
+        self._closed = False
+        self._size = 0
+        # 文件头，第二行的高位字节用于提示这是二进制文件
+        self._fp.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_nums)
+
+    @property
+    def bytes_written(self) -> int:
+        return self._size if self._closed else self._fp.tell()
+
+    def _alloc(self) -> int:
+        num = self._next_num
+        self._next_num += 1
+        return num
+
+    def _write_object(self, num, obj):
+        if self.object_streams and not isinstance(obj, StreamObject):
+            buf = io.BytesIO()
+            obj.write_to_stream(buf)
+            self._objstm_batch.append((num, buf.getvalue()))
+            if len(self._objstm_batch) >= _OBJSTM_SIZE:
+                self._flush_object_stream()
+            return
+        self._write_indirect(num, obj)
+
+    def _write_indirect(self, num, obj):
+        self._offsets[num] = self._fp.tell()
+        self._fp.write(f"{num} 0 obj\n".encode())
+        obj.write_to_stream(self._fp)
+        self._fp.write(b"\nendobj\n")
+
+    def _flush_object_stream(self):
+        """把攒下的对象打包成一个压缩的对象流写出"""
+        if not self._objstm_batch:
+            return
+        stm_num = self._alloc()
+        header, body, offset = [], [], 0
+        for index, (num, data) in enumerate(self._objstm_batch):
+            header.append(f"{num} {offset}")
+            body.append(data)
+            offset += len(data) + 1
+            self._compressed[num] = (stm_num, index)
+        header_bytes = " ".join(header).encode() + b"\n"
+        stream = StreamObject()
+        stream._data = zlib.compress(header_bytes + b"\n".join(body))
+        stream[NameObject("/Type")] = NameObject("/ObjStm")
+        stream[NameObject("/N")] = NumberObject(len(self._objstm_batch))
+        stream[NameObject("/First")] = NumberObject(len(header_bytes))
+        stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+        self._write_indirect(stm_num, stream)
+        self._objstm_batch = []
+
+    def add_pdf(self, source, pages=None, on_page=None, keep_document=False) -> int:
+        """
+        追加一个 PDF 的页面并立即写入输出文件
+
+        :param source: 文件路径或二进制文件流（BytesIO 等）
+        :param pages: 需要追加的页码（从 0 开始）可迭代对象，None 表示全部页面
+        :param on_page: 每写完一页调用 ``on_page(done, total)``，可用于报告进度；
+            在回调中抛出异常可以中途停止（之后应调用 abort）
+        :param keep_document: 同时复制来源的文档级信息（书签、表单、页码标签等 Catalog 条目
+            和 /Info 元数据），用于整份重写单个 PDF；合并多个来源时不要使用
+        :return: 本次追加的页数
+        """
+        if isinstance(source, (str, Path)):
+            with open(source, "rb") as fh:
+                return self._add_reader(PdfReader(fh), pages, on_page, keep_document)
+        return self._add_reader(PdfReader(source), pages, on_page, keep_document)
+
+    def _add_reader(self, reader: PdfReader, pages=None, on_page=None, keep_document=False) -> int:
+        if pages is None:
+            pages = range(len(reader.pages))
+        page_objs = [reader.pages[i] for i in pages]
+        selected = {
+            (p.indirect_reference.idnum, p.indirect_reference.generation)
+            for p in page_objs
+        }
+        id_map = {}  # 来源 (idnum, generation) → 新对象编号
+        pending = deque()
+
+        def ref(indirect: IndirectObject):
+            key = (indirect.idnum, indirect.generation)
+            if key not in id_map:
+                target = indirect.get_object()
+                # 链接等指向未选中页面或来源页面树的引用置空，避免把整本来源文件带进来
+                if isinstance(target, DictionaryObject) and (
+                        target.get("/Type") == "/Pages"
+                        or (target.get("/Type") == "/Page" and key not in selected)
+                ):
+                    return NullObject()
+                digest = self._image_digest(target) if self.dedupe_images else None
+                if digest is not None and digest in self._image_nums:
+                    # 相同图片已写入过，直接引用
+                    id_map[key] = self._image_nums[digest]
+                    self.images_deduped += 1
+                    self.dedup_saved_bytes += len(target._data)
+                    return IndirectObject(id_map[key], 0, None)
+                id_map[key] = self._alloc()
+                if digest is not None:
+                    self._image_nums[digest] = id_map[key]
+                    self.images_written += 1
+                pending.append((id_map[key], target))
+            return IndirectObject(id_map[key], 0, None)
+
+        def remap(obj):
+            """复制对象，把其中的间接引用替换为新编号"""
+            if isinstance(obj, IndirectObject):
+                return ref(obj)
+            if isinstance(obj, StreamObject):
+                new = obj.__class__()
+                new._data = obj._data
+                for key, value in obj.items():
+                    if key != "/Length":
+                        new[NameObject(key)] = remap(value)
+                return new
+            if isinstance(obj, DictionaryObject):
+                new = DictionaryObject()
+                is_page = obj.get("/Type") == "/Page"
+                for key, value in obj.items():
+                    # 页面的 /Parent 直接指向输出的页面树，不复制来源页面树
+                    # （可继承的属性已由 PdfReader 展开到各页面上）
+                    if is_page and key == "/Parent":
+                        continue
+                    new[NameObject(key)] = remap(value)
+                if is_page:
+                    new[NameObject("/Parent")] = IndirectObject(_PAGES_NUM, 0, None)
+                return new
+            if isinstance(obj, ArrayObject):
+                return ArrayObject(remap(v) for v in obj)
+            return obj
+
+        def write_pending():
+            while pending:
+                num, obj = pending.popleft()
+                self._write_object(num, remap(obj) if obj is not None else NullObject())
+
+        # 逐页写出：每页只写入此前没写过的对象，页面之间共享的资源只写一次
+        for done, page in enumerate(page_objs, 1):
+            self._page_nums.append(ref(page.indirect_reference).idnum)
+            write_pending()
+            if on_page:
+                on_page(done, len(page_objs))
+
+        if keep_document:
+            # 书签目标、表单控件等引用的页面已在上面写出，沿用同一份编号映射
+            root = reader.trailer["/Root"]
+            for key in _CATALOG_KEYS:
+                if key in root:
+                    self._catalog_extra[key] = remap(root.raw_get(key))
+            info = reader.trailer.raw_get("/Info") if "/Info" in reader.trailer else None
+            if isinstance(info, IndirectObject):
+                self._info_num = ref(info).idnum
+            elif isinstance(info, DictionaryObject):
+                self._info_num = self._alloc()
+                self._write_object(self._info_num, remap(info))
+            write_pending()
+        return len(page_objs)
+
+    @classmethod
+    def _image_digest(cls, obj):
+        """图片 XObject 的内容摘要，不是图片或无法计算时返回 None"""
+        if not (isinstance(obj, StreamObject) and obj.get("/Subtype") == "/Image"):
+            return None
+        h = hashlib.sha256()
+        if not cls._feed_digest(h, obj, 0):
+            return None
+        return h.digest()
+
+    @classmethod
+    def _feed_digest(cls, h, obj, depth) -> bool:
+        """
+        把对象内容写入摘要
+
+        间接引用按目标对象的内容计算（SMask、索引色表等），不使用来源文件中的对象编号，
+        否则不同来源中编号相同的对象会被误判为相同。
+        """
+        if depth > _DIGEST_MAX_DEPTH:
+            return False
+        if isinstance(obj, IndirectObject):
+            h.update(b"R")
+            return cls._feed_digest(h, obj.get_object(), depth + 1)
+        if isinstance(obj, DictionaryObject):
+            h.update(b"<<")
+            for key in sorted(obj.keys()):
+                if key == "/Length":
+                    continue
+                h.update(key.encode())
+                if not cls._feed_digest(h, obj.raw_get(key), depth + 1):
+                    return False
+            h.update(b">>")
+            if isinstance(obj, StreamObject):
+                h.update(b"stream%d:" % len(obj._data))
+                h.update(obj._data)
+            return True
+        if isinstance(obj, ArrayObject):
+            h.update(b"[")
+            for value in obj:
+                if not cls._feed_digest(h, value, depth + 1):
+                    return False
+            h.update(b"]")
+            return True
+        h.update(repr(obj).encode())
+        h.update(b" ")
+        return True
+
+    def close(self):
+        """写入页面树、交叉引用表（或交叉引用流）和文件尾"""
+        if self._closed:
+            return
+        pages = DictionaryObject()
+        pages[NameObject("/Type")] = NameObject("/Pages")
+        pages[NameObject("/Kids")] = ArrayObject(IndirectObject(n, 0, None) for n in self._page_nums)
+        pages[NameObject("/Count")] = NumberObject(len(self._page_nums))
+        self._write_object(_PAGES_NUM, pages)
+        catalog = DictionaryObject()
+        catalog[NameObject("/Type")] = NameObject("/Catalog")
+        catalog[NameObject("/Pages")] = IndirectObject(_PAGES_NUM, 0, None)
+        for key, value in self._catalog_extra.items():
+            catalog[NameObject(key)] = value
+        self._write_object(_CATALOG_NUM, catalog)
+
+        if self.object_streams:
+            self._flush_object_stream()
+            xref_offset = self._write_xref_stream()
+        else:
+            xref_offset = self._write_xref_table()
+        self._fp.write(f"startxref\n{xref_offset}\n%%EOF\n".encode())
+        self._size = self._fp.tell()
+        self._fp.close()
+        self._closed = True
+        logger.info(f"✅ 流式写入完成：{self.output_file}，共 {len(self._page_nums)} 页")
+
+    def _write_xref_table(self) -> int:
+        xref_offset = self._fp.tell()
+        size = self._next_num
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for num in range(1, size):
+            offset = self._offsets.get(num)
+            lines.append(f"{offset:010d} 00000 n \n" if offset is not None else "0000000000 65535 f \n")
+        self._fp.write("".join(lines).encode())
+        info = f" /Info {self._info_num} 0 R" if self._info_num is not None else ""
+        self._fp.write(f"trailer\n<< /Size {size} /Root {_CATALOG_NUM} 0 R{info} >>\n".encode())
+        return xref_offset
+
+    def _write_xref_stream(self) -> int:
+        """写入压缩的交叉引用流，同时承担文件尾（trailer）的作用"""
+        xref_num = self._alloc()
+        xref_offset = self._fp.tell()
+        self._offsets[xref_num] = xref_offset
+        size = self._next_num
+        width = max(1, (xref_offset.bit_length() + 7) // 8)
+        rows = []
+        for num in range(size):
+            if num in self._offsets:
+                rows.append(b"\x01" + self._offsets[num].to_bytes(width, "big") + b"\x00\x00")
+            elif num in self._compressed:
+                stm_num, index = self._compressed[num]
+                rows.append(b"\x02" + stm_num.to_bytes(width, "big") + index.to_bytes(2, "big"))
+            else:
+                rows.append(b"\x00" + bytes(width) + b"\xff\xff")
+        stream = StreamObject()
+        stream._data = zlib.compress(b"".join(rows))
+        stream[NameObject("/Type")] = NameObject("/XRef")
+        stream[NameObject("/Size")] = NumberObject(size)
+        stream[NameObject("/W")] = ArrayObject([NumberObject(1), NumberObject(width), NumberObject(2)])
+        stream[NameObject("/Root")] = IndirectObject(_CATALOG_NUM, 0, None)
+        if self._info_num is not None:
+            stream[NameObject("/Info")] = IndirectObject(self._info_num, 0, None)
+        stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+        self._write_indirect(xref_num, stream)
+        return xref_offset
+
+    def abort(self):
+        """放弃写入并删除不完整的输出文件"""
+        if not self._closed:
+            self._fp.close()
+            self._closed = True
+        try:
+            os.remove(self.output_file)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
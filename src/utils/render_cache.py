@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 13:05
+# @File    : render_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(file_path, chunk_size=1024 * 1024) -> str:
+    """分块计算文件内容的 sha256"""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    渲染结果磁盘缓存（按内容寻址）
+
+    - 缓存键：文件内容 sha256 + 页码 + DPI + 输出格式，文件改名或移动后仍能命中
+    - 来源文件的 mtime 或大小变化时重新计算摘要，旧摘要下的缓存自动失效
+    - 总大小超过 max_bytes 时按最近使用时间（LRU）淘汰
+    - 索引保存在 cache_dir/index.db（sqlite），图片保存在 cache_dir/<键前两位>/<键>.<格式>
+
+    线程安全；命中、未命中次数记录在 hits / misses。
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            (self.cache_dir / "index.db").as_posix(), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                fmt TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries (digest);
+            CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used);
+            """
+        )
+        self._conn.commit()
+
+    # ---- 来源文件摘要 ----
+    def file_digest(self, pdf_path) -> str:
+        """
+        返回文件内容摘要
+
+        mtime 和大小都没变时直接使用记录的摘要，避免重复读取整个文件；
+        有变化时重新计算，并清理旧摘要下不再被任何文件引用的缓存。
+        """
+        path = Path(pdf_path).resolve().as_posix()
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, digest FROM sources WHERE path = ?", (path,)
+            ).fetchone()
+        if row and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            return row[2]
+
+        digest = file_sha256(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, digest),
+            )
+            if row and row[2] != digest:
+                logger.info(f"来源文件已变化，缓存失效: {path}")
+                self._drop_orphan_digest(row[2])
+            self._conn.commit()
+        return digest
+
+    def _drop_orphan_digest(self, digest):
+        """删除没有任何来源文件再引用的摘要对应的缓存（需持有锁）"""
+        in_use = self._conn.execute(
+            "SELECT 1 FROM sources WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if in_use:
+            return
+        rows = self._conn.execute(
+            "SELECT key, fmt FROM entries WHERE digest = ?", (digest,)
+        ).fetchall()
+        for key, fmt in rows:
+            self._remove_file(key, fmt)
+        self._conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+
+    # ---- 读写 ----
+    @staticmethod
+    def make_key(digest, page_num, dpi, fmt) -> str:
+        return hashlib.sha256(f"{digest}:{page_num}:{dpi}:{fmt}".encode()).hexdigest()
+
+    def _entry_path(self, key, fmt) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.{fmt}"
+
+    def _remove_file(self, key, fmt):
+        try:
+            os.remove(self._entry_path(key, fmt))
+        except FileNotFoundError:
+            pass
+
+    def has(self, pdf_path, page_num=0, dpi=150, fmt="jpeg") -> bool:
+        """是否已缓存（不计入命中统计）"""
+        key = self.make_key(self.file_digest(pdf_path), page_num, dpi, fmt)
+        return self._entry_path(key, fmt).exists()
+
+    def get(self, pdf_path, page_num=0, dpi=150, fmt="jpeg"):
+        """
+        读取缓存，未命中返回 None
+
+        图片文件丢失，或大小与索引记录不一致（写入中断、被截断）时视为未命中，
+        并删除对应的索引和文件，调用方重新渲染后 put 即可恢复
+        """
+        key = self.make_key(self.file_digest(pdf_path), page_num, dpi, fmt)
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        try:
+            data = self._entry_path(key, fmt).read_bytes()
+        except FileNotFoundError:
+            data = None
+        if data is None or row is None or len(data) != row[0]:
+            if data is not None:
+                logger.warning(f"渲染缓存文件损坏，已删除: {self._entry_path(key, fmt)}")
+                self._remove_file(key, fmt)
+            with self._lock:
+                self.misses += 1
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+            return None
+        with self._lock:
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return data
+
+    def put(self, pdf_path, page_num, dpi, fmt, data: bytes):
+        """写入缓存，超出容量时按 LRU 淘汰"""
+        digest = self.file_digest(pdf_path)
+        key = self.make_key(digest, page_num, dpi, fmt)
+        entry_path = self._entry_path(key, fmt)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换，避免并发读取到半个文件
+        tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, entry_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, digest, fmt, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, digest, fmt, len(data), time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """按最近使用时间淘汰，直到总大小不超过 max_bytes（需持有锁）"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        evicted = []
+        for key, fmt, size in self._conn.execute(
+                "SELECT key, fmt, size FROM entries ORDER BY last_used"
+        ):
+            if total - freed <= self.max_bytes:
+                break
+            evicted.append((key, fmt))
+            freed += size
+        for key, fmt in evicted:
+            self._remove_file(key, fmt)
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in evicted])
+        logger.info(f"渲染缓存淘汰 {len(evicted)} 项，释放 {freed / 1024 / 1024:.1f}MB")
+
+    def clear(self):
+        """清空所有缓存"""
+        with self._lock:
+            for key, fmt in self._conn.execute("SELECT key, fmt FROM entries").fetchall():
+                self._remove_file(key, fmt)
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM sources")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 20:10
+# @File    : thumbnail.py
+import logging
+
+from utils.pdf_utils import _render_page_bytes
+from utils.render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+# 缩略图以 PNG 保存（低 DPI 下文字边缘比 JPEG 清晰，体积也不大）
+THUMBNAIL_FORMAT = "png"
+
+# 每个进程按缓存目录复用 RenderCache，避免每次渲染都重新打开索引库
+_caches = {}
+
+
+def _cache_for(cache_dir, max_bytes):
+    cache = _caches.get(cache_dir)
+    if cache is None:
+        cache = _caches[cache_dir] = RenderCache(cache_dir, max_bytes)
+    return cache
+
+
+def load_thumbnail(pdf_path, dpi=24, cache_dir=None, cache_max_bytes=64 * 1024 * 1024) -> bytes:
+    """
+    读取 PDF 第一页的缩略图（PNG 字节）
+
+    先查磁盘缓存，未命中时低 DPI 渲染并写入缓存。顶层函数，可在子进程中执行。
+
+    :param pdf_path: PDF 路径
+    :param dpi: 渲染 DPI
+    :param cache_dir: 磁盘缓存目录，None 表示不使用缓存
+    :param cache_max_bytes: 磁盘缓存容量上限
+    """
+    cache = _cache_for(str(cache_dir), cache_max_bytes) if cache_dir else None
+    if cache:
+        data = cache.get(pdf_path, 0, dpi, THUMBNAIL_FORMAT)
+        if data is not None:
+            return data
+    data = _render_page_bytes(pdf_path, 0, dpi, output=THUMBNAIL_FORMAT)
+    if cache:
+        try:
+            cache.put(pdf_path, 0, dpi, THUMBNAIL_FORMAT, data)
+        except Exception:
+            # 缓存写入失败不影响显示
+            logger.exception(f"缩略图写入缓存失败: {pdf_path}")
+    return data
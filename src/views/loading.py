@@ -21,11 +21,17 @@ class LoadingDialog:
         self.dialog.setAutoClose(False)  # 不自动关闭
         self.dialog.setAutoReset(False)  # 不自动重置
         self.dialog.close()
+        self._on_cancel = None
 
-    def show(self, text: str = None):
-        """显示 loading，可以更新文字"""
+    def show(self, text: str = None, on_cancel=None):
+        """
+        显示 loading，可以更新文字
+
+        :param on_cancel: 传入时显示“取消”按钮，点击后调用；不传则不能取消
+        """
         if text:
             self.setText(text)
+        self._set_cancel(on_cancel)
         self.dialog.show()
         self.dialog.raise_()
         self.dialog.activateWindow()
@@ -34,6 +40,16 @@ class LoadingDialog:
         """关闭 loading"""
         self.dialog.close()
 
+    def _set_cancel(self, on_cancel):
+        if self._on_cancel is not None:
+            self.dialog.canceled.disconnect(self._on_cancel)
+        self._on_cancel = on_cancel
+        if on_cancel is None:
+            self.dialog.setCancelButton(None)
+        else:
+            self.dialog.setCancelButtonText("取消")
+            self.dialog.canceled.connect(on_cancel)
+
     def setText(self, text: str):
         """更新提示文字"""
         self.dialog.setLabelText(text)
@@ -8,26 +8,31 @@ import os
 from pathlib import Path
 from typing import Optional
 
-import fitz
-from PySide6.QtCore import QUrl, QThread
+from PySide6.QtCore import QUrl, QThread, Qt, QSize
 from PySide6.QtGui import QIcon
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtWidgets import (
-    QMainWindow, QMessageBox, QFileDialog,
+    QMainWindow, QMessageBox, QFileDialog, QMenu, QInputDialog, QAbstractItemView,
 )
 
 import version
+from core import settings
 from core.settings import BASE_DIR
 from ui.tools import Ui_MainWindow
 from utils.icon_utils import generate_icon, icon_shape
+from utils.page_range import parse_page_range
 from utils.sound_utils import generate_sound
 from views.loading import LoadingDialog
-from views.page1.invoice_pdf import SinglePagePdfTableModel, SinglePagePdfDropFilter
-from views.page1.merge_pdf import MergePDFThread
+from views.page1.folder_scan import FolderScanThread
+from views.page1.invoice_pdf import SinglePagePdfTableModel
+from views.page1.merge_pdf import STAGES, RC_CANCELLED, MergePDFThread
+from views.page1.pdf_probe import STATUS_OK, PdfProbeService
+from views.page1.pdf_table import PdfDropFilter
+from views.page1.pdf_thumbnail import PdfThumbnailService
+from views.page1.status_coalescer import StatusUpdateCoalescer
 from views.page1.single_page_pdf import (
     InvoicePdfTableModel,
     InvoicePdfButtonDelegate,
-    InvoicePdfDropFilter,
 )
 
 logger = logging.getLogger("app")
@@ -57,12 +62,21 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # 显示欢迎消息
         self.statusBar().showMessage("欢迎使用")
 
+        # 后台读取拖入 / 添加文件的元数据，两个表共用
+        self.pdfProbeService = PdfProbeService(parent=self)
+
         # 报销合并发票 - 发票表
         self.invoicePdfTableModel = InvoicePdfTableModel()
         self.invoicePdfTableView.setModel(self.invoicePdfTableModel)
-        self.invoicePdfTableView.installEventFilter(
-            InvoicePdfDropFilter(self.invoicePdfTableModel, self.invoicePdfTableView)
+        self.invoicePdfDropFilter = PdfDropFilter(
+            self.invoicePdfTableModel, self.pdfProbeService, self.invoicePdfTableView
+        )
+        self.invoicePdfDropFilter.foldersDropped.connect(
+            lambda folders: self.on_scan_folders(self.invoicePdfTableModel, folders)
         )
+        self.invoicePdfTableView.installEventFilter(self.invoicePdfDropFilter)
+        self.pdfProbeService.probedSignal.connect(self.invoicePdfTableModel.on_files_probed)
+        self.invoicePdfTableModel.pendingInsertedSignal.connect(self.pdfProbeService.probe)
         self.invoicePdfTableView.setColumnHidden(1, True)
 
         self.invoicePdfButtonDelegate = InvoicePdfButtonDelegate(
@@ -78,11 +92,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # 报销合并发票 - 单页pdf表
         self.singlePagePdfTableModel = SinglePagePdfTableModel()
         self.singlePagePdfTableView.setModel(self.singlePagePdfTableModel)
-        self.singlePagePdfTableView.installEventFilter(
-            SinglePagePdfDropFilter(
-                self.singlePagePdfTableModel, self.singlePagePdfTableView
-            )
+        self.singlePagePdfDropFilter = PdfDropFilter(
+            self.singlePagePdfTableModel, self.pdfProbeService, self.singlePagePdfTableView
+        )
+        self.singlePagePdfDropFilter.foldersDropped.connect(
+            lambda folders: self.on_scan_folders(self.singlePagePdfTableModel, folders)
         )
+        self.singlePagePdfTableView.installEventFilter(self.singlePagePdfDropFilter)
+        self.pdfProbeService.probedSignal.connect(self.singlePagePdfTableModel.on_files_probed)
+        self.singlePagePdfTableModel.pendingInsertedSignal.connect(self.pdfProbeService.probe)
         self.singlePagePdfTableView.setColumnHidden(1, True)
 
         self.singlePagePdfButtonDelegate = InvoicePdfButtonDelegate(
@@ -95,11 +113,40 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             5, self.singlePagePdfButtonDelegate
         )
 
+        # 右键菜单：对选中的多行批量移动、删除、排序
+        for view, model in (
+                (self.invoicePdfTableView, self.invoicePdfTableModel),
+                (self.singlePagePdfTableView, self.singlePagePdfTableModel),
+        ):
+            view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+            view.customContextMenuRequested.connect(
+                lambda pos, v=view, m=model: self.on_table_context_menu(v, m, pos)
+            )
+
+        # 文件名列显示首页缩略图，只渲染可见行
+        self.pdfThumbnailService = None
+        if settings.PDF_THUMBNAIL_ENABLED:
+            self.pdfThumbnailService = PdfThumbnailService(parent=self)
+            for view, model in (
+                    (self.invoicePdfTableView, self.invoicePdfTableModel),
+                    (self.singlePagePdfTableView, self.singlePagePdfTableModel),
+            ):
+                view.setIconSize(QSize(24, 24))
+                self.pdfThumbnailService.watch(view)
+                model.set_thumbnail_service(self.pdfThumbnailService)
+
+        # 后台任务的文件状态先攒在合并器里，按固定帧率批量刷新到两个表
+        self.statusCoalescer = StatusUpdateCoalescer(
+            (self.invoicePdfTableModel, self.singlePagePdfTableModel), parent=self
+        )
+
         # # 遮罩（进度提示）
         self.loading_progress = LoadingDialog(self, "初始化...")
 
         self.startpushButton.clicked.connect(self.on_start)
         self.startThread: Optional[QThread] = None
+        self.scanThread: Optional[FolderScanThread] = None
 
         # 按钮
         self.outputFileNamelineEdit.setText(f"merge_pdf_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.pdf")
@@ -118,6 +165,37 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         if reply == QMessageBox.StandardButton.Yes:
             model.on_files_loaded([])
 
+    def on_table_context_menu(self, view, model, pos):
+        """表格右键菜单，操作当前选中的所有行"""
+        rows = sorted({index.row() for index in view.selectionModel().selectedIndexes()})
+        if not rows:
+            # 没有选中时操作鼠标所在行
+            index = view.indexAt(pos)
+            rows = [index.row()] if index.isValid() else []
+
+        menu = QMenu(view)
+        selected_actions = [
+            menu.addAction("置顶", lambda: model.move_rows_to_top(rows)),
+            menu.addAction("置底", lambda: model.move_rows_to_bottom(rows)),
+            menu.addAction("上移 N 行...", lambda: self._move_rows_by(model, rows, -1)),
+            menu.addAction("下移 N 行...", lambda: self._move_rows_by(model, rows, 1)),
+            menu.addAction(f"删除所选（{len(rows)}）", lambda: model.remove_rows(rows)),
+        ]
+        for action in selected_actions:
+            action.setEnabled(bool(rows))
+        menu.addSeparator()
+        sort_menu = menu.addMenu("排序")
+        sort_menu.addAction("按文件名", lambda: model.sort_files("name"))
+        sort_menu.addAction("按修改时间", lambda: model.sort_files("date"))
+        sort_menu.addAction("按页数", lambda: model.sort_files("pages"))
+        sort_menu.setEnabled(model.rowCount() > 1)
+        menu.exec(view.viewport().mapToGlobal(pos))
+
+    def _move_rows_by(self, model, rows, direction):
+        offset, ok = QInputDialog.getInt(self, "移动", "移动行数：", 1, 1, max(1, model.rowCount() - 1))
+        if ok:
+            model.move_rows_by(rows, direction * offset)
+
     def on_add_file(self, model):
         """打开文件选择对话框并添加文件"""
         files, _ = QFileDialog.getOpenFileNames(
@@ -126,29 +204,65 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             "",
             "PDF 文件 (*.pdf)"
         )
-        for file_path in files:
-            file_info = self.load_pdf_info(file_path)
-            model.on_file_inserted(file_info)
-
-    def load_pdf_info(self, file_path: str) -> dict:
-        """解析 PDF 文件并返回字典信息"""
-        doc = fitz.open(file_path)
-        file_info = {
-            "filename": Path(file_path).name,
-            "filepath": file_path,
-            "pagesize": doc.page_count,
-            "file_range": f"1-{doc.page_count}",
-            "status": "加载成功"
-        }
-        doc.close()
-        return file_info
+        # 先显示占位行，元数据在后台读取
+        self.pdfProbeService.probe(model.on_files_probing(files))
+
+    def on_scan_folders(self, model, folders):
+        """后台递归扫描拖入的目录，匹配的 PDF 分批加入表格"""
+        if self.scanThread is not None:
+            QMessageBox.information(self, "提示", "正在扫描目录，请稍候")
+            return
+        self.scanThread = FolderScanThread(folders, parent=self)
+        # 扫描批次经模型的插入队列合并插入，实际插入后由 pendingInsertedSignal 交给后台读取元数据
+        self.scanThread.batchSignal.connect(model.queue_probing)
+        self.scanThread.progressSignal.connect(self.on_scan_progress)
+        self.scanThread.finishSignal.connect(self.on_scan_finish)
+        self.loading_progress.show("正在扫描目录...", on_cancel=self.on_scan_cancel)
+        self.scanThread.start()
+
+    def on_scan_progress(self, scanned, matched):
+        self.loading_progress.setText(f"正在扫描目录：已检查 {scanned} 个文件，找到 {matched} 个 PDF")
+
+    def on_scan_cancel(self):
+        if self.scanThread is not None:
+            self.scanThread.requestInterruption()
+
+    def on_scan_finish(self, matched, cancelled):
+        self.loading_progress.close()
+        self.statusBar().showMessage(
+            f"{'已取消扫描' if cancelled else '扫描完成'}，找到 {matched} 个 PDF"
+        )
+        self.scanThread.deleteLater()
+        self.scanThread = None
 
     def on_start(self):
         if self.startThread is not None:
             return
-        self.loading_progress.show("开始合并...")
-        pdfs = [Path(f["filepath"]) for f in self.invoicePdfTableModel.files]
-        pdfs2 = [Path(f["filepath"]) for f in self.singlePagePdfTableModel.files]
+        not_ready = [
+            f for f in self.invoicePdfTableModel.files + self.singlePagePdfTableModel.files
+            if f.status != STATUS_OK
+        ]
+        if not_ready:
+            QMessageBox.warning(
+                self,
+                "警告",
+                f"有 {len(not_ready)} 个文件尚未加载完成或无法读取，请稍候或移除后再合并：\n"
+                + "\n".join(f"{f.filename}（{f.status}）" for f in not_ready[:10]),
+            )
+            return
+        try:
+            # 页码范围在这里解析一次，后续只处理选中的页面
+            pdfs = [
+                (Path(f.filepath), parse_page_range(f.file_range, f.pagesize))
+                for f in self.invoicePdfTableModel.files
+            ]
+            pdfs2 = [
+                (Path(f.filepath), parse_page_range(f.file_range, f.pagesize))
+                for f in self.singlePagePdfTableModel.files
+            ]
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", f"页码范围无效: {e}")
+            return
         if not any([pdfs, pdfs2]):
             QMessageBox.warning(
                 self,
@@ -168,10 +282,39 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             open_folder=open_folder
         )
         self.startThread.finishSignal.connect(self.on_start_finish)
+        self.startThread.progressSignal.connect(self.on_merge_progress)
+        # 直接在工作线程中写入合并器的缓冲区，不为每个文件排队一次界面线程调用
+        self.startThread.fileStatusSignal.connect(
+            self.statusCoalescer.post, Qt.ConnectionType.DirectConnection
+        )
+        self._set_merge_status("等待合并")
+        self.loading_progress.show("开始合并...", on_cancel=self.on_merge_cancel)
         self.startThread.start()
 
+    def _set_merge_status(self, status):
+        """把两个表所有文件的状态设为 status"""
+        for model in (self.invoicePdfTableModel, self.singlePagePdfTableModel):
+            model.on_files_status([(f.filepath, status) for f in model.files])
+
+    def on_merge_progress(self, stage, done, total, file_path, eta):
+        label = STAGES.get(stage, (stage, None))[0]
+        text = f"{label} {done}/{total}"
+        if eta >= 0:
+            text += f"，预计剩余 {eta:.0f} 秒"
+        self.loading_progress.setText(f"{text}\n{Path(file_path).name}")
+
+    def on_merge_cancel(self):
+        if self.startThread is not None:
+            self.startThread.cancel()
+            self.loading_progress.show("正在取消...")
+
     def on_start_finish(self, file_path, message, rc):
-        if rc:
+        # 合并过程中的状态只用于显示进度，结束后恢复（先应用还在缓冲区的更新）
+        self.statusCoalescer.flush()
+        self._set_merge_status(STATUS_OK)
+        if rc == RC_CANCELLED:
+            self.statusBar().showMessage(message)
+        elif rc:
             reply = QMessageBox.critical(
                 self,
                 "合并异常",
@@ -302,7 +445,14 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def cleanup(self):
         logger.info("正在清理线程...")
+        if self.scanThread:
+            self.scanThread.requestInterruption()
+            self.scanThread.wait()
+        self.pdfProbeService.shutdown()
+        if self.pdfThumbnailService:
+            self.pdfThumbnailService.shutdown()
         if self.startThread:
+            self.startThread.cancel()
             self.startThread.quit()
             self.startThread.wait()
 
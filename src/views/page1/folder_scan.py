@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 21:05
+# @File    : folder_scan.py
+import logging
+import time
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+
+from core import settings
+from utils.file_scan import ScanFilter, scan_files
+
+logger = logging.getLogger("app")
+
+
+def default_scan_filter() -> ScanFilter:
+    """按配置生成拖入目录时使用的过滤条件"""
+    return ScanFilter(
+        extensions=settings.PDF_SCAN_EXTENSIONS,
+        name_pattern=settings.PDF_SCAN_NAME_PATTERN,
+        min_size=settings.PDF_SCAN_MIN_SIZE,
+        max_size=settings.PDF_SCAN_MAX_SIZE,
+        modified_after=settings.PDF_SCAN_MODIFIED_AFTER,
+        modified_before=settings.PDF_SCAN_MODIFIED_BEFORE,
+    )
+
+
+class FolderScanThread(QThread):
+    """
+    后台递归扫描目录
+
+    匹配的文件攒成批次，每 batch_size 个或每 batch_interval_ms 通过 batchSignal(list) 发出，
+    界面线程逐批插入表格；调用 requestInterruption() 取消扫描。
+    """
+
+    # 一批匹配的文件路径
+    batchSignal = Signal(list)
+    # 已检查的文件数, 匹配的文件数
+    progressSignal = Signal(int, int)
+    # 匹配的文件总数, 是否被取消
+    finishSignal = Signal(int, bool)
+
+    def __init__(
+            self,
+            folders,
+            scan_filter: ScanFilter = None,
+            batch_size=settings.PDF_SCAN_BATCH_SIZE,
+            batch_interval_ms=settings.PDF_SCAN_BATCH_INTERVAL_MS,
+            parent=None,
+    ):
+        super().__init__(parent)
+        self.folders = list(folders)
+        self.scan_filter = scan_filter or default_scan_filter()
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval_ms / 1000
+        self.scanned = 0
+        self.matched = 0
+        self._batch = []
+        self._last_emit = 0.0
+
+    def _emit_batch(self, force=False):
+        """批次已满或距上次发出超过间隔时发出批次和进度（force 时立即发出）"""
+        now = time.monotonic()
+        if not force and len(self._batch) < self.batch_size and now - self._last_emit < self.batch_interval:
+            return
+        if self._batch:
+            self.batchSignal.emit(self._batch)
+            self._batch = []
+        self.progressSignal.emit(self.scanned, self.matched)
+        self._last_emit = now
+
+    def _count_entry(self):
+        self.scanned += 1
+        # 长时间没有匹配的文件时也要定期刷新扫描数量
+        self._emit_batch()
+
+    def run(self, /):
+        t0 = time.time()
+        self._last_emit = time.monotonic()
+        try:
+            for file_path in scan_files(
+                    self.folders,
+                    self.scan_filter,
+                    should_stop=self.isInterruptionRequested,
+                    on_entry=self._count_entry,
+            ):
+                self._batch.append(Path(file_path).as_posix())
+                self.matched += 1
+                self._emit_batch()
+        except Exception:
+            logger.exception(f"扫描目录失败: {self.folders}")
+        cancelled = self.isInterruptionRequested()
+        if cancelled:
+            # 取消后不再插入剩余的文件，匹配数只统计已发出的
+            self.matched -= len(self._batch)
+            self._batch = []
+        self._emit_batch(force=True)
+        logger.info(
+            f"扫描目录{'已取消' if cancelled else '完成'}：检查 {self.scanned} 个文件，"
+            f"匹配 {self.matched} 个，用时 {time.time() - t0:.2f}s"
+        )
+        self.finishSignal.emit(self.matched, cancelled)
@@ -3,23 +3,60 @@
 # @Author  : wt
 # @Time    : 2025/9/10 14:09
 # @File    : merge_pdf.py
-import io
 import logging
 import os
+import threading
 from pathlib import Path
 
 from PySide6.QtCore import QThread, Signal
 
-from utils.pdf_utils import pdf_to_image_bytesio, merge_invoices_top_bottom, merge_pdfs
+from core import settings
+from utils.merge_pipeline import MergeCancelled, ProgressEta, merge_invoice_pack
+from utils.render_cache import RenderCache
 
 logger = logging.getLogger("app")
 
+# 合并阶段 → (进度提示, 文件完成该阶段后的状态)
+STAGES = {
+    "render": ("渲染发票", "已渲染"),
+    "compose": ("排版发票", "已排版"),
+    "write": ("写入附件", "已写入"),
+    "optimize": ("优化体积", None),
+}
+# finishSignal 的返回码
+RC_SUCCESS = 0
+RC_FAILED = 1
+RC_CANCELLED = 2
+
 
 class MergePDFThread(QThread):
+    """
+    合并发票线程
+
+    pdfs / pdfs2 为 [(Path, PageRange)]：发票每个选中页面两两排版到一页 A4，
+    单页 PDF 只复制选中的页面追加到末尾。
+
+    调用 cancel() 后在处理完当前页面时停止，并删除未写完的输出文件。
+    """
+
+    # 输出文件路径, 提示信息, 返回码（RC_SUCCESS / RC_FAILED / RC_CANCELLED）
     finishSignal = Signal(str, str, int)
+    # 阶段进度：阶段, 已完成数量, 总数量, 文件路径, 预计剩余秒数（未知时为 -1）
+    progressSignal = Signal(str, int, int, str, float)
+    # 文件处理状态：文件路径, 状态
+    fileStatusSignal = Signal(str, str)
 
     def __init__(
-        self, dest_file, dest_path, pdfs, pdfs2, open_folder=True, parent=None
+        self,
+        dest_file,
+        dest_path,
+        pdfs,
+        pdfs2,
+        open_folder=True,
+        workers=settings.PDF_RENDER_WORKERS,
+        layout=settings.PDF_LAYOUT_ENGINE,
+        margin_mode=settings.PDF_MARGIN_MODE,
+        parent=None,
     ):
         super().__init__(parent)
         self.dest_file = dest_file
@@ -27,6 +64,17 @@ class MergePDFThread(QThread):
         self.pdfs = pdfs
         self.pdfs2 = pdfs2
         self.open_folder = open_folder
+        self.workers = workers
+        self.layout = layout
+        self.margin_mode = margin_mode
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求取消（可在任意线程调用）"""
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
 
     def run(self, /):
         try:
@@ -35,34 +83,73 @@ class MergePDFThread(QThread):
                 dest_path.mkdir(parents=True, exist_ok=True)
                 logger.info(f"{dest_path.as_posix()}不存在，已经创建")
 
-            pdf_paths = self.pdfs
-            # 1️⃣ 先把 PDF 渲染为图片 BytesIO
-            img_bytes_list = []
-            for p in pdf_paths:
-                img_bytes_list.append(pdf_to_image_bytesio(p.as_posix()))
-
-            # 2️⃣ 每两张合成一页 PDF
-            single_pdfs = []
-            for i in range(0, len(img_bytes_list), 2):
-                img_ios = [img_bytes_list[i]]
-                if i + 1 < len(img_bytes_list):
-                    img_ios.append(img_bytes_list[i + 1])
-
-                pdf_buf = io.BytesIO()
-                merge_invoices_top_bottom(img_ios, pdf_buf)
-                single_pdfs.append(pdf_buf)
-
-            single_pdfs.extend(self.pdfs2)
             dest_file = self.dest_file
             if not dest_file.endswith(".pdf"):
                 dest_file = dest_file + ".pdf"
             dest_file_path = dest_path / dest_file
-            # 3️⃣ 合并所有 PDF
-            merge_pdfs(single_pdfs, dest_file_path.as_posix())
+
+            eta = ProgressEta()
+
+            def on_progress(stage, done, total, file_path):
+                # 在渲染线程或本线程中调用，信号跨线程排队送到界面线程
+                remaining = eta.eta(stage, done, total)
+                self.progressSignal.emit(stage, done, total, file_path, -1.0 if remaining is None else remaining)
+                status = STAGES.get(stage, (None, None))[1]
+                if status:
+                    self.fileStatusSignal.emit(file_path, status)
+
+            cache = None
+            if settings.PDF_RENDER_CACHE_ENABLED and self.layout == "raster":
+                cache = RenderCache(
+                    settings.PDF_RENDER_CACHE_DIR, settings.PDF_RENDER_CACHE_MAX_BYTES
+                )
+
+            # 渲染 → 排版 → 流式写入，峰值内存与文件数量无关
+            try:
+                stats = merge_invoice_pack(
+                    [(p.as_posix(), pages) for p, pages in self.pdfs],
+                    [(p.as_posix(), pages) for p, pages in self.pdfs2],
+                    dest_file_path.as_posix(),
+                    layout=self.layout,
+                    margin_mode=self.margin_mode,
+                    dpi=settings.PDF_RENDER_DPI,
+                    workers=self.workers,
+                    parallel_threshold=settings.PDF_RENDER_PARALLEL_THRESHOLD,
+                    raster_fallback=settings.PDF_RASTER_FALLBACK,
+                    image_codec=settings.PDF_IMAGE_CODEC,
+                    image_quality=settings.PDF_IMAGE_QUALITY,
+                    memory_limit=settings.PDF_PIPELINE_MEMORY_LIMIT,
+                    queue_size=settings.PDF_PIPELINE_QUEUE_SIZE,
+                    cache=cache,
+                    optimize=settings.PDF_OPTIMIZE_PRESET,
+                    on_progress=on_progress,
+                    should_stop=self.is_cancelled,
+                )
+            finally:
+                if cache:
+                    cache.close()
+            if cache:
+                logger.info(
+                    f"渲染缓存命中 {stats['cache_hits']}，未命中 {stats['cache_misses']}"
+                )
+            if stats["images_deduped"]:
+                logger.info(
+                    f"图片去重 {stats['images_deduped']} 处，"
+                    f"节省 {stats['dedup_saved_bytes'] / 1024:.1f}KB"
+                )
+            if "optimize" in stats:
+                logger.info(
+                    f"体积优化（{stats['optimize']['preset']}）节省 "
+                    f"{stats['optimize']['saved_bytes'] / 1024:.1f}KB，耗时 {stats['optimize']['elapsed']}s"
+                )
+            logger.info(f"合并完成: {dest_file_path.as_posix()}，{stats}")
             if self.open_folder:
                 os.startfile(dest_path.as_posix())
+        except MergeCancelled:
+            logger.info("合并已取消，已删除未完成的输出文件")
+            self.finishSignal.emit("", "合并已取消", RC_CANCELLED)
         except Exception as e:
             logger.exception(f"合成文件失败: {e}")
-            self.finishSignal.emit("", f"合成文件失败: {e}", 1)
+            self.finishSignal.emit("", f"合成文件失败: {e}", RC_FAILED)
         else:
-            self.finishSignal.emit(dest_file_path.as_posix(), "success", 0)
\ No newline at end of file
+            self.finishSignal.emit(dest_file_path.as_posix(), "success", RC_SUCCESS)
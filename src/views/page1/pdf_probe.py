@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 18:00
+# @File    : pdf_probe.py
+import logging
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from core import settings
+from utils.pdf_utils import probe_pdf
+
+logger = logging.getLogger("app")
+
+# 文件状态
+STATUS_PROBING = "探测中"
+STATUS_OK = "加载成功"
+STATUS_ENCRYPTED = "已加密"
+STATUS_FAILED = "加载失败"
+
+
+class PdfProbeService(QObject):
+    """
+    后台读取 PDF 元数据
+
+    probe() 立即返回，文件交给进程池读取页数、加密状态和页面尺寸；
+    结果先放入线程安全队列，由界面线程的定时器每 batch_interval_ms 取出一批，
+    通过 probedSignal(list[dict]) 一次性交给表格模型，避免逐个文件刷新界面。
+    """
+
+    probedSignal = Signal(list)
+
+    def __init__(
+            self,
+            workers=settings.PDF_PROBE_WORKERS,
+            batch_interval_ms=settings.PDF_PROBE_BATCH_INTERVAL_MS,
+            parent=None,
+    ):
+        super().__init__(parent)
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._executor = None
+        self._results = queue.SimpleQueue()
+        self._pending = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(batch_interval_ms)
+        self._timer.timeout.connect(self._flush)
+
+    def probe(self, file_paths):
+        """提交需要读取元数据的文件（在界面线程调用）"""
+        if not file_paths:
+            return
+        if self._executor is None:
+            # 首次使用时才启动进程池
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        for file_path in file_paths:
+            future = self._executor.submit(probe_pdf, file_path)
+            future.add_done_callback(lambda f, p=file_path: self._results.put(self._result_of(f, p)))
+            self._pending += 1
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @staticmethod
+    def _result_of(future, file_path) -> dict:
+        """在进程池回调线程中执行，只做转换，不碰界面对象"""
+        try:
+            return future.result()
+        except Exception as e:
+            logger.exception(f"读取 PDF 元数据失败: {file_path}")
+            return {
+                "filepath": file_path,
+                "page_count": 0,
+                "encrypted": False,
+                "page_sizes": [],
+                "mtime": 0.0,
+                "error": str(e),
+            }
+
+    def _flush(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._pending -= len(batch)
+            self.probedSignal.emit(batch)
+        if self._pending <= 0:
+            self._timer.stop()
+
+    def shutdown(self):
+        """关闭进程池，未开始的任务直接取消"""
+        self._timer.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def probe_result_fields(result: dict) -> dict:
+    """把 probe_pdf 的结果转换为表格行字段"""
+    if result["error"]:
+        status = f"{STATUS_FAILED}: {result['error']}"
+    elif result["encrypted"]:
+        status = STATUS_ENCRYPTED
+    else:
+        status = STATUS_OK
+    page_count = result["page_count"]
+    return {
+        "pagesize": page_count,
+        "file_range": f"1-{page_count}" if page_count else "",
+        "status": status,
+        "page_sizes": result["page_sizes"],
+        "mtime": result["mtime"],
+    }
+
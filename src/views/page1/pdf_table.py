@@ -0,0 +1,499 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 18:40
+# @File    : pdf_table.py
+import html
+import logging
+from dataclasses import dataclass, field
+from operator import attrgetter
+from pathlib import Path
+from typing import Union
+
+from PySide6.QtCore import (
+    Qt,
+    QAbstractTableModel,
+    QEvent,
+    QModelIndex,
+    QObject,
+    QTimer,
+    Signal,
+)
+from PySide6.QtGui import QDropEvent, QDragEnterEvent
+from PySide6.QtWidgets import QWidget
+
+from core import settings
+from utils.page_range import parse_page_range
+from views.page1.pdf_probe import STATUS_OK, STATUS_PROBING, PdfProbeService, probe_result_fields
+
+logger = logging.getLogger("app")
+
+
+@dataclass(slots=True)
+class PdfFileRecord:
+    """表格中的一行（一个 PDF 文件）"""
+
+    filename: str
+    filepath: str
+    pagesize: Union[int, str] = ""  # 页数，元数据读取完成前为空
+    file_range: str = ""
+    status: str = STATUS_PROBING
+    page_sizes: list = field(default_factory=list)
+    mtime: float = 0.0  # 文件修改时间，用于按日期排序
+
+    @classmethod
+    def placeholder(cls, file_path) -> "PdfFileRecord":
+        """元数据读取完成前显示的占位行"""
+        return cls(filename=Path(file_path).name, filepath=file_path)
+
+    def apply_probe(self, result: dict):
+        """回填 probe_pdf 的结果"""
+        for name, value in probe_result_fields(result).items():
+            setattr(self, name, value)
+
+    @property
+    def tooltip(self):
+        if not self.page_sizes:
+            return None
+        sizes = "、".join(f"{w / 72 * 25.4:.0f}×{h / 72 * 25.4:.0f}mm" for w, h in self.page_sizes)
+        return f"{self.filepath}\n页面尺寸: {sizes}"
+
+
+# 列定义：(表头, 显示内容取值函数)，按钮列没有内容
+COLUMNS = (
+    ("文件名", attrgetter("filename")),
+    ("文件路径", attrgetter("filepath")),
+    ("页数", attrgetter("pagesize")),
+    ("范围", attrgetter("file_range")),
+    ("文件状态", attrgetter("status")),
+    ("操作", None),
+)
+COLUMN_RANGE = 3
+COLUMN_STATUS = 4
+COLUMN_BUTTONS = 5
+
+# 排序方式 → 排序键
+SORT_KEYS = {
+    "name": lambda r: r.filename.lower(),
+    "date": attrgetter("mtime"),
+    "pages": lambda r: r.pagesize if isinstance(r.pagesize, int) else -1,
+}
+
+
+def row_runs(rows) -> list:
+    """行号集合 → 按行号排序的连续区间 [(起始行, 结束行)]"""
+    runs = []
+    for row in sorted(rows):
+        if runs and row == runs[-1][1] + 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return [(start, end) for start, end in runs]
+
+
+class PdfFileTableModel(QAbstractTableModel):
+    """
+    PDF 文件列表表格模型（发票表、附件表共用）
+
+    行保存为 PdfFileRecord；data() 按 (角色, 列) 查表取值，不走 if/elif 链；
+    filepath → 行号索引在插入、删除、移动时同步维护，查找和去重都是 O(1)。
+    """
+
+    # 暂存的行实际插入后发出（不含重复而被跳过的文件路径）
+    pendingInsertedSignal = Signal(list)
+
+    def __init__(self, parent: QWidget = None):
+        super().__init__(parent=parent)
+        # 后台导入的行先攒在这里，短时间内到达的合并成一次插入
+        self._pending_inserts = []
+        self._insert_timer = QTimer(self)
+        self._insert_timer.setSingleShot(True)
+        self._insert_timer.setInterval(settings.PDF_TABLE_INSERT_COALESCE_MS)
+        self._insert_timer.timeout.connect(self.flush_pending_inserts)
+        self._rows = {}  # filepath → 行号，插入、删除、移动时同步维护
+        self.files = []  # list[PdfFileRecord]
+        # (角色, 列) → 取值函数
+        self._getters = {
+            (Qt.ItemDataRole.DisplayRole, col): getter
+            for col, (_, getter) in enumerate(COLUMNS)
+            if getter is not None
+        }
+        self._getters[(Qt.ItemDataRole.EditRole, COLUMN_RANGE)] = attrgetter("file_range")
+        self._getters[(Qt.ItemDataRole.ToolTipRole, 0)] = attrgetter("tooltip")
+        self.thumbnails = None
+
+    def set_thumbnail_service(self, service):
+        """
+        在文件名列显示首页缩略图，提示中显示大图
+
+        取值只查缩略图服务的内存缓存，未就绪时由服务在后台渲染，完成后刷新对应行。
+        """
+        self.thumbnails = service
+        self._getters[(Qt.ItemDataRole.DecorationRole, 0)] = self._thumbnail_of
+        self._getters[(Qt.ItemDataRole.ToolTipRole, 0)] = self._thumbnail_tooltip_of
+        service.thumbnailsReady.connect(self.on_thumbnails_ready)
+
+    def _thumbnail_of(self, record: PdfFileRecord):
+        # 元数据读取成功后才渲染，占位行和损坏、加密的文件不显示缩略图
+        if record.status != STATUS_OK:
+            return None
+        return self.thumbnails.pixmap(record.filepath)
+
+    def _thumbnail_tooltip_of(self, record: PdfFileRecord):
+        text = record.tooltip
+        if record.status != STATUS_OK:
+            return text
+        image = self.thumbnails.tooltip_html(record.filepath)
+        if image is None:
+            return text
+        caption = html.escape(text or record.filepath).replace("\n", "<br>")
+        return f"{image}<br>{caption}"
+
+    # 返回表格行数，即文件数量
+    def rowCount(self, parent=QModelIndex()):
+        return len(self.files)
+
+    # 返回表格列数
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)  # 包含 文件名、路径、页数、范围、文件状态、操作
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        getter = self._getters.get((role, index.column()))
+        if getter is None:
+            return None
+        return getter(self.files[index.row()])
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        """编辑页码范围，例如 1-3,7,10-"""
+        if index.isValid():
+            if role == Qt.ItemDataRole.EditRole and index.column() == COLUMN_RANGE:
+                record = self.files[index.row()]
+                if record.status != STATUS_OK:
+                    return False
+                try:
+                    page_range = parse_page_range(value, record.pagesize)
+                except ValueError as e:
+                    logger.warning(f"{record.filename} 页码范围无效: {e}")
+                    return False
+                record.file_range = str(page_range)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+                return True
+        return False
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if index.column() == COLUMN_RANGE:  # 页码范围列可编辑
+            return (
+                    Qt.ItemFlag.ItemIsSelectable
+                    | Qt.ItemFlag.ItemIsEnabled
+                    | Qt.ItemFlag.ItemIsEditable
+            )
+        # 其他列和按钮列不可编辑，但可以选中整行做批量操作
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section][0]
+        # 垂直表头显示行号
+        return str(section + 1)
+
+    # ---- 索引 ----
+    def _reindex(self, start=0, stop=None):
+        """重建 [start, stop) 行的 filepath → 行号索引"""
+        files = self.files
+        for row in range(start, len(files) if stop is None else stop):
+            self._rows[files[row].filepath] = row
+
+    def _refresh_rows(self, start: int, end: int):
+        """刷新指定范围行"""
+        top_left = self.index(start, 0)
+        bottom_right = self.index(end, self.columnCount() - 1)
+        self.dataChanged.emit(top_left, bottom_right, [Qt.ItemDataRole.DisplayRole])
+
+    # ---- 槽函数，用于接收外部信号更新模型 ----
+    def on_delete_row(self, row: int):
+        """删除指定行"""
+        if 0 <= row < len(self.files):
+            self.on_file_deleted(self.files[row].filepath)
+
+    def on_move_up(self, row: int):
+        """上移行"""
+        self.move_rows_by([row], -1)
+
+    def on_move_down(self, row: int):
+        """下移行"""
+        self.move_rows_by([row], 1)
+
+    # ---- 批量操作（选中的多行） ----
+    def move_rows_to_top(self, rows):
+        """选中行按原有顺序移到最前"""
+        rows = sorted(set(rows))
+        self._move_rows(rows, 0)
+
+    def move_rows_to_bottom(self, rows):
+        """选中行按原有顺序移到最后"""
+        rows = sorted(set(rows))
+        self._move_rows(rows, len(self.files) - len(rows))
+
+    def move_rows_by(self, rows, offset: int):
+        """
+        选中行整体移动 offset 行（负数上移），行之间的间隔保持不变，到边界为止
+        """
+        rows = sorted(set(rows))
+        if not rows or not offset:
+            return
+        # 到顶 / 到底就停止
+        offset = max(-rows[0], min(offset, len(self.files) - 1 - rows[-1]))
+        if not offset:
+            return
+        if rows[-1] - rows[0] + 1 == len(rows):
+            self._move_block(rows[0], rows[-1], rows[0] + offset)
+            return
+        # 不连续的选中行：先放到 原位置 + offset，未选中行按原顺序填入剩余位置
+        order = [None] * len(self.files)
+        for row in rows:
+            order[row + offset] = row
+        selected = set(rows)
+        rest = iter(row for row in range(len(self.files)) if row not in selected)
+        order = [row if row is not None else next(rest) for row in order]
+        self._apply_order(order)
+
+    def remove_rows(self, rows):
+        """删除选中行（连续的行合并成一次删除）"""
+        self.on_files_deleted([self.files[row].filepath for row in set(rows) if 0 <= row < len(self.files)])
+
+    def sort_files(self, key="name", descending=False):
+        """按文件名（name）、修改时间（date）或页数（pages）排序，只发一次布局变化通知"""
+        sort_key = SORT_KEYS[key]
+        order = sorted(range(len(self.files)), key=lambda row: sort_key(self.files[row]), reverse=descending)
+        self._apply_order(order)
+
+    def _move_rows(self, rows, dest: int):
+        """把 rows（升序）作为一个整体移动到 dest（移动后第一行的位置）"""
+        if not rows:
+            return
+        if rows[-1] - rows[0] + 1 == len(rows):
+            self._move_block(rows[0], rows[-1], dest)
+            return
+        selected = set(rows)
+        rest = [row for row in range(len(self.files)) if row not in selected]
+        self._apply_order(rest[:dest] + rows + rest[dest:])
+
+    def _move_block(self, first: int, last: int, dest: int):
+        """连续行 [first, last] 移动到 dest，一次 beginMoveRows / endMoveRows"""
+        if dest == first:
+            return
+        # destinationChild 是移动前的坐标：插入到该行之前
+        destination = dest if dest < first else dest + (last - first + 1)
+        if not self.beginMoveRows(QModelIndex(), first, last, QModelIndex(), destination):
+            return
+        block = self.files[first:last + 1]
+        del self.files[first:last + 1]
+        self.files[dest:dest] = block
+        self._reindex(min(first, dest), max(last, dest + len(block) - 1) + 1)
+        self.endMoveRows()
+
+    def _apply_order(self, order):
+        """
+        按新顺序重排所有行（order[i] 为新第 i 行原来的行号）
+
+        只发一次 layoutAboutToBeChanged / layoutChanged，并更新持久索引，
+        选中状态会跟着行一起移动。
+        """
+        if order == list(range(len(self.files))):
+            return
+        self.layoutAboutToBeChanged.emit()
+        new_rows = {old: new for new, old in enumerate(order)}
+        old_indexes = self.persistentIndexList()
+        new_indexes = [self.index(new_rows[index.row()], index.column()) for index in old_indexes]
+        self.files = [self.files[row] for row in order]
+        self._reindex()
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    # 当文件列表加载完成时，刷新整个表格
+    def on_files_loaded(self, files):
+        self._pending_inserts = []
+        self.beginResetModel()  # 通知视图开始重置
+        self._rows = {}
+        self.files = files
+        self._reindex()
+        self.endResetModel()  # 通知视图结束重置
+        if self.thumbnails is not None:
+            self.thumbnails.invalidate([record.filepath for record in files])
+
+    # 当插入新文件时，追加到表格末尾
+    def on_file_inserted(self, record: PdfFileRecord):
+        self.on_files_inserted([record])
+
+    def on_files_inserted(self, records) -> list:
+        """
+        批量追加到表格末尾，整块只通知视图一次
+
+        已在表格中（或本批内重复）的文件会被跳过。
+
+        :return: 实际插入的行
+        """
+        new_records = []
+        seen = set()
+        for record in records:
+            if record.filepath in self._rows or record.filepath in seen:
+                logger.info(f"文件已在列表中，跳过: {record.filepath}")
+                continue
+            seen.add(record.filepath)
+            new_records.append(record)
+        if not new_records:
+            return new_records
+        row = len(self.files)
+        self.beginInsertRows(QModelIndex(), row, row + len(new_records) - 1)
+        self.files.extend(new_records)
+        self._reindex(row)
+        self.endInsertRows()
+        if self.thumbnails is not None:
+            # 删除后重新加入的文件内容可能已经变化，丢弃旧的缩略图和渲染失败记录
+            self.thumbnails.invalidate([record.filepath for record in new_records])
+        return new_records
+
+    def queue_insert(self, records):
+        """
+        后台导入时使用：暂存待插入的行，PDF_TABLE_INSERT_COALESCE_MS 内到达的
+        合并成一次 on_files_inserted，避免逐行触发视图重新布局
+        """
+        self._pending_inserts.extend(records)
+        if not self._insert_timer.isActive():
+            self._insert_timer.start()
+
+    def flush_pending_inserts(self):
+        """立即插入所有暂存的行"""
+        self._insert_timer.stop()
+        records, self._pending_inserts = self._pending_inserts, []
+        inserted = self.on_files_inserted(records)
+        if inserted:
+            self.pendingInsertedSignal.emit([record.filepath for record in inserted])
+
+    def on_files_probing(self, file_paths) -> list:
+        """
+        先插入占位行，元数据由后台读取后通过 on_files_probed 回填
+
+        :return: 实际插入（不重复）的文件路径，只需探测这些文件
+        """
+        inserted = self.on_files_inserted([PdfFileRecord.placeholder(p) for p in file_paths])
+        return [record.filepath for record in inserted]
+
+    def queue_probing(self, file_paths):
+        """
+        后台导入（目录扫描等）使用：占位行经 queue_insert 合并插入，
+        实际插入的文件路径通过 pendingInsertedSignal 发出，再交给后台读取元数据
+        """
+        self.queue_insert([PdfFileRecord.placeholder(p) for p in file_paths])
+
+    def on_files_probed(self, results):
+        """批量回填后台读取的元数据，只发一次 dataChanged"""
+        if self._pending_inserts:
+            self.flush_pending_inserts()
+        rows = []
+        changed = []  # 修改时间变化的文件，缩略图需要重新渲染
+        for result in results:
+            row = self._rows.get(result["filepath"])
+            if row is not None:
+                record = self.files[row]
+                if record.mtime and record.mtime != result["mtime"]:
+                    changed.append(record.filepath)
+                record.apply_probe(result)
+                rows.append(row)
+        if changed and self.thumbnails is not None:
+            self.thumbnails.invalidate(changed)
+        if rows:
+            self._refresh_rows(min(rows), max(rows))
+
+    def on_files_status(self, updates):
+        """
+        更新文件状态列，只为状态真正变化的行发出 dataChanged，连续的行合并成一个区间
+
+        :param updates: [(filepath, 状态)]，不在表中的文件忽略
+        """
+        rows = set()
+        for filepath, status in updates:
+            row = self._rows.get(filepath)
+            if row is not None and self.files[row].status != status:
+                self.files[row].status = status
+                rows.add(row)
+        self._emit_row_runs(rows, COLUMN_STATUS, [Qt.ItemDataRole.DisplayRole])
+
+    def on_thumbnails_ready(self, filepaths):
+        """缩略图就绪，按连续行区间刷新文件名列"""
+        rows = {row for row in map(self._rows.get, filepaths) if row is not None}
+        self._emit_row_runs(rows, 0, [Qt.ItemDataRole.DecorationRole, Qt.ItemDataRole.ToolTipRole])
+
+    def _emit_row_runs(self, rows, column, roles):
+        """rows 中的行按连续区间各发一次 column 列的 dataChanged"""
+        for start, end in row_runs(rows):
+            self.dataChanged.emit(self.index(start, column), self.index(end, column), roles)
+
+    # 当删除文件时，根据 filepath 找到行并删除
+    def on_file_deleted(self, filepath):
+        self.on_files_deleted([filepath])
+
+    def on_files_deleted(self, filepaths):
+        """批量删除：按索引定位行，连续的行合并成一次删除，最后只重建一次索引"""
+        rows = sorted({self._rows[f] for f in filepaths if f in self._rows}, reverse=True)
+        if not rows:
+            return
+        # 从后往前按连续区间删除，前面的行号不受影响
+        start = stop = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == start - 1:
+                start = row
+                continue
+            self.beginRemoveRows(QModelIndex(), start, stop)  # 通知视图开始删除行
+            for record in self.files[start:stop + 1]:
+                del self._rows[record.filepath]
+            del self.files[start:stop + 1]
+            self.endRemoveRows()  # 通知视图删除完成
+            if row is not None:
+                start = stop = row
+        self._reindex(rows[-1])
+
+
+class PdfDropFilter(QObject):
+    """
+    表格视图的拖放事件过滤器（发票表、附件表共用）
+
+    拖入的 PDF 文件先插入占位行，元数据交给后台读取；拖入的目录通过 foldersDropped 发出。
+    """
+
+    # 拖入的目录，由主窗口在后台递归扫描
+    foldersDropped = Signal(list)
+
+    def __init__(self, table_model: PdfFileTableModel, probe_service: PdfProbeService, parent=None):
+        super().__init__(parent)
+        self.table_model = table_model
+        self.probe_service = probe_service
+
+    def eventFilter(self, obj, event: Union[QEvent, QDropEvent, QDragEnterEvent]):
+        if event.type() == QEvent.Type.DragEnter:
+            if event.mimeData().hasUrls():
+                event.acceptProposedAction()
+                return True
+        elif event.type() == QEvent.Type.Drop:
+            file_paths = []
+            folders = []
+            for url in event.mimeData().urls():
+                file_path = Path(url.toLocalFile())
+                if file_path.is_dir():
+                    folders.append(file_path.as_posix())
+                    continue
+                if file_path.suffix.lower() != ".pdf":
+                    continue
+                file_paths.append(file_path.as_posix())
+            # 先显示占位行，元数据在后台读取，拖入大量文件时界面不卡顿
+            self.probe_service.probe(self.table_model.on_files_probing(file_paths))
+            if folders:
+                self.foldersDropped.emit(folders)
+            return True
+        return super().eventFilter(obj, event)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 20:20
+# @File    : pdf_thumbnail.py
+import base64
+import logging
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtGui import QPixmap
+
+from core import settings
+from utils.thumbnail import THUMBNAIL_FORMAT, load_thumbnail
+
+logger = logging.getLogger("app")
+
+
+class ThumbnailMemoryCache:
+    """按占用字节数限制容量的 LRU：{文件路径: (QPixmap, PNG 字节)}"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items = OrderedDict()
+
+    @staticmethod
+    def _size_of(pixmap: QPixmap, data: bytes) -> int:
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8 + len(data)
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, pixmap: QPixmap, data: bytes):
+        self.discard(key)
+        self._items[key] = (pixmap, data)
+        self.nbytes += self._size_of(pixmap, data)
+        while self.nbytes > self.max_bytes and len(self._items) > 1:
+            _, (old_pixmap, old_data) = self._items.popitem(last=False)
+            self.nbytes -= self._size_of(old_pixmap, old_data)
+
+    def discard(self, key):
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.nbytes -= self._size_of(*item)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class PdfThumbnailService(QObject):
+    """
+    PDF 首页缩略图（界面线程使用）
+
+    pixmap() / tooltip_html() 只查内存缓存，没有时登记请求后立即返回 None，
+    不会在 data() 中阻塞界面线程。登记的请求合并到下一轮事件循环统一派发：
+    只派发仍在 watch() 的视图可见范围内的文件，最近请求的优先，
+    在途任务不超过进程数的两倍，滚动过去的行不会占用渲染进程。
+
+    子进程先查磁盘缓存（RenderCache），未命中再低 DPI 渲染；结果经队列回到
+    界面线程，由定时器批量转换为 QPixmap 放入内存 LRU，
+    并通过 thumbnailsReady(list[文件路径]) 通知表格模型刷新对应行。
+    """
+
+    thumbnailsReady = Signal(list)
+
+    def __init__(
+            self,
+            dpi=settings.PDF_THUMBNAIL_DPI,
+            workers=settings.PDF_THUMBNAIL_WORKERS,
+            memory_limit=settings.PDF_THUMBNAIL_MEMORY_LIMIT,
+            cache_dir=settings.PDF_THUMBNAIL_CACHE_DIR,
+            cache_max_bytes=settings.PDF_THUMBNAIL_CACHE_MAX_BYTES,
+            batch_interval_ms=settings.PDF_PROBE_BATCH_INTERVAL_MS,
+            parent=None,
+    ):
+        super().__init__(parent)
+        self.dpi = dpi
+        self.workers = workers or min(2, os.cpu_count() or 1)
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.memory = ThumbnailMemoryCache(memory_limit)
+        self._views = []
+        self._executor = None
+        self._wanted = OrderedDict()  # 等待派发的文件路径，越靠后越新
+        self._inflight = set()
+        self._failed = set()
+        self._results = queue.SimpleQueue()
+        self._dispatch_scheduled = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(batch_interval_ms)
+        self._timer.timeout.connect(self._flush)
+
+    def watch(self, view):
+        """只为该视图（及其他已登记视图）可见的行渲染缩略图"""
+        self._views.append(view)
+
+    # ---- 查询（界面线程，不阻塞） ----
+    def pixmap(self, file_path):
+        item = self.memory.get(file_path)
+        if item is None:
+            self._request(file_path)
+            return None
+        return item[0]
+
+    def tooltip_html(self, file_path):
+        """带缩略图的提示 HTML，缩略图尚未就绪时返回 None"""
+        item = self.memory.get(file_path)
+        if item is None:
+            self._request(file_path)
+            return None
+        encoded = base64.b64encode(item[1]).decode("ascii")
+        return f'<img src="data:image/{THUMBNAIL_FORMAT};base64,{encoded}">'
+
+    def invalidate(self, file_paths):
+        """
+        文件重新加入表格或修改时间变化后，丢弃内存中的缩略图和渲染失败记录，
+        下次显示时重新渲染（磁盘缓存按内容摘要自动失效）
+        """
+        for file_path in file_paths:
+            self.memory.discard(file_path)
+            self._failed.discard(file_path)
+
+    # ---- 派发 ----
+    def _request(self, file_path):
+        if file_path in self._inflight or file_path in self._failed:
+            return
+        self._wanted[file_path] = None
+        self._wanted.move_to_end(file_path)
+        if not self._dispatch_scheduled:
+            # 同一次重绘中登记的请求合并到一起派发
+            self._dispatch_scheduled = True
+            QTimer.singleShot(0, self._dispatch)
+
+    def _visible_paths(self):
+        """已登记视图当前可见行的文件路径，没有登记视图时返回 None（不过滤）"""
+        if not self._views:
+            return None
+        paths = set()
+        for view in self._views:
+            model = view.model()
+            if model is None or not view.isVisible() or not model.rowCount():
+                continue
+            top = view.rowAt(0)
+            bottom = view.rowAt(view.viewport().height() - 1)
+            if top < 0:
+                continue
+            if bottom < 0:
+                bottom = model.rowCount() - 1
+            paths.update(model.files[row].filepath for row in range(top, bottom + 1))
+        return paths
+
+    def _dispatch(self):
+        self._dispatch_scheduled = False
+        visible = self._visible_paths()
+        if visible is not None:
+            for file_path in [p for p in self._wanted if p not in visible]:
+                del self._wanted[file_path]
+        while self._wanted and len(self._inflight) < self.workers * 2:
+            file_path, _ = self._wanted.popitem(last=True)
+            if file_path in self.memory:
+                continue
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._executor.submit(
+                load_thumbnail, file_path, self.dpi, self.cache_dir, self.cache_max_bytes
+            )
+            future.add_done_callback(lambda f, p=file_path: self._results.put((p, self._result_of(f, p))))
+            self._inflight.add(file_path)
+        if self._inflight and not self._timer.isActive():
+            self._timer.start()
+
+    @staticmethod
+    def _result_of(future, file_path):
+        """在进程池回调线程中执行，只做转换，不碰界面对象"""
+        if future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            logger.exception(f"渲染缩略图失败: {file_path}")
+            return None
+
+    def _flush(self):
+        ready = []
+        while True:
+            try:
+                file_path, data = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._inflight.discard(file_path)
+            pixmap = QPixmap()
+            if data is None or not pixmap.loadFromData(data):
+                self._failed.add(file_path)
+                continue
+            self.memory.put(file_path, pixmap, data)
+            ready.append(file_path)
+        if ready:
+            self.thumbnailsReady.emit(ready)
+        if self._wanted:
+            self._dispatch()
+        if not self._inflight:
+            self._timer.stop()
+
+    def shutdown(self):
+        """关闭进程池，未开始的任务直接取消"""
+        self._timer.stop()
+        self._wanted.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
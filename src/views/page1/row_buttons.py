@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 19:30
+# @File    : row_buttons.py
+from PySide6.QtCore import Qt, QEvent, QRect, Signal
+from PySide6.QtGui import QPainter, QPixmap
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+)
+
+from views.page1.pdf_table import COLUMN_BUTTONS
+
+# 按钮条缓存的最大条目数（列宽 × 悬停 / 按下状态的组合），超过后整体清空重建
+_CACHE_LIMIT = 64
+
+
+class RowButtonDelegate(QStyledItemDelegate):
+    """
+    操作列按钮代理：删除 / 上移 / 下移
+
+    三个按钮按 (尺寸, 悬停按钮, 按下按钮, 调色板) 整条绘制到 QPixmap 缓存，
+    paint 时直接贴图，滚动长列表时不再逐行调用 style().drawControl。
+    样式或设备像素比变化时清空缓存。
+    """
+
+    deleteClicked = Signal(int)
+    upClicked = Signal(int)
+    downClicked = Signal(int)
+
+    BUTTONS = ("删除", "上移", "下移")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        if isinstance(parent, QAbstractItemView):
+            # 需要鼠标移动事件才能显示按钮悬停效果
+            parent.setMouseTracking(True)
+            # 在按钮之外松开时收不到 editorEvent，由视口的事件过滤器清除按下状态
+            parent.viewport().installEventFilter(self)
+        self._cache = {}
+        self._cache_env = None  # (样式, 样式名, 设备像素比)，变化时清空缓存
+        self._hover = None  # (行, 按钮序号)
+        self._pressed = None  # (行, 按钮序号)
+
+    @classmethod
+    def button_at(cls, rect: QRect, x: float) -> int:
+        """x 坐标落在第几个按钮上"""
+        w = rect.width() // len(cls.BUTTONS)
+        return min(int(x - rect.left()) // w, len(cls.BUTTONS) - 1) if w > 0 else 0
+
+    @classmethod
+    def button_rects(cls, rect: QRect):
+        w = rect.width() // len(cls.BUTTONS)
+        last = len(cls.BUTTONS) - 1
+        # 最后一个按钮占满剩余宽度，与原来的 rect.adjusted 划分一致
+        return [
+            QRect(rect.left() + i * w, rect.top(), rect.width() - i * w if i == last else w, rect.height())
+            for i in range(len(cls.BUTTONS))
+        ]
+
+    def paint(self, painter, option, index):
+        if index.column() != COLUMN_BUTTONS:
+            super().paint(painter, option, index)
+            return
+        rect = option.rect
+        if rect.isEmpty():
+            return
+        style = option.widget.style() if option.widget else QApplication.style()
+        dpr = painter.device().devicePixelRatioF()
+        env = (id(style), style.name(), dpr)
+        if env != self._cache_env:
+            self._cache.clear()
+            self._cache_env = env
+
+        row = index.row()
+        # 只有鼠标仍在本单元格内时才显示悬停，移出后视图会重绘并清掉 State_MouseOver
+        hover = self._hover[1] if (
+                self._hover and self._hover[0] == row and option.state & QStyle.StateFlag.State_MouseOver
+        ) else -1
+        # 在其他单元格松开鼠标时收不到事件，用当前鼠标按键状态兜底
+        pressed = self._pressed[1] if (
+                self._pressed and self._pressed[0] == row
+                and QApplication.mouseButtons() & Qt.MouseButton.LeftButton
+        ) else -1
+        enabled = bool(option.state & QStyle.StateFlag.State_Enabled)
+        key = (rect.width(), rect.height(), hover, pressed, enabled, option.palette.cacheKey(), option.font.key())
+        pixmap = self._cache.get(key)
+        if pixmap is None:
+            if len(self._cache) >= _CACHE_LIMIT:
+                self._cache.clear()
+            pixmap = self._render_strip(style, option, dpr, hover, pressed, enabled)
+            self._cache[key] = pixmap
+        painter.drawPixmap(rect.topLeft(), pixmap)
+
+    def _render_strip(self, style, option, dpr, hover, pressed, enabled) -> QPixmap:
+        """把整条按钮绘制到透明 QPixmap 上"""
+        rect = QRect(0, 0, option.rect.width(), option.rect.height())
+        pixmap = QPixmap(rect.size() * dpr)
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setFont(option.font)
+        try:
+            for i, (text, btn_rect) in enumerate(zip(self.BUTTONS, self.button_rects(rect))):
+                btn = QStyleOptionButton()
+                btn.text = text
+                btn.rect = btn_rect
+                btn.palette = option.palette
+                btn.fontMetrics = option.fontMetrics
+                btn.direction = option.direction
+                state = QStyle.StateFlag.State_Enabled if enabled else QStyle.StateFlag.State_None
+                if i == pressed:
+                    state |= QStyle.StateFlag.State_Sunken
+                else:
+                    state |= QStyle.StateFlag.State_Raised
+                if i == hover:
+                    state |= QStyle.StateFlag.State_MouseOver
+                btn.state = state
+                style.drawControl(QStyle.ControlElement.CE_PushButton, btn, painter, option.widget)
+        finally:
+            painter.end()
+        return pixmap
+
+    def _update_row(self, state):
+        """重绘 state 所在行的按钮单元格"""
+        view = self.parent()
+        if state is None or not isinstance(view, QAbstractItemView) or view.model() is None:
+            return
+        view.update(view.model().index(state[0], COLUMN_BUTTONS))
+
+    def _set_state(self, name, value):
+        old = getattr(self, name)
+        if old == value:
+            return
+        setattr(self, name, value)
+        self._update_row(old)
+        self._update_row(value)
+
+    def eventFilter(self, watched, event):
+        """
+        视口的鼠标事件过滤：左键按下时丢弃上一次的按下状态；左键在按下的单元格之外松开时
+        （其他列、其他行或表格空白处）视图不会把松开事件交给代理，在这里取消这次点击
+        """
+        event_type = event.type()
+        if (
+                event_type in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease)
+                and event.button() == Qt.MouseButton.LeftButton
+                and self._pressed is not None
+        ):
+            index = self.parent().indexAt(event.position().toPoint())
+            if (
+                    event_type == QEvent.Type.MouseButtonPress
+                    or index.row() != self._pressed[0]
+                    or index.column() != COLUMN_BUTTONS
+            ):
+                self._set_state("_pressed", None)
+        return super().eventFilter(watched, event)
+
+    def editorEvent(self, event, model, option, index):
+        if index.column() != COLUMN_BUTTONS:
+            return super().editorEvent(event, model, option, index)
+        event_type = event.type()
+        if event_type in (event.Type.MouseMove, event.Type.MouseButtonPress, event.Type.MouseButtonRelease):
+            button = self.button_at(option.rect, event.position().x())
+            current = (index.row(), button)
+            self._set_state("_hover", current)
+            if event_type == event.Type.MouseButtonPress and event.button() == Qt.MouseButton.LeftButton:
+                self._set_state("_pressed", current)
+            elif event_type == event.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+                pressed = self._pressed
+                self._set_state("_pressed", None)
+                # 左键在同一个按钮上按下并松开才算点击（右键松开交给右键菜单）
+                if pressed is not None and pressed == current:
+                    (self.deleteClicked, self.upClicked, self.downClicked)[button].emit(index.row())
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/18 22:10
+# @File    : status_coalescer.py
+import threading
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from core import settings
+
+
+class StatusUpdateCoalescer(QObject):
+    """
+    后台任务 → 表格状态列的更新合并器
+
+    post() 可在任意线程调用，只在加锁的字典里记下每个文件的最新状态，不碰界面对象；
+    界面线程按固定帧率（fps）取出一批，交给各表格模型的 on_files_status，
+    由模型只为状态真正变化的行、按连续区间发出 dataChanged。
+    同一帧内同一文件的多次更新只保留最后一次，空闲时不占用定时器。
+    """
+
+    # 缓冲区由空变为非空时发出，跨线程排队唤醒界面线程
+    _wake = Signal()
+
+    def __init__(self, models, fps=settings.PDF_STATUS_UPDATE_FPS, parent=None):
+        super().__init__(parent)
+        self.models = list(models)
+        self.interval = 1 / fps
+        self._lock = threading.Lock()
+        self._buffer = {}  # filepath → 最新状态
+        self._last_flush = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._schedule)
+
+    def post(self, filepath, status):
+        """记录一个状态更新（线程安全）"""
+        with self._lock:
+            wake = not self._buffer
+            self._buffer[filepath] = status
+        if wake:
+            self._wake.emit()
+
+    def _schedule(self):
+        """安排下一帧刷新：距上次刷新不足一帧时等到下一帧，否则立即刷新"""
+        if self._timer.isActive():
+            return
+        wait = self._last_flush + self.interval - time.monotonic()
+        self._timer.start(max(0, round(wait * 1000)))
+
+    def flush(self):
+        """立即把缓冲的更新应用到表格模型（界面线程调用）"""
+        self._timer.stop()
+        with self._lock:
+            updates, self._buffer = self._buffer, {}
+        self._last_flush = time.monotonic()
+        if not updates:
+            return
+        items = list(updates.items())
+        for model in self.models:
+            model.on_files_status(items)
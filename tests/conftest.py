@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 10:00
+# @File    : conftest.py
+import sys
+from pathlib import Path
+
+# 源码按 src 为根目录导入（与 main.py / cli.py 运行时一致）
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 12:30
+# @File    : test_event_bus.py
+import threading
+import time
+
+import pytest
+
+from controllers.event_bus import (
+    DELIVERY_POOL,
+    DELIVERY_SYNC,
+    DELIVERY_THREAD,
+    POLICY_BLOCK,
+    EventBus,
+    make_topic,
+)
+
+
+@pytest.fixture
+def bus():
+    bus = EventBus()
+    yield bus
+    bus.close()
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.mark.parametrize("pattern, topic, expected", [
+    ("product.101.stock", "product.101.stock", True),
+    ("product.*.stock", "product.102.stock", True),
+    ("product.*.stock", "product.102.price", False),
+    ("product.*", "product.101.stock", False),
+    ("product.#", "product", True),
+    ("product.#", "product.101.stock", True),
+    ("#", "anything.at.all", True),
+    ("product.101.#", "product.102.stock", False),
+])
+def test_topic_matching(bus, pattern, topic, expected):
+    subscription = bus.subscribe(pattern, lambda e: None, delivery=DELIVERY_SYNC)
+    assert (subscription in bus.match(topic)) is expected
+
+
+def test_invalid_patterns(bus):
+    with pytest.raises(ValueError):
+        bus.subscribe("a.#.b", print)
+    with pytest.raises(ValueError):
+        bus.publish("a.*")
+
+
+def test_overlapping_patterns_deliver_once(bus):
+    got = []
+    bus.subscribe("a", got.append, delivery=DELIVERY_SYNC)
+    subscription = bus.subscribe("a.#", got.append, delivery=DELIVERY_SYNC)
+    assert bus.match("a").count(subscription) == 1
+    assert bus.publish(make_topic("a")) == 2
+
+
+@pytest.mark.parametrize("delivery", [DELIVERY_THREAD, DELIVERY_POOL])
+def test_async_delivery_keeps_order(bus, delivery):
+    got = []
+    bus.subscribe("t", lambda e: got.append(e.payload), delivery=delivery)
+    for i in range(200):
+        bus.publish("t", i)
+    assert wait_until(lambda: len(got) == 200)
+    assert got == list(range(200))
+
+
+def test_drop_oldest_policy(bus):
+    release = threading.Event()
+    got = []
+    subscription = bus.subscribe(
+        "t", lambda e: (release.wait(), got.append(e.payload)), max_queue=3, delivery=DELIVERY_THREAD
+    )
+    for i in range(10):
+        bus.publish("t", i)
+    release.set()
+    assert wait_until(lambda: subscription.pending() == 0 and len(got) + subscription.dropped == 10)
+    assert got[-3:] == [7, 8, 9]
+
+
+def test_block_policy_applies_backpressure(bus):
+    got = []
+    bus.subscribe("t", lambda e: (time.sleep(0.01), got.append(e.payload)), max_queue=2,
+                  policy=POLICY_BLOCK, delivery=DELIVERY_THREAD)
+    for i in range(20):
+        bus.publish("t", i)
+    assert wait_until(lambda: len(got) == 20)
+    assert got == list(range(20))
+
+
+def test_block_policy_timeout_drops(bus):
+    release = threading.Event()
+    subscription = bus.subscribe("t", lambda e: release.wait(), max_queue=1, policy=POLICY_BLOCK,
+                                 delivery=DELIVERY_THREAD)
+    bus.publish("t", 0)
+    assert wait_until(lambda: subscription.pending() == 0)
+    bus.publish("t", 1)
+    assert bus.publish("t", 2, timeout=0.05) == 0
+    assert subscription.dropped == 1
+    release.set()
+
+
+def test_batch_delivery(bus):
+    release = threading.Event()
+    batches = []
+    bus.subscribe("t", lambda events: (release.wait(), batches.append([e.payload for e in events])),
+                  batch_size=10, delivery=DELIVERY_THREAD)
+    for i in range(25):
+        bus.publish("t", i)
+    release.set()
+    assert wait_until(lambda: sum(map(len, batches)) == 25)
+    assert all(len(batch) <= 10 for batch in batches)
+    assert [p for batch in batches for p in batch] == list(range(25))
+
+
+def test_callback_errors_are_counted(bus):
+    subscription = bus.subscribe("t", lambda e: 1 / 0, delivery=DELIVERY_SYNC)
+    bus.publish("t")
+    assert subscription.errors == 1
+
+
+def test_unsubscribe_prunes_trie(bus):
+    subscription = bus.subscribe("a.b.c", print, delivery=DELIVERY_SYNC)
+    subscription.unsubscribe()
+    assert bus.publish("a.b.c") == 0
+    assert not bus._root.children
+
+
+def test_snapshot_lists_every_subscription(bus):
+    class Handler:
+        def on_event(self, event):
+            pass
+
+    handler = Handler()
+    for pattern in ("a", "b"):
+        bus.subscribe(pattern, handler.on_event, delivery=DELIVERY_SYNC)
+        bus.subscribe(pattern, lambda e: None, delivery=DELIVERY_SYNC)
+    subscriptions = bus.snapshot()["subscriptions"]
+    assert len(subscriptions) == 4
+    assert [s["pattern"] for s in subscriptions] == ["a", "a", "b", "b"]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 15:40
+# @File    : test_merge_pipeline.py
+import fitz
+import pytest
+from pypdf import PdfReader
+
+from utils.merge_pipeline import MergeCancelled, _expand_invoice_pages, merge_invoice_pack
+from utils.render_cache import RenderCache
+
+
+def make_pdf(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page(width=300, height=200)
+        page.insert_text((20, 100), text, fontsize=24)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def distinct_images(path) -> int:
+    doc = fitz.open(path)
+    try:
+        return len({img[0] for page in doc for img in page.get_images(full=True)})
+    finally:
+        doc.close()
+
+
+def test_expand_invoice_pages():
+    assert _expand_invoice_pages(["a.pdf", ("b.pdf", [2, 0]), ("c.pdf", 1), ("d.pdf", None)]) == [
+        ("a.pdf", 0), ("b.pdf", 2), ("b.pdf", 0), ("c.pdf", 1), ("d.pdf", 0),
+    ]
+
+
+def test_vector_pack_with_selected_attachment_pages(tmp_path):
+    invoices = [make_pdf(tmp_path / f"inv{i}.pdf", [f"INVOICE {i}"]) for i in range(3)]
+    attachment = make_pdf(tmp_path / "att.pdf", ["ATT 0", "ATT 1", "ATT 2"])
+    out = tmp_path / "out.pdf"
+    stats = merge_invoice_pack(invoices, [(attachment, [1])], out)
+
+    assert stats["pages"] == 3
+    assert len(PdfReader(out).pages) == 3
+    doc = fitz.open(out)
+    texts = [page.get_text() for page in doc]
+    doc.close()
+    assert "INVOICE 0" in texts[0] and "INVOICE 1" in texts[0]
+    assert "INVOICE 2" in texts[1]
+    assert "ATT 1" in texts[2] and "ATT 0" not in texts[2]
+
+
+@pytest.mark.parametrize("image_codec", ["jpeg", "flate"])
+def test_raster_pack_stores_duplicated_invoice_once(tmp_path, image_codec):
+    invoice = make_pdf(tmp_path / "inv.pdf", ["SAME"])
+    out = tmp_path / "out.pdf"
+    stats = merge_invoice_pack([invoice] * 4, [], out, layout="raster", dpi=72, workers=1, image_codec=image_codec)
+
+    assert stats["pages"] == 2
+    assert stats["images"] == 1
+    assert stats["images_deduped"] == 1
+    assert len(PdfReader(out).pages) == 2
+    assert distinct_images(out) == 1
+
+
+def test_raster_pack_uses_render_cache(tmp_path):
+    invoices = [make_pdf(tmp_path / f"inv{i}.pdf", [f"INVOICE {i}"]) for i in range(2)]
+    cache = RenderCache(tmp_path / "cache")
+    try:
+        first = merge_invoice_pack(invoices, [], tmp_path / "a.pdf", layout="raster", dpi=72, workers=1, cache=cache)
+        second = merge_invoice_pack(invoices, [], tmp_path / "b.pdf", layout="raster", dpi=72, workers=1, cache=cache)
+    finally:
+        cache.close()
+    assert (first["cache_hits"], first["cache_misses"]) == (0, 2)
+    assert (second["cache_hits"], second["cache_misses"]) == (2, 0)
+    assert distinct_images(tmp_path / "b.pdf") == 2
+
+
+@pytest.mark.parametrize("layout", ["vector", "raster"])
+def test_cancel_removes_output(tmp_path, layout):
+    invoices = [make_pdf(tmp_path / f"inv{i}.pdf", [f"INVOICE {i}"]) for i in range(4)]
+    out = tmp_path / "out.pdf"
+    with pytest.raises(MergeCancelled):
+        merge_invoice_pack(invoices, [], out, layout=layout, dpi=72, workers=1, should_stop=lambda: True)
+    assert not out.exists()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 11:45
+# @File    : test_monitor.py
+import asyncio
+import threading
+
+import pytest
+
+from controllers.event_bus import DELIVERY_THREAD, POLICY_BLOCK, EventBus
+from controllers.monitor import EventBusBridge, MonitorEngine, MonitorTarget
+
+
+async def run_for(engine, seconds):
+    runner = asyncio.create_task(engine.run())
+    await asyncio.sleep(seconds)
+    engine.stop()
+    await runner
+
+
+def test_backoff_delay_does_not_overflow():
+    target = MonitorTarget("t", fetch=lambda: None, interval=1.0, backoff_max=60.0)
+    for errors, expected in [(1, 1.0), (3, 4.0), (7, 60.0), (5000, 60.0)]:
+        target.consecutive_errors = errors
+        assert MonitorEngine._backoff_delay(target) == expected
+
+
+@pytest.mark.parametrize("interval", [0, -1.0, float("nan")])
+def test_non_positive_interval_is_rejected(interval):
+    with pytest.raises(ValueError):
+        MonitorTarget("t", fetch=lambda: None, interval=interval)
+
+
+def test_add_rejects_interval_changed_to_zero():
+    target = MonitorTarget("t", fetch=lambda: None, interval=1.0)
+    target.interval = 0
+    with pytest.raises(ValueError):
+        MonitorEngine().add(target)
+
+
+def test_failing_target_keeps_polling():
+    async def fetch():
+        raise RuntimeError("down")
+
+    engine = MonitorEngine(stagger=False)
+    target = MonitorTarget("t", fetch, interval=0.01, backoff_max=0.01)
+    target.consecutive_errors = 5000
+    engine.add(target)
+    asyncio.run(run_for(engine, 0.2))
+    assert target.runs >= 3
+    assert target.consecutive_errors > 5000
+
+
+def test_broken_sink_does_not_stop_polling():
+    async def fetch():
+        return 1
+
+    def sink(result):
+        raise RuntimeError("sink")
+
+    engine = MonitorEngine(stagger=False, sinks=[sink])
+    target = MonitorTarget("t", fetch, interval=0.01)
+    engine.add(target)
+    asyncio.run(run_for(engine, 0.15))
+    assert target.runs >= 3
+
+
+def test_blocking_bus_subscriber_does_not_stall_other_targets():
+    async def fetch():
+        return 1
+
+    release = threading.Event()
+    bus = EventBus()
+    bus.subscribe("monitor.slow", lambda e: release.wait(), max_queue=1, policy=POLICY_BLOCK,
+                  delivery=DELIVERY_THREAD)
+    engine = MonitorEngine(stagger=False, sinks=[EventBusBridge(bus)])
+    slow = MonitorTarget("slow", fetch, interval=0.01)
+    fast = MonitorTarget("fast", fetch, interval=0.01)
+    engine.add(slow)
+    engine.add(fast)
+    asyncio.run(run_for(engine, 0.3))
+    release.set()
+    bus.close()
+    # 慢订阅者一直阻塞时，其他目标照常轮询，发布给它的结果计为丢弃
+    assert fast.runs >= 10
+    assert slow.runs >= 10
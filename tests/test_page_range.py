@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 13:00
+# @File    : test_page_range.py
+import pytest
+
+from utils.page_range import PageRange, parse_page_range
+
+
+@pytest.mark.parametrize("expr, pages", [
+    ("1-3,7,10-", [0, 1, 2, 6, 9, 10, 11]),
+    ("-2", [0, 1]),
+    ("5", [4]),
+    ("1 - 2 ， 4", [0, 1, 3]),
+    ("3-5,1-4", [0, 1, 2, 3, 4]),
+    ("1-2,3-4", [0, 1, 2, 3]),
+    ("2,2,2", [1]),
+    ("1,,3", [0, 2]),
+])
+def test_parse(expr, pages):
+    assert list(parse_page_range(expr, 12)) == pages
+
+
+@pytest.mark.parametrize("expr", [None, "", "  ", "all", "ALL", "全部"])
+def test_all_pages(expr):
+    assert parse_page_range(expr, 4) == PageRange.all(4)
+    assert list(parse_page_range(expr, 4)) == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("expr", ["0", "13", "5-3", "1-13", "a", "1-2-3", ",", "1.5"])
+def test_invalid(expr):
+    with pytest.raises(ValueError):
+        parse_page_range(expr, 12)
+
+
+def test_spans_are_merged_and_compact():
+    page_range = parse_page_range("1-300", 300)
+    assert page_range.spans == [(0, 300)]
+    assert len(page_range) == 300
+    assert parse_page_range("1-3,4-6,9", 10).spans == [(0, 6), (8, 9)]
+
+
+def test_contains():
+    page_range = parse_page_range("2-4,8", 10)
+    assert [p for p in range(10) if p in page_range] == [1, 2, 3, 7]
+
+
+def test_str_round_trip():
+    page_range = parse_page_range("10-12,1-3,7", 12)
+    assert str(page_range) == "1-3,7,10-12"
+    assert parse_page_range(str(page_range), 12) == page_range
+
+
+def test_all_of_empty_document():
+    assert list(PageRange.all(0)) == []
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 14:00
+# @File    : test_pdf_optimizer.py
+import io
+
+import fitz
+import numpy as np
+import pytest
+from PIL import Image
+
+from utils.pdf_optimizer import optimize_pdf
+
+TOC = [[1, "第一章", 1], [2, "1.1 小节", 2], [1, "第二章", 3]]
+METADATA = {"title": "测试文档", "author": "wt", "subject": "优化"}
+
+
+def make_source(path, page_count=3):
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page(width=300, height=400)
+        page.insert_text((50, 50), f"Page {i + 1}")
+    doc.set_toc(TOC)
+    doc.set_metadata(METADATA)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def test_keeps_outline_and_metadata(tmp_path):
+    source = make_source(tmp_path / "in.pdf")
+    output = tmp_path / "out.pdf"
+    optimize_pdf(source, output, preset="archive")
+    with fitz.open(output) as doc:
+        assert doc.page_count == 3
+        assert doc.get_toc() == TOC
+        for key, value in METADATA.items():
+            assert doc.metadata[key] == value
+
+
+def make_image_pdf(path, page_count=2):
+    """每页一张 1200x1200 的图片，显示为 2 英寸见方（约 600 DPI）"""
+    rng = np.random.default_rng(0)
+    base = np.linspace(0, 255, 1200, dtype=np.float32)
+    pixels = (base[None, :, None] + rng.normal(0, 20, (1200, 1200, 3))).clip(0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="PNG")
+    doc = fitz.open()
+    for _ in range(page_count):
+        page = doc.new_page(width=300, height=400)
+        page.insert_image(fitz.Rect(50, 50, 194, 194), stream=buf.getvalue())
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def image_widths(path):
+    with fitz.open(path) as doc:
+        return sorted({img[2] for page in doc for img in page.get_images(full=True)})
+
+
+@pytest.mark.parametrize("preset", ["screen", "print", "archive"])
+def test_presets_keep_pages(tmp_path, preset):
+    source = make_image_pdf(tmp_path / "in.pdf")
+    output = tmp_path / "out.pdf"
+    stats = optimize_pdf(source, output, preset=preset)
+    with fitz.open(output) as doc:
+        assert doc.page_count == 2
+        assert doc[0].get_pixmap(dpi=36).width > 0
+    assert stats["bytes_after"] == output.stat().st_size
+
+
+def test_screen_downsamples_and_shrinks(tmp_path):
+    source = make_image_pdf(tmp_path / "in.pdf")
+    output = tmp_path / "out.pdf"
+    stats = optimize_pdf(source, output, preset="screen")
+    assert stats["images_downsampled"] == 1  # 两页共用的图片只处理一次
+    assert output.stat().st_size < source.stat().st_size / 2
+    # 2 英寸显示宽度按 96 DPI 降采样
+    assert image_widths(output) == [192]
+    assert image_widths(source) == [1200]
+
+
+def test_archive_leaves_images_alone(tmp_path):
+    source = make_image_pdf(tmp_path / "in.pdf")
+    output = tmp_path / "out.pdf"
+    stats = optimize_pdf(source, output, preset="archive")
+    assert stats["images_recompressed"] == 0
+    assert image_widths(output) == [1200]
+
+
+def test_in_place_and_cancel(tmp_path):
+    source = make_image_pdf(tmp_path / "in.pdf")
+    before = source.read_bytes()
+
+    def cancel(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        optimize_pdf(source, source, preset="screen", on_progress=cancel)
+    assert source.read_bytes() == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["in.pdf"]
+
+    optimize_pdf(source, source, preset="screen")
+    with fitz.open(source) as doc:
+        assert doc.page_count == 2
+
+
+def test_unknown_preset(tmp_path):
+    with pytest.raises(ValueError):
+        optimize_pdf(make_source(tmp_path / "in.pdf"), tmp_path / "out.pdf", preset="tiny")
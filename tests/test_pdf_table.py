@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 16:20
+# @File    : test_pdf_table.py
+import time
+
+import pytest
+from PySide6.QtCore import QCoreApplication, QPersistentModelIndex
+
+from views.page1.pdf_probe import STATUS_OK, STATUS_PROBING
+from views.page1.pdf_table import COLUMN_STATUS, PdfFileRecord, PdfFileTableModel, row_runs
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+class Recorder:
+    """记录模型发出的结构变化信号"""
+
+    def __init__(self, model):
+        self.events = []
+        model.rowsInserted.connect(lambda parent, first, last: self.events.append(("insert", first, last)))
+        model.rowsRemoved.connect(lambda parent, first, last: self.events.append(("remove", first, last)))
+        model.rowsMoved.connect(
+            lambda parent, first, last, dest, row: self.events.append(("move", first, last, row))
+        )
+        model.layoutChanged.connect(lambda *args: self.events.append(("layout",)))
+        model.dataChanged.connect(
+            lambda tl, br, roles: self.events.append(("data", tl.row(), br.row(), tl.column(), br.column()))
+        )
+
+
+def names(model) -> list:
+    return [record.filename for record in model.files]
+
+
+def assert_index_consistent(model):
+    assert model._rows == {record.filepath: row for row, record in enumerate(model.files)}
+
+
+def make_model(app, names):
+    model = PdfFileTableModel()
+    model.on_files_inserted([PdfFileRecord.placeholder(f"/pdf/{name}") for name in names])
+    assert_index_consistent(model)
+    return model, Recorder(model)
+
+
+def test_row_runs():
+    assert row_runs([]) == []
+    assert row_runs({5, 1, 2, 3, 7, 8}) == [(1, 3), (5, 5), (7, 8)]
+
+
+def test_batched_insert_skips_duplicates(app):
+    model, recorder = make_model(app, ["a", "b"])
+    inserted = model.on_files_inserted(
+        [PdfFileRecord.placeholder(p) for p in ["/pdf/c", "/pdf/a", "/pdf/d", "/pdf/c"]]
+    )
+    assert [record.filepath for record in inserted] == ["/pdf/c", "/pdf/d"]
+    assert names(model) == ["a", "b", "c", "d"]
+    assert recorder.events == [("insert", 2, 3)]
+    assert_index_consistent(model)
+
+
+def test_on_files_probing_returns_new_paths_only(app):
+    model, _ = make_model(app, ["a"])
+    assert model.on_files_probing(["/pdf/a", "/pdf/b"]) == ["/pdf/b"]
+    assert model.files[1].status == STATUS_PROBING
+    assert_index_consistent(model)
+
+
+def test_queue_insert_coalesces_into_one_insert(app):
+    model, recorder = make_model(app, ["a"])
+    emitted = []
+    model.pendingInsertedSignal.connect(emitted.append)
+    model.queue_probing(["/pdf/b", "/pdf/c"])
+    model.queue_probing(["/pdf/a", "/pdf/d"])
+    assert model.rowCount() == 1
+
+    deadline = time.monotonic() + 5
+    while model._pending_inserts and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    assert names(model) == ["a", "b", "c", "d"]
+    assert recorder.events == [("insert", 1, 3)]
+    assert emitted == [["/pdf/b", "/pdf/c", "/pdf/d"]]
+    assert_index_consistent(model)
+
+
+def test_probed_results_flush_pending_rows_first(app):
+    model, _ = make_model(app, [])
+    model.queue_probing(["/pdf/a"])
+    model.on_files_probed([{
+        "filepath": "/pdf/a", "page_count": 3, "encrypted": False,
+        "page_sizes": [(595, 842)], "mtime": 1.0, "error": None,
+    }])
+    record = model.files[0]
+    assert (record.pagesize, record.file_range, record.status) == (3, "1-3", STATUS_OK)
+    assert_index_consistent(model)
+
+
+def test_remove_rows_merges_runs(app):
+    model, recorder = make_model(app, "abcdefg")
+    model.remove_rows([1, 2, 4, 6, 99])
+    assert names(model) == ["a", "d", "f"]
+    assert recorder.events == [("remove", 6, 6), ("remove", 4, 4), ("remove", 1, 2)]
+    assert_index_consistent(model)
+    model.on_delete_row(0)
+    model.on_file_deleted("/pdf/missing")
+    assert names(model) == ["d", "f"]
+    assert_index_consistent(model)
+
+
+def test_move_contiguous_block(app):
+    model, recorder = make_model(app, "abcdef")
+    model.move_rows_by([1, 2], 2)
+    assert names(model) == ["a", "d", "e", "b", "c", "f"]
+    assert recorder.events == [("move", 1, 2, 5)]
+    assert_index_consistent(model)
+
+    model.move_rows_by([3, 4], -10)  # 到顶为止
+    assert names(model) == ["b", "c", "a", "d", "e", "f"]
+    assert_index_consistent(model)
+
+    recorder.events.clear()
+    model.move_rows_by([0], -1)
+    model.on_move_down(5)
+    assert recorder.events == []
+
+
+def test_move_scattered_rows_keeps_gaps(app):
+    model, recorder = make_model(app, "abcdef")
+    selected = QPersistentModelIndex(model.index(3, 0))
+    model.move_rows_by([1, 3], 2)
+    assert names(model) == ["a", "c", "e", "b", "f", "d"]
+    assert recorder.events == [("layout",)]
+    assert selected.row() == 5
+    assert_index_consistent(model)
+
+
+def test_move_to_top_and_bottom(app):
+    model, _ = make_model(app, "abcdef")
+    model.move_rows_to_top([4, 2])
+    assert names(model) == ["c", "e", "a", "b", "d", "f"]
+    assert_index_consistent(model)
+    model.move_rows_to_bottom([0, 1])
+    assert names(model) == ["a", "b", "d", "f", "c", "e"]
+    assert_index_consistent(model)
+
+
+def test_sort_files(app):
+    model, recorder = make_model(app, ["B", "c", "a"])
+    for record, pages in zip(model.files, [2, 10, ""]):
+        record.pagesize = pages
+    model.sort_files("name")
+    assert names(model) == ["a", "B", "c"]
+    assert_index_consistent(model)
+    model.sort_files("pages", descending=True)
+    assert names(model) == ["c", "B", "a"]
+    assert recorder.events == [("layout",), ("layout",)]
+    assert_index_consistent(model)
+
+
+def test_status_updates_emit_row_runs(app):
+    model, recorder = make_model(app, "abcdef")
+    model.files[3].status = "完成"
+    model.on_files_status([
+        ("/pdf/a", "完成"), ("/pdf/b", "完成"), ("/pdf/d", "完成"),
+        ("/pdf/e", "完成"), ("/pdf/missing", "完成"),
+    ])
+    # d 的状态没有变化，不刷新；其余连续行合并
+    assert recorder.events == [
+        ("data", 0, 1, COLUMN_STATUS, COLUMN_STATUS),
+        ("data", 4, 4, COLUMN_STATUS, COLUMN_STATUS),
+    ]
+    assert [record.status for record in model.files] == ["完成"] * 2 + [STATUS_PROBING] + ["完成"] * 2 + [STATUS_PROBING]
+    assert_index_consistent(model)
+
+
+class FakeThumbnails:
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, file_paths):
+        self.invalidated.extend(file_paths)
+
+
+def probe_result(filepath, mtime):
+    return {
+        "filepath": filepath, "page_count": 1, "encrypted": False,
+        "page_sizes": [(595, 842)], "mtime": mtime, "error": None,
+    }
+
+
+def test_thumbnails_invalidated_on_readd_and_mtime_change(app):
+    model, _ = make_model(app, [])
+    model.thumbnails = thumbnails = FakeThumbnails()
+    model.on_files_probing(["/pdf/a", "/pdf/b"])
+    assert thumbnails.invalidated == ["/pdf/a", "/pdf/b"]
+
+    thumbnails.invalidated.clear()
+    model.on_files_probed([probe_result("/pdf/a", 1.0), probe_result("/pdf/b", 1.0)])
+    model.on_files_probed([probe_result("/pdf/a", 1.0), probe_result("/pdf/b", 2.0)])
+    assert thumbnails.invalidated == ["/pdf/b"]
+
+    thumbnails.invalidated.clear()
+    model.on_file_deleted("/pdf/a")
+    model.on_files_probing(["/pdf/a"])
+    assert thumbnails.invalidated == ["/pdf/a"]
+    assert_index_consistent(model)
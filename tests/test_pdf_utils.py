@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 15:10
+# @File    : test_pdf_utils.py
+import io
+import pickle
+
+import fitz
+import pytest
+import reportlab
+from PIL import Image, JpegImagePlugin
+
+from utils.pdf_utils import RenderedPage, merge_invoices_top_bottom
+
+
+def make_jpeg(color="red", size=(60, 40)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def page_images(pdf_bytes, page_num=0):
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [doc.extract_image(img[0])["image"] for img in doc[page_num].get_images(full=True)]
+    finally:
+        doc.close()
+
+
+def test_reportlab_version_is_pinned():
+    # _JpegImageReader 依赖该版本 Canvas.drawImage 的内部实现，升级时需重新确认
+    assert reportlab.Version == "4.2.2"
+
+
+def test_jpeg_is_embedded_without_decoding(monkeypatch):
+    data = make_jpeg()
+
+    def fail_load(self):
+        raise AssertionError("JPEG 被解码")
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "load", fail_load)
+    out = io.BytesIO()
+    merge_invoices_top_bottom([io.BytesIO(data)], out)
+    monkeypatch.undo()
+    assert page_images(out.getvalue()) == [data]
+
+
+def test_same_jpeg_on_one_page_is_stored_once():
+    data = make_jpeg()
+    out = io.BytesIO()
+    merge_invoices_top_bottom([io.BytesIO(data), io.BytesIO(data)], out)
+    assert page_images(out.getvalue()) == [data]
+
+
+def test_different_jpegs_are_not_merged():
+    red, blue = make_jpeg("red"), make_jpeg("blue")
+    out = io.BytesIO()
+    merge_invoices_top_bottom([io.BytesIO(red), io.BytesIO(blue)], out)
+    assert sorted(page_images(out.getvalue())) == sorted([red, blue])
+
+
+@pytest.mark.parametrize("image_codec", ["jpeg", "flate"])
+def test_pil_image_is_encoded(image_codec):
+    out = io.BytesIO()
+    merge_invoices_top_bottom([Image.new("RGB", (60, 40), "green")], out, image_codec=image_codec)
+    doc = fitz.open(stream=out.getvalue(), filetype="pdf")
+    xref = doc[0].get_images(full=True)[0][0]
+    assert doc.extract_image(xref)["ext"] == ("jpeg" if image_codec == "jpeg" else "png")
+    doc.close()
+
+
+def make_pixmap(width=30, height=20, alpha=False):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), alpha)
+    pix.set_rect(pix.irect, (10, 20, 30, 255) if alpha else (10, 20, 30))
+    return pix
+
+
+@pytest.mark.parametrize("alpha", [False, True])
+def test_rendered_page_from_pixmap(alpha):
+    page = RenderedPage.from_pixmap(make_pixmap(alpha=alpha))
+    assert page.size == (30, 20)
+    assert page.mode == ("RGBA" if alpha else "RGB")
+    assert page.nbytes == page.stride * 20
+    assert page.to_image().getpixel((5, 5))[:3] == (10, 20, 30)
+
+
+def test_rendered_page_round_trips():
+    page = RenderedPage.from_pixmap(make_pixmap())
+    for copy in (RenderedPage.from_bytes(page.to_bytes()), pickle.loads(pickle.dumps(page))):
+        assert (copy.size, copy.mode, copy.stride) == (page.size, page.mode, page.stride)
+        assert bytes(copy.samples) == bytes(page.samples)
+
+
+def test_rendered_page_is_encoded_once_when_composed():
+    page = RenderedPage.from_pixmap(make_pixmap())
+    out = io.BytesIO()
+    merge_invoices_top_bottom([page, page], out)
+    images = page_images(out.getvalue())
+    assert len(images) == 1
+    assert Image.open(io.BytesIO(images[0])).size == (30, 20)
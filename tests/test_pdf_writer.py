@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 10:30
+# @File    : test_pdf_writer.py
+import io
+
+import fitz
+import pytest
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import DictionaryObject
+
+from utils.pdf_utils import merge_invoices_top_bottom
+from utils.pdf_writer import StreamingPdfWriter
+
+
+def make_pdf(page_count, width=200, height=300) -> bytes:
+    writer = PdfWriter()
+    for _ in range(page_count):
+        writer.add_blank_page(width=width, height=height)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def make_inherited_mediabox_pdf() -> bytes:
+    """MediaBox 只写在页面树根节点上（由页面继承）的 PDF"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 /MediaBox [0 0 123 456] >>",
+        b"<< /Type /Page /Parent 2 0 R >>",
+        b"<< /Type /Page /Parent 2 0 R >>",
+    ]
+    out = io.BytesIO()
+    out.write(b"%PDF-1.7\n")
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (num, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def all_objects(path):
+    reader = PdfReader(path)
+    for num in range(1, reader.trailer["/Size"]):
+        try:
+            obj = reader.get_object(num)
+        except Exception:
+            continue
+        if obj is not None:
+            yield obj
+
+
+def count_pages_nodes(path) -> int:
+    return sum(
+        1 for obj in all_objects(path)
+        if isinstance(obj, DictionaryObject) and obj.get("/Type") == "/Pages"
+    )
+
+
+@pytest.mark.parametrize("object_streams", [False, True])
+def test_merge_writes_single_page_tree(tmp_path, object_streams):
+    out = tmp_path / "out.pdf"
+    with StreamingPdfWriter(out, object_streams=object_streams) as writer:
+        writer.add_pdf(io.BytesIO(make_pdf(3)))
+        writer.add_pdf(io.BytesIO(make_pdf(2, width=100)))
+    reader = PdfReader(out)
+    assert len(reader.pages) == 5
+    assert reader.pages[3].mediabox.width == 100
+    assert count_pages_nodes(out) == 1
+
+
+def test_page_selection_does_not_copy_source_tree(tmp_path):
+    out = tmp_path / "out.pdf"
+    with StreamingPdfWriter(out) as writer:
+        assert writer.add_pdf(io.BytesIO(make_pdf(50)), pages=[7]) == 1
+    assert len(PdfReader(out).pages) == 1
+    assert count_pages_nodes(out) == 1
+    assert b"/Count 50" not in out.read_bytes()
+
+
+def test_inherited_attributes_are_kept(tmp_path):
+    out = tmp_path / "out.pdf"
+    with StreamingPdfWriter(out) as writer:
+        writer.add_pdf(io.BytesIO(make_inherited_mediabox_pdf()))
+    reader = PdfReader(out)
+    assert [(p.mediabox.width, p.mediabox.height) for p in reader.pages] == [(123, 456)] * 2
+    assert count_pages_nodes(out) == 1
+
+
+def test_on_page_progress(tmp_path):
+    progress = []
+    with StreamingPdfWriter(tmp_path / "out.pdf") as writer:
+        writer.add_pdf(io.BytesIO(make_pdf(3)), on_page=lambda done, total: progress.append((done, total)))
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_exception_aborts_output(tmp_path):
+    out = tmp_path / "out.pdf"
+    with pytest.raises(RuntimeError):
+        with StreamingPdfWriter(out) as writer:
+            writer.add_pdf(io.BytesIO(make_pdf(1)))
+            raise RuntimeError("stop")
+    assert not out.exists()
+
+
+@pytest.mark.parametrize("object_streams", [False, True])
+def test_keep_document_copies_outline_and_info(tmp_path, object_streams):
+    source = PdfWriter()
+    for _ in range(2):
+        source.add_blank_page(width=200, height=300)
+    source.add_outline_item("Page 2", 1)
+    source.add_metadata({"/Title": "Title"})
+    buf = io.BytesIO()
+    source.write(buf)
+
+    out = tmp_path / "out.pdf"
+    with StreamingPdfWriter(out, object_streams=object_streams) as writer:
+        writer.add_pdf(io.BytesIO(buf.getvalue()), keep_document=True)
+    reader = PdfReader(out)
+    assert reader.metadata.title == "Title"
+    assert [item.title for item in reader.outline] == ["Page 2"]
+    assert reader.get_destination_page_number(reader.outline[0]) == 1
+    assert count_pages_nodes(out) == 1
+
+
+def make_image_sheet(jpeg_bytes) -> bytes:
+    """用 reportlab 排版一张图片，模拟栅格排版得到的单页 PDF"""
+    out = io.BytesIO()
+    merge_invoices_top_bottom([io.BytesIO(jpeg_bytes)], out)
+    return out.getvalue()
+
+
+def make_jpeg(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (80, 50), color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("object_streams", [False, True])
+def test_duplicated_image_is_stored_once(tmp_path, object_streams):
+    red, blue = make_jpeg("red"), make_jpeg("blue")
+    out = tmp_path / "out.pdf"
+    with StreamingPdfWriter(out, object_streams=object_streams) as writer:
+        for data in (red, blue, red, red):
+            writer.add_pdf(io.BytesIO(make_image_sheet(data)))
+    assert (writer.images_written, writer.images_deduped) == (2, 2)
+    assert writer.dedup_saved_bytes > 0
+
+    assert len(PdfReader(out).pages) == 4
+    doc = fitz.open(out)
+    xrefs = [[img[0] for img in page.get_images(full=True)] for page in doc]
+    assert len({x for page_xrefs in xrefs for x in page_xrefs}) == 2
+    assert xrefs[0] == xrefs[2] == xrefs[3] != xrefs[1]
+    assert doc.extract_image(xrefs[0][0])["image"] == red
+    doc.close()
+
+
+def test_dedupe_disabled_keeps_every_copy(tmp_path):
+    data = make_jpeg("red")
+    out = tmp_path / "out.pdf"
+    with StreamingPdfWriter(out, dedupe_images=False) as writer:
+        for _ in range(3):
+            writer.add_pdf(io.BytesIO(make_image_sheet(data)))
+    assert writer.images_deduped == 0
+    doc = fitz.open(out)
+    assert len({img[0] for page in doc for img in page.get_images(full=True)}) == 3
+    doc.close()
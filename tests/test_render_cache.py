@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 14:30
+# @File    : test_render_cache.py
+import os
+import time
+
+import pytest
+
+from utils.render_cache import RenderCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RenderCache(tmp_path / "cache", max_bytes=1000)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF-1.4 source a")
+    return path
+
+
+def entry_file(cache, source, page_num=0, dpi=150, fmt="jpeg"):
+    key = cache.make_key(cache.file_digest(source), page_num, dpi, fmt)
+    return cache._entry_path(key, fmt)
+
+
+def test_miss_then_hit(cache, source):
+    assert cache.get(source) is None
+    cache.put(source, 0, 150, "jpeg", b"page-0")
+    assert cache.get(source) == b"page-0"
+    assert cache.get(source, page_num=1) is None
+    assert cache.get(source, dpi=300) is None
+    assert cache.has(source)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_hit_survives_rename(cache, source, tmp_path):
+    cache.put(source, 0, 150, "jpeg", b"page-0")
+    moved = tmp_path / "moved.pdf"
+    os.replace(source, moved)
+    assert cache.get(moved) == b"page-0"
+
+
+def test_reopen_keeps_entries(tmp_path, source):
+    cache = RenderCache(tmp_path / "cache")
+    cache.put(source, 0, 150, "png", b"png-bytes")
+    cache.close()
+    reopened = RenderCache(tmp_path / "cache")
+    assert reopened.get(source, fmt="png") == b"png-bytes"
+    reopened.close()
+
+
+def test_invalidated_when_content_changes(cache, source):
+    cache.put(source, 0, 150, "jpeg", b"old")
+    old_file = entry_file(cache, source)
+    source.write_bytes(b"%PDF-1.4 changed, longer content")
+    assert cache.get(source) is None
+    assert not old_file.exists()
+
+
+def test_invalidated_when_mtime_changes_same_size(cache, source):
+    cache.put(source, 0, 150, "jpeg", b"old")
+    source.write_bytes(b"%PDF-1.4 source b")  # 同样大小，不同内容
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+    assert cache.get(source) is None
+
+
+def test_unchanged_file_is_not_rehashed(cache, source, monkeypatch):
+    cache.file_digest(source)
+    monkeypatch.setattr("utils.render_cache.file_sha256", lambda path: pytest.fail("重新计算了摘要"))
+    cache.file_digest(source)
+
+
+def test_lru_eviction_over_budget(cache, source):
+    for page in range(3):
+        cache.put(source, page, 150, "jpeg", bytes(300))
+        time.sleep(0.01)
+    assert cache.get(source, page_num=0) is not None  # 第 0 页成为最近使用
+    time.sleep(0.01)
+    cache.put(source, 3, 150, "jpeg", bytes(300))
+    assert cache.get(source, page_num=1) is None
+    assert not entry_file(cache, source, page_num=1).exists()
+    for page in (0, 2, 3):
+        assert cache.get(source, page_num=page) is not None
+
+
+def test_missing_blob_is_a_miss(cache, source):
+    cache.put(source, 0, 150, "jpeg", b"page-0")
+    os.remove(entry_file(cache, source))
+    assert cache.get(source) is None
+    cache.put(source, 0, 150, "jpeg", b"again")
+    assert cache.get(source) == b"again"
+
+
+def test_truncated_blob_is_dropped(cache, source):
+    cache.put(source, 0, 150, "jpeg", b"complete-page")
+    path = entry_file(cache, source)
+    path.write_bytes(b"compl")
+    assert cache.get(source) is None
+    assert not path.exists()
+    cache.put(source, 0, 150, "jpeg", b"complete-page")
+    assert cache.get(source) == b"complete-page"
+
+
+def test_clear(cache, source):
+    cache.put(source, 0, 150, "jpeg", b"page-0")
+    cache.clear()
+    assert cache.get(source) is None
+    assert not entry_file(cache, source).exists()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 11:00
+# @File    : test_task_pool.py
+import threading
+import time
+
+import pytest
+
+from controllers.task_pool import (
+    REJECT_ABORT,
+    REJECT_BLOCK,
+    REJECT_CALLER_RUNS,
+    REJECT_DISCARD,
+    REJECT_DISCARD_OLDEST,
+    TaskPool,
+    TaskRejected,
+    current_group,
+)
+
+
+def block_worker(pool, group="default"):
+    """占住一个工作线程，返回放行事件"""
+    started, release = threading.Event(), threading.Event()
+    pool.submit(lambda: (started.set(), release.wait()), group=group)
+    assert started.wait(1)
+    return release
+
+
+def test_priority_order():
+    pool = TaskPool(workers=1)
+    release = block_worker(pool)
+    order = []
+    futures = [pool.submit(order.append, p, priority=p) for p in (1, 5, 3)]
+    release.set()
+    for future in futures:
+        future.result(1)
+    assert order == [5, 3, 1]
+    pool.shutdown()
+
+
+def test_group_pause_resume_stop():
+    pool = TaskPool(workers=2)
+    done = []
+    pool.pause("a")
+    future_a = pool.submit(done.append, "a", group="a")
+    pool.submit(done.append, "b", group="b").result(1)
+    assert done == ["b"]
+    pool.resume("a")
+    future_a.result(1)
+    assert done == ["b", "a"]
+
+    group_a = pool.group("a")
+    group_a.pause()
+    pending = pool.submit(done.append, "x", group=group_a)
+    group_a.stop()
+    assert pending.cancelled()
+    with pytest.raises(TaskRejected):
+        pool.submit(done.append, "y", group=group_a)
+    pool.shutdown()
+
+
+def test_current_group():
+    pool = TaskPool(workers=1)
+    assert pool.submit(lambda: current_group().name, group="g").result(1) == "g"
+    pool.shutdown()
+
+
+@pytest.mark.parametrize("policy", [REJECT_ABORT, REJECT_DISCARD, REJECT_DISCARD_OLDEST])
+def test_reject_policies(policy):
+    pool = TaskPool(workers=1, max_queue=1, reject_policy=policy)
+    release = block_worker(pool)
+    first = pool.submit(time.sleep, 0)
+    if policy == REJECT_ABORT:
+        with pytest.raises(TaskRejected):
+            pool.submit(time.sleep, 0)
+    elif policy == REJECT_DISCARD:
+        assert pool.submit(time.sleep, 0).cancelled()
+    else:
+        second = pool.submit(time.sleep, 0)
+        assert first.cancelled() and not second.cancelled()
+    assert pool.snapshot()["rejected"] == 1
+    release.set()
+    pool.shutdown()
+
+
+def test_block_policy_waits_for_space():
+    pool = TaskPool(workers=1, max_queue=1, reject_policy=REJECT_BLOCK)
+    release = block_worker(pool)
+    pool.submit(time.sleep, 0)
+    threading.Timer(0.1, release.set).start()
+    t0 = time.monotonic()
+    pool.submit(time.sleep, 0).result(1)
+    assert time.monotonic() - t0 >= 0.09
+    pool.shutdown()
+
+
+def test_caller_runs_in_submitting_thread():
+    pool = TaskPool(workers=1, max_queue=1, reject_policy=REJECT_CALLER_RUNS)
+    release = block_worker(pool)
+    pool.submit(time.sleep, 0)
+    future = pool.submit(threading.get_ident)
+    assert future.result(0) == threading.get_ident()
+    release.set()
+    pool.shutdown()
+
+
+def test_caller_runs_respects_paused_group():
+    pool = TaskPool(workers=1, max_queue=1, reject_policy=REJECT_CALLER_RUNS)
+    release = block_worker(pool)
+    pool.pause("paused")
+    pool.submit(time.sleep, 0, group="paused")
+    ran = []
+    submitter = threading.Thread(target=lambda: pool.submit(ran.append, 1, group="paused"))
+    submitter.start()
+    time.sleep(0.1)
+    assert ran == []  # 组暂停时不在调用方线程执行
+    pool.resume("paused")
+    release.set()
+    submitter.join(1)
+    assert not submitter.is_alive()
+    pool.shutdown()
+    assert ran == [1]
+
+
+def test_discard_oldest_keeps_periodic_tasks():
+    pool = TaskPool(workers=1, max_queue=1, reject_policy=REJECT_DISCARD_OLDEST)
+    release = block_worker(pool)
+    periodic = pool.schedule(lambda: None, 0.01)
+    deadline = time.monotonic() + 1
+    while pool.snapshot()["queued"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    # 队列里只有周期任务：新任务不能把它挤掉
+    future = pool.submit(time.sleep, 0)
+    assert pool.snapshot()["rejected"] == 1
+    assert future.cancelled()
+    release.set()
+    time.sleep(0.1)
+    assert periodic.runs >= 2
+    assert pool.snapshot()["scheduled"] + pool.snapshot()["queued"] + pool.snapshot()["busy"] >= 1
+    periodic.cancel()
+    pool.shutdown()
+
+
+def test_schedule_runs_repeatedly_and_cancels():
+    pool = TaskPool(workers=2)
+    periodic = pool.schedule(lambda: None, 0.02)
+    time.sleep(0.15)
+    periodic.cancel()
+    runs = periodic.runs
+    assert runs >= 3
+    time.sleep(0.1)
+    assert periodic.runs <= runs + 1
+    pool.shutdown()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 11:30
+# @File    : test_thread.py
+import threading
+import time
+
+import pytest
+
+from controllers import thread as thread_module
+from controllers.thread import SCHEDULE_FIXED_DELAY, SCHEDULE_FIXED_RATE, StoppableThread
+
+
+@pytest.mark.parametrize("errors, expected", [(1, 0.5), (2, 1.0), (4, 4.0), (8, 30.0), (5000, 30.0)])
+def test_backoff_delay_is_capped_without_overflow(errors, expected):
+    thread = StoppableThread(backoff_base=0.5, backoff_factor=2.0, backoff_max=30.0)
+    thread.consecutive_errors = errors
+    assert thread._backoff_delay() == expected
+
+
+def test_backoff_delay_base_above_max():
+    thread = StoppableThread(backoff_base=90.0, backoff_max=60.0)
+    thread.consecutive_errors = 5000
+    assert thread._backoff_delay() == 60.0
+
+
+class FakeClock:
+    """可控的 time.monotonic，等待时直接把时间往前拨"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+class ClockEvent(threading.Event):
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.waits = []
+
+    def wait(self, timeout=None):
+        if self.is_set():
+            return True
+        self.waits.append(round(timeout, 6))
+        self.clock.now += timeout
+        return self.is_set()
+
+
+def run_scheduled(monkeypatch, durations, **kwargs):
+    """
+    同步运行线程循环，第 i 次执行耗时 durations[i]（假时钟），全部执行完后停止
+
+    :return: (每次开始执行的时间, 每次等待的秒数)
+    """
+    clock = FakeClock()
+    monkeypatch.setattr(thread_module, "time", clock)
+    stop_event = ClockEvent(clock)
+    starts = []
+
+    def target():
+        starts.append(round(clock.now, 6))
+        clock.now += durations[len(starts) - 1]
+        if len(starts) == len(durations):
+            stop_event.set()
+
+    thread = StoppableThread(target=target, stop_event=stop_event, **kwargs)
+    thread.run()
+    assert thread.run_count == len(durations)
+    return starts, stop_event.waits
+
+
+def test_fixed_rate_corrects_drift(monkeypatch):
+    starts, waits = run_scheduled(monkeypatch, [0.3] * 4, interval=1.0, schedule=SCHEDULE_FIXED_RATE)
+    assert starts == [0.0, 1.0, 2.0, 3.0]
+    assert waits == [0.7, 0.7, 0.7]
+
+
+def test_fixed_rate_skips_missed_ticks(monkeypatch):
+    starts, _ = run_scheduled(monkeypatch, [0.2, 2.5, 0.2, 0.2], interval=1.0, schedule=SCHEDULE_FIXED_RATE)
+    # 第 2 次执行到 3.5 才结束，节拍 2、3 被跳过，不连续补跑
+    assert starts == [0.0, 1.0, 4.0, 5.0]
+
+
+def test_fixed_delay_waits_after_each_run(monkeypatch):
+    starts, waits = run_scheduled(monkeypatch, [0.3, 0.5, 0.1], interval=1.0, schedule=SCHEDULE_FIXED_DELAY)
+    assert starts == [0.0, 1.3, 2.8]
+    assert waits == [1.0, 1.0]
+
+
+def test_jitter_stays_within_bounds(monkeypatch):
+    _, waits = run_scheduled(monkeypatch, [0.0] * 50, interval=1.0, jitter=0.2)
+    assert all(0.8 <= w <= 1.2 for w in waits)
+    assert len(set(waits)) > 1
+
+
+def test_backoff_after_errors(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(thread_module, "time", clock)
+    stop_event = ClockEvent(clock)
+    results = [False, False, True, False]
+
+    def target():
+        ok = results[thread.run_count]
+        if thread.run_count == len(results) - 1:
+            stop_event.set()
+        if not ok:
+            raise RuntimeError("失败")
+
+    thread = StoppableThread(target=target, stop_event=stop_event, interval=1.0, backoff_base=0.5)
+    thread.run()
+    assert stop_event.waits == [0.5, 1.0, 1.0]
+    assert (thread.error_count, thread.consecutive_errors) == (3, 1)
+
+
+def test_stop_wakes_sleeping_thread():
+    ran = threading.Event()
+    thread = StoppableThread(target=ran.set, interval=60.0)
+    thread.start()
+    assert ran.wait(5)
+    t0 = time.monotonic()
+    thread.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_stop_wakes_paused_thread():
+    thread = StoppableThread(target=lambda: None, interval=0.01, paused=True)
+    thread.start()
+    thread.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert thread.run_count == 0
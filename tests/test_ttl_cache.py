@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Author  : wt
+# @Time    : 2026/10/19 10:00
+# @File    : test_ttl_cache.py
+import threading
+import time
+
+import pytest
+
+from controllers.task_pool import REJECT_ABORT, REJECT_CALLER_RUNS, TaskPool
+from controllers.ttl_cache import TTLCache
+
+
+class Loader:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, key):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return f"{key}-{self.calls}"
+
+
+def saturated_pool(policy):
+    """1 个线程被占住、队列已满的线程池，返回 (pool, 放行事件)"""
+    release = threading.Event()
+    pool = TaskPool(workers=1, max_queue=1, reject_policy=policy)
+    started = threading.Event()
+    pool.submit(lambda: (started.set(), release.wait()))
+    started.wait(1)
+    pool.submit(release.wait)
+    return pool, release
+
+
+def call_with_timeout(fn, timeout=2.0):
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", fn()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "调用被阻塞"
+    return result["value"]
+
+
+def test_single_flight():
+    loader = Loader(delay=0.1)
+    cache = TTLCache(loader, ttl=10)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k"))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.calls == 1
+    assert results == ["k-1"] * 10
+
+
+def test_refresh_ahead_returns_current_value():
+    loader = Loader(delay=0.05)
+    cache = TTLCache(loader, ttl=0.3, refresh_ahead=0.5)
+    assert cache.get("k") == "k-1"
+    time.sleep(0.2)
+    assert cache.get("k") == "k-1"  # 触发后台刷新，仍返回当前值
+    time.sleep(0.15)
+    assert cache.get("k") == "k-2"
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_serve_stale_on_error():
+    loader = Loader()
+    cache = TTLCache(loader, ttl=0.05, refresh_ahead=1, stale_ttl=0.5)
+    assert cache.get("k") == "k-1"
+    loader.fail = True
+    time.sleep(0.1)
+    assert cache.get("k") == "k-1"
+    time.sleep(0.5)
+    with pytest.raises(RuntimeError):
+        cache.get("k")
+
+
+def test_max_entries_evicts_lru():
+    cache = TTLCache(Loader(), ttl=10, max_entries=2)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")
+    assert cache.peek("b") is None
+    assert cache.peek("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_base_exception_releases_waiters():
+    def loader(key):
+        raise KeyboardInterrupt
+
+    cache = TTLCache(loader, ttl=10)
+    with pytest.raises(KeyboardInterrupt):
+        cache.get("k")
+    assert not cache._flights
+
+
+def test_refresh_rejected_by_abort_pool():
+    pool, release = saturated_pool(REJECT_ABORT)
+    loader = Loader()
+    cache = TTLCache(loader, ttl=0.2, refresh_ahead=0.1, pool=pool)
+    try:
+        assert cache.get("k") == "k-1"
+        time.sleep(0.05)
+        # 线程池拒绝刷新：命中不抛异常，也不留下在途的加载
+        assert call_with_timeout(lambda: cache.get("k")) == "k-1"
+        assert not cache._flights
+        time.sleep(0.2)
+        assert call_with_timeout(lambda: cache.get("k")) == "k-2"
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_refresh_caller_runs_pool_does_not_deadlock():
+    pool, release = saturated_pool(REJECT_CALLER_RUNS)
+    loader = Loader()
+    cache = TTLCache(loader, ttl=1, refresh_ahead=0.01, pool=pool)
+    try:
+        assert cache.get("k") == "k-1"
+        time.sleep(0.02)
+        # 刷新在当前线程执行，不能在持有缓存锁时进入 _load
+        assert call_with_timeout(lambda: cache.get("k")) == "k-1"
+        assert cache.peek("k") == "k-2"
+        assert not cache._flights
+    finally:
+        release.set()
+        pool.shutdown()